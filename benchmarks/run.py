@@ -0,0 +1,190 @@
+""" Times the convert_* functions and the visualization helpers on synthetic data
+
+Run from the repository root, for instance:
+
+    python -m benchmarks.run --sizes 1000 10000 100000 --output results.csv
+
+Every result row holds the best wall time over the repeats and the peak
+memory traced by tracemalloc during one more run, so the rows of a case
+across sizes give its scaling curve.
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import timedelta
+from typing import Callable, Dict, Optional, Sequence, Tuple
+import pandas as pd
+from geostructures.geohash import H3Hasher
+from geochron import (
+    convert_chronnet, convert_geosynchnet, convert_geotimehash, convert_time_grid, convert_timehex
+)
+from geochron.visualization.folium import (
+    timehex_backgroundata, timehex_styledict, timehex_timestampedgeojson
+)
+from geochron.visualization.pydeck import network_arc_circle
+from benchmarks.synthetic import DATASETS, make_dataset
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+HASHER = H3Hasher(resolution=10)
+TIME_DELTA = timedelta(hours=1)
+
+
+def _unchanged(fcol):
+    return fcol
+
+
+def _timehex(fcol):
+    return convert_timehex(fcol, TIME_DELTA, HASHER.hash_collection)
+
+
+def _chronnet(fcol):
+    return convert_chronnet(fcol, TIME_DELTA, HASHER.hash_collection, True, 'directed')
+
+
+def _geosynchnet(fcol):
+    return convert_geosynchnet(fcol, TIME_DELTA, HASHER.hash_collection)
+
+
+def _geotimehash(fcol):
+    return convert_geotimehash(fcol, 8, HASHER.hash_collection)
+
+
+def _time_grid(fcol):
+    return convert_time_grid(fcol, timedelta(days=1), TIME_DELTA, HASHER.hash_coordinates)
+
+
+# case name -> (untimed preparation of the dataset, timed function of the prepared input)
+CASES: Dict[str, Tuple[Callable, Callable]] = {
+    'convert_timehex': (_unchanged, _timehex),
+    'convert_chronnet': (_unchanged, _chronnet),
+    'convert_geosynchnet': (_unchanged, _geosynchnet),
+    'convert_geotimehash': (_unchanged, _geotimehash),
+    'convert_time_grid': (_unchanged, _time_grid),
+    'timehex_timestampedgeojson': (_timehex, timehex_timestampedgeojson),
+    'timehex_styledict': (_timehex, timehex_styledict),
+    'timehex_backgroundata': (_timehex, timehex_backgroundata),
+    'network_arc_circle': (_chronnet, network_arc_circle),
+}
+
+
+def measure(func: Callable, arg, repeat: int = 1,
+     memory: bool = True) -> Tuple[float, Optional[int]]:
+    """
+    Times a function and traces its peak memory.
+
+    Args:
+        func: the function to measure
+
+        arg: the argument the function is called with
+
+        repeat: the number of timed runs
+
+        memory: whether one more run traces the peak memory
+
+    Returns:
+        A tuple of (best wall time in seconds, peak traced bytes or None)
+    """
+    seconds = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        begin = time.perf_counter()
+        func(arg)
+        seconds = min(seconds, time.perf_counter() - begin)
+
+    if not memory:
+        return seconds, None
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(arg)
+        return seconds, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmarks(sizes: Sequence[int] = SIZES, cases: Optional[Sequence[str]] = None,
+     datasets: Sequence[str] = DATASETS, repeat: int = 1, memory: bool = True, seed: int = 0,
+     report: Optional[Callable] = None) -> pd.DataFrame:
+    """
+    Runs every case on every dataset at every size. Each dataset is
+    generated once per size and shared by the cases.
+
+    Args:
+        sizes: the numbers of shapes
+
+        cases: the names of the cases to run, all of CASES by default
+
+        datasets: the names of the synthetic datasets
+
+        repeat: the number of timed runs of each case
+
+        memory: whether the peak memory is traced
+
+        seed: the seed of the synthetic datasets
+
+        report: an optional function called with every result row
+
+    Returns:
+        A pandas dataframe with the columns case, dataset, size, seconds and
+        peak_mb
+    """
+    unknown = sorted(set(cases or []) - set(CASES))
+    if unknown:
+        raise ValueError(f"cases must be among {tuple(CASES)}, not {unknown}")
+
+    rows = []
+    for size in sizes:
+        for dataset in datasets:
+            fcol = make_dataset(dataset, size, seed)
+            for case in cases or CASES:
+                prepare, func = CASES[case]
+                seconds, peak = measure(func, prepare(fcol), repeat, memory)
+                row = {
+                    'case': case, 'dataset': dataset, 'size': size, 'seconds': seconds,
+                    'peak_mb': None if peak is None else peak / 2**20
+                }
+                if report is not None:
+                    report(row)
+                rows.append(row)
+
+    return pd.DataFrame(rows, columns=['case', 'dataset', 'size', 'seconds', 'peak_mb'])
+
+
+def main(argv: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Runs the benchmarks from the command line and prints the results.
+
+    Args:
+        argv: the command line arguments, sys.argv by default
+
+    Returns:
+        The results dataframe
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    parser.add_argument('--cases', nargs='+', choices=list(CASES))
+    parser.add_argument('--datasets', nargs='+', choices=list(DATASETS), default=list(DATASETS))
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--no-memory', action='store_true', help='skip the traced run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='a CSV file to write the results to')
+    args = parser.parse_args(argv)
+
+    def report(row):
+        peak = '' if row['peak_mb'] is None else f"{row['peak_mb']:10.1f} MB"
+        timing = f"{row['size']:>9} {row['seconds']:10.3f} s {peak}"
+        print(f"{row['case']:28} {row['dataset']:12} {timing}", flush=True)
+
+    results = run_benchmarks(
+        args.sizes, args.cases, args.datasets, args.repeat, not args.no_memory, args.seed, report
+    )
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+    return results
+
+
+if __name__ == '__main__':
+    main()
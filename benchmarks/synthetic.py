@@ -0,0 +1,161 @@
+""" Deterministic synthetic datasets for the benchmarks"""
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+from geostructures import Coordinate, GeoBox, GeoCircle, GeoPoint
+from geostructures.collections import FeatureCollection
+from geostructures.time import TimeInterval
+
+DATASETS = ('random_walk', 'stationary', 'intervals')
+# every dataset sits around central London and starts at the same time
+CENTER = (51.5074, -0.1278)
+START = datetime(2020, 1, 1, tzinfo=timezone.utc)
+# roughly 20 meters in degrees of latitude
+STEP_DEGREES = 0.0002
+
+
+def random_walk_points(n_points: int, n_tracks: int = 10, seed: int = 0) -> pd.DataFrame:
+    """
+    Generates tracks that each take a random step about every minute, like
+    moving vehicles.
+
+    Args:
+        n_points: the total number of points
+
+        n_tracks: the number of tracks the points are spread over
+
+        seed: the seed of the random generator
+
+    Returns:
+        A pandas dataframe with the columns lat, lon, timestamp and track_id,
+        sorted by time
+    """
+    rng = np.random.default_rng(seed)
+    track_ids = np.arange(n_points) % n_tracks
+    steps = rng.normal(0, STEP_DEGREES, size=(n_points, 2))
+    positions = np.empty_like(steps)
+    starts = CENTER + rng.normal(0, 50 * STEP_DEGREES, size=(n_tracks, 2))
+    for track in range(n_tracks):
+        mask = track_ids == track
+        positions[mask] = starts[track] + np.cumsum(steps[mask], axis=0)
+    seconds = (np.arange(n_points) // n_tracks) * 60 + rng.integers(0, 60, size=n_points)
+
+    points = pd.DataFrame({
+        'lat': positions[:, 0],
+        'lon': positions[:, 1],
+        'timestamp': pd.Timestamp(START) + pd.to_timedelta(seconds, unit='s'),
+        'track_id': track_ids
+    })
+    return points.sort_values('timestamp', kind='stable', ignore_index=True)
+
+
+def stationary_points(n_points: int, n_sensors: int = 50, seed: int = 0) -> pd.DataFrame:
+    """
+    Generates readings from sensors at fixed positions, so the same
+    coordinates repeat throughout the data.
+
+    Args:
+        n_points: the total number of readings
+
+        n_sensors: the number of sensors
+
+        seed: the seed of the random generator
+
+    Returns:
+        A pandas dataframe with the columns lat, lon, timestamp and track_id,
+        sorted by time
+    """
+    rng = np.random.default_rng(seed)
+    sensors = CENTER + rng.normal(0, 50 * STEP_DEGREES, size=(n_sensors, 2))
+    sensor_ids = rng.integers(0, n_sensors, size=n_points)
+    seconds = np.sort(rng.integers(0, max(n_points // n_sensors, 1) * 600, size=n_points))
+
+    return pd.DataFrame({
+        'lat': sensors[sensor_ids, 0],
+        'lon': sensors[sensor_ids, 1],
+        'timestamp': pd.Timestamp(START) + pd.to_timedelta(seconds, unit='s'),
+        'track_id': sensor_ids
+    })
+
+
+def points_to_fcol(points: pd.DataFrame) -> FeatureCollection:
+    """
+    Converts a dataframe of points into a FeatureCollection of GeoPoints,
+    with the track_id of each point as a property.
+
+    Args:
+        points: a pandas dataframe with the columns lat, lon, timestamp and
+        track_id
+
+    Returns:
+        A FeatureCollection
+    """
+    return FeatureCollection([
+        GeoPoint(
+            Coordinate(lon, lat), dt=timestamp.to_pydatetime(), properties={'track_id': track_id}
+        )
+        for lat, lon, timestamp, track_id in points.itertuples(index=False)
+    ])
+
+
+def interval_shapes(n_shapes: int, n_tracks: int = 10, seed: int = 0) -> FeatureCollection:
+    """
+    Generates circles and boxes that each last between one and thirty
+    minutes, like dwell areas along random walks.
+
+    Args:
+        n_shapes: the number of shapes
+
+        n_tracks: the number of tracks the shapes are spread over
+
+        seed: the seed of the random generator
+
+    Returns:
+        A FeatureCollection
+    """
+    points = random_walk_points(n_shapes, n_tracks, seed)
+    rng = np.random.default_rng(seed + 1)
+    durations = rng.integers(60, 1800, size=n_shapes).tolist()
+    sizes = rng.uniform(0.5, 2, size=n_shapes).tolist()
+
+    shapes = []
+    for pos, (lat, lon, timestamp, track_id) in enumerate(points.itertuples(index=False)):
+        start = timestamp.to_pydatetime()
+        interval = TimeInterval(start, start + timedelta(seconds=durations[pos]))
+        properties = {'track_id': track_id}
+        if pos % 2:
+            half = sizes[pos] * STEP_DEGREES
+            shapes.append(GeoBox(
+                Coordinate(lon - half, lat + half), Coordinate(lon + half, lat - half),
+                dt=interval, properties=properties
+            ))
+        else:
+            shapes.append(GeoCircle(
+                Coordinate(lon, lat), sizes[pos] * 20, dt=interval, properties=properties
+            ))
+
+    return FeatureCollection(shapes)
+
+
+def make_dataset(name: str, size: int, seed: int = 0) -> FeatureCollection:
+    """
+    Generates one of the synthetic datasets.
+
+    Args:
+        name: one of DATASETS
+
+        size: the number of shapes
+
+        seed: the seed of the random generator
+
+    Returns:
+        A FeatureCollection
+    """
+    if name == 'random_walk':
+        return points_to_fcol(random_walk_points(size, seed=seed))
+    if name == 'stationary':
+        return points_to_fcol(stationary_points(size, seed=seed))
+    if name == 'intervals':
+        return interval_shapes(size, seed=seed)
+
+    raise ValueError(f"name must be one of {DATASETS}, not {name!r}")
@@ -3,25 +3,41 @@ import sys
 
 from geochron._version import __version__  # noqa: F401
 from geochron.utils.conditional_imports import ConditionalPackageInterceptor
-from geochron.chronnet import convert_chronnet
-from geochron.timehex import convert_timehex
-from geochron.time_grid import convert_time_grid
-from geochron.geotimehash import convert_geotimehash
-from geochron.geosynchnet import convert_geosynchnet
+from geochron.chronnet import ChronnetBuilder, convert_chronnet
+from geochron.timehex import convert_timehex, iter_timehex, iter_timehex_chunks
+from geochron.time_grid import convert_time_grid, convert_time_grid_batch
+from geochron.geotimehash import convert_geotimehash, iter_geotimehash, iter_geotimehash_chunks
+from geochron.geosynchnet import GeosynchnetWindow, convert_geosynchnet
+from geochron.hash_cache import HashCache
+from geochron.networks import load_network, save_network
+from geochron.out_of_core import convert_geotimehash_file, convert_timehex_file
 
 ConditionalPackageInterceptor.permit_packages(
     {
         'networkx': 'networkx>=3.0,<4.0',
-        'timehash': 'timehash>=1.2,<2',
+        'scipy': 'scipy>=1.11,<2.0',
         'branca': 'branca>=0.7.2,<1.0',
+        'pyarrow': 'pyarrow>=14',
     }
 )
 sys.meta_path.append(ConditionalPackageInterceptor)  # type: ignore
 
 __all__ = [
+    'ChronnetBuilder',
+    'GeosynchnetWindow',
+    'HashCache',
     'convert_chronnet',
     'convert_timehex',
+    'convert_timehex_file',
     'convert_geotimehash',
+    'convert_geotimehash_file',
     'convert_geosynchnet',
-    'convert_time_grid' 
+    'convert_time_grid',
+    'convert_time_grid_batch',
+    'iter_geotimehash',
+    'iter_geotimehash_chunks',
+    'iter_timehex',
+    'iter_timehex_chunks',
+    'load_network',
+    'save_network'
 ]
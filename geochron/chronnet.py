@@ -1,12 +1,16 @@
 """ Representation as chronnets """
+from concurrent.futures import Executor
 from datetime import  timedelta
-import itertools
-from typing import Callable, List
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
 import numpy as np
 import pandas as pd
 
 from geostructures.collections import  FeatureCollection,Track
-from geochron.time_slicing import get_timestamp_intervals, time_slice_track
+from geochron.columnar import hash_by_interval
+from geochron.fleet import hash_fleet_by_interval, split_fleet
+from geochron.hashing import as_cell_table, count_cells_by_interval, count_matrix, hash_items
+from geochron.networks import collapse_undirected, edges_to_networkx, format_network
+from geochron.time_slicing import track_time_bounds
 
 
 def hash_tracks_into_netdf(track_list: List, timestamps: List, hash_func: Callable):
@@ -45,68 +49,148 @@ def hash_tracks_into_netdf(track_list: List, timestamps: List, hash_func: Callab
     return df
 
 
-def chronnet_create(df: pd.DataFrame, self_loops: bool, mode= str):
+def _edge_frame(transitions, labels):
     """
-    Converts a properly formatted pandas dataframe with the columns
-    of cell and time to a networkx network where nodes are locations
-    and edges are formed between nodes with consecutive times. 
-    
+    Converts a sparse cell x cell transition matrix into an edge list sorted
+    by the cell labels.
+
     Args:
-        df: a pandas dataframe withe two columns cell and time
+        transitions: a scipy sparse matrix of edge weights
+
+        labels: the cell labels indexing the rows and columns
+
+    Returns:
+        A pandas dataframe with the columns from, to and weight, sorted by
+        from and to
+    """
+    transitions = transitions.tocoo()
+    labels = np.asarray(labels, dtype=object)
+
+    # sort by label rather than by code so edges come out in the label order
+    label_rank = np.argsort(np.argsort(labels))
+    order = np.lexsort((label_rank[transitions.col], label_rank[transitions.row]))
+    links = pd.DataFrame({
+        'from': labels[transitions.row[order]],
+        'to': labels[transitions.col[order]],
+        'weight': transitions.data[order]
+    })
+
+    return links
+
+
+def _finish_chronnet(links: pd.DataFrame, nodes: np.ndarray, self_loops: bool, mode: str,
+     output: str):
+    """
+    Applies the self loop and mode options to a directed chronnet edge list
+    and returns it in the requested output format.
+
+    Args:
+        links: a pandas dataframe with the columns from, to and weight
+
+        nodes: the sorted cell labels
 
         self_loops: whether self loops are included in the network
 
         mode: whether the network is directed or undirected
 
+        output: the output format, see chronnet_create
+
     Returns:
-        A networkx network
+        The network in the requested output format
     """
-    # pylint: disable=import-outside-toplevel
-    import networkx as nx # type: ignore
-    time_seq = sorted(np.unique(df['time']))
-    if len(time_seq) < 2: # pragma: no cover
-        print("The total time interval in the dataset should be larger than two.")
-    links = pd.DataFrame()
-    cells_before=[]
-    cells_after=[]
-    weights = []
-    for i in range(len(time_seq)-1):
-        time1 = df[df.time == time_seq[i]]['cell'].tolist()
-        time2 = df[df.time == time_seq[i+1]]['cell'].tolist()
-        connections = list(itertools.product(time1, time2))
-        cells_before.extend([connection[0] for connection in connections])
-        cells_after.extend([connection[1] for connection in connections])
-        weights.extend([1]*len(connections))
-    links['from'] = cells_before
-    links['to'] = cells_after
-    links['weight'] = weights
-    links = links.sort_values(by=['from', 'to']).reset_index().drop(columns = ['index'])
-    links = links.groupby(['from', 'to'], as_index=False)['weight'].sum().reset_index()
-    net = nx.DiGraph()
-    if len(links) !=0:
-        net.add_nodes_from(np.unique(df['cell']))
-        edgelist = []
-        for index, rows in links.iterrows():
-            edgelist.append(tuple([rows['from'], rows['to'], rows['weight']]))
-        net.add_weighted_edges_from(edgelist)
-        if self_loops is False:
-            net.remove_edges_from(list(nx.selfloop_edges(net)))
+    empty = len(links) == 0
+    if self_loops is False:
+        links = links[links['from'] != links['to']]
+
+    if output != 'networkx':
         if mode == 'undirected':
-            net = net.to_undirected()
-    else: # pragma: no cover
+            links = collapse_undirected(links)
+        return format_network(links, output, nodes, directed=mode != 'undirected')
+
+    if empty:
         print("Empty graph returned.")
+        return edges_to_networkx(links, directed=True)
+
+    net = edges_to_networkx(links, nodes, directed=True)
+    if mode == 'undirected':
+        net = net.to_undirected()
 
     return net
 
 
-def convert_chronnet(fcol: FeatureCollection, time_delta: timedelta,
-     hash_func: Callable, self_loops: bool, mode: str):
+def transition_edges(cells: pd.DataFrame, entity_offsets: Optional[np.ndarray] = None):
+    """
+    Computes the weighted chronnet edge list of a cell table with sparse
+    linear algebra. With X the interval x cell count matrix of the observed
+    intervals, the transition matrix is the sum of the outer products of
+    consecutive rows, X[:-1]^T X[1:], so the weight of an edge from cell a to
+    cell b is count_t(a) * count_t+1(b) summed over consecutive intervals.
+
+    Args:
+        cells: a cell table with the columns interval, cell and count
+
+        entity_offsets: for the cell table of a fleet, the first interval of
+        each entity; consecutive intervals of different entities are not
+        linked
+
+    Returns:
+        A pandas dataframe with the columns from, to and weight, sorted by
+        from and to
+    """
+    matrix, labels = count_matrix(cells)
+    if entity_offsets is None:
+        return _edge_frame(matrix[:-1].T @ matrix[1:], labels)
+
+    entity = np.searchsorted(entity_offsets, np.unique(cells['interval'].to_numpy()), side='right')
+    linked = np.flatnonzero(entity[:-1] == entity[1:])
+
+    return _edge_frame(matrix[linked].T @ matrix[linked + 1], labels)
+
+
+def chronnet_create(df: Union[pd.DataFrame, Tuple], self_loops: bool, mode= str,
+     output: str = 'networkx'):
+    """
+    Converts a cell table, or a properly formatted pandas dataframe with the
+    columns of cell and time, to a network where nodes are locations
+    and edges are formed between nodes with consecutive times.
+
+    Args:
+        df: a cell table with the columns interval, cell and count, an
+        (interval table, cell table) pair as returned by hash_by_interval, or
+        a pandas dataframe with the two columns cell and time
+
+        self_loops: whether self loops are included in the network
+
+        mode: whether the network is directed or undirected
+
+        output: 'networkx' for a networkx network, 'edgelist' for a pandas
+        dataframe with the columns from, to and weight, or 'csr' for a scipy
+        CSR adjacency matrix and its node index
+
+    Returns:
+        The network in the requested output format
+    """
+    cells = as_cell_table(df)
+    if cells['interval'].nunique() < 2: # pragma: no cover
+        print("The total time interval in the dataset should be larger than two.")
+
+    links = transition_edges(cells)
+    nodes = np.unique(cells['cell'].to_numpy(dtype=object))
+
+    return _finish_chronnet(links, nodes, self_loops, mode, output)
+
+
+def convert_chronnet(fcol: Union[FeatureCollection, pd.DataFrame], time_delta: timedelta,
+     hash_func: Callable, self_loops: bool, mode: str, output: str = 'networkx',
+     n_jobs: Optional[int] = None, executor: Optional[Executor] = None,
+     entity_key: Optional[str] = None, per_entity: bool = False):
     """
     Converts a FeatureCollection into a chronnet with a specified time interval
     using a specified hashing function
     
     Args:
-        fcol: a FeatureCollection with time bound shapes 
+        fcol: a FeatureCollection with time bound shapes, or a pandas
+        dataframe of points with the columns lat, lon and timestamp
 
         time_delta: the desired time interval
 
@@ -116,16 +200,222 @@ def convert_chronnet(fcol: FeatureCollection, time_delta: timedelta,
 
         mode: whether the network is directed or undirected
 
+        output: 'networkx' for a networkx network, 'edgelist' for a pandas
+        dataframe with the columns from, to and weight, or 'csr' for a scipy
+        CSR adjacency matrix and its node index
+
+        n_jobs: the number of worker processes hashing consecutive time ranges
+        in parallel; -1 uses every core
+
+        executor: a concurrent.futures Executor to run the hashing on
+
+        entity_key: the shape property, or the dataframe column, identifying
+        the entity of each shape; each entity is sliced into intervals from
+        its own start and transitions never link two entities
+
+        per_entity: with entity_key, whether to return the network of every
+        entity instead of their sum
+
     Returns:
-        A networkx network 
+        The network in the requested output format, or with per_entity a dict
+        of the network of each entity in order of first appearance
     """
-    track = Track(fcol.geoshapes)
-    timestamps = get_timestamp_intervals(track, time_delta)
-
-    track_list = time_slice_track(track, timestamps)
+    if entity_key is not None:
+        fleet = hash_fleet_by_interval(fcol, time_delta, hash_func, entity_key, n_jobs, executor)
+        if per_entity:
+            return {
+                entity: chronnet_create(cells, self_loops, mode, output)
+                for entity, _, _, cells in split_fleet(fleet, time_delta)
+            }
+        links = transition_edges(fleet.cells, fleet.offsets)
+        nodes = np.unique(fleet.cells['cell'].to_numpy(dtype=object))
+        return _finish_chronnet(links, nodes, self_loops, mode, output)
 
-    df = hash_tracks_into_netdf(track_list, timestamps, hash_func)
+    tables = hash_by_interval(fcol, time_delta, hash_func, n_jobs, executor)
 
-    chronnet = chronnet_create(df, self_loops, mode)
+    chronnet = chronnet_create(tables, self_loops, mode, output)
 
     return chronnet
+
+
+class ChronnetBuilder:
+    """
+    Builds a chronnet incrementally from time-ordered chunks of features.
+
+    Intervals are anchored on the start of the first chunk, as in
+    convert_chronnet. The builder only keeps the accumulated edge weights,
+    the cell labels and the cell counts of the last few observed intervals,
+    so memory is proportional to the graph rather than the history. The open
+    last interval is carried across chunk boundaries and its edges are only
+    committed once a later interval is observed.
+
+    Args:
+        time_delta: the desired time interval
+
+        hash_func: the hashing function
+    """
+
+    def __init__(self, time_delta: timedelta, hash_func: Callable):
+        # pylint: disable=import-outside-toplevel
+        from scipy import sparse # type: ignore
+
+        self.time_delta = time_delta
+        self.hash_func = hash_func
+        self._step = np.timedelta64(time_delta).astype('timedelta64[ns]')
+        self._origin: Optional[np.datetime64] = None
+        self._last_start: Optional[np.datetime64] = None
+        self._last_end: Optional[np.datetime64] = None
+        self._codes: Dict = {}
+        self._edges = sparse.csr_matrix((0, 0), dtype=np.int64)
+        # (interval id, {cell code: count}) of the last two closed intervals and the open one
+        self._closed: List[Tuple[int, Dict[int, int]]] = []
+        self._open: Optional[Tuple[int, Dict[int, int]]] = None
+
+    def _count_rows(self, rows: List[Dict[int, int]]):
+        """
+        Stacks per interval cell counts into a sparse interval x cell matrix.
+
+        Args:
+            rows: a list of {cell code: count} dictionaries
+
+        Returns:
+            A scipy CSR matrix
+        """
+        # pylint: disable=import-outside-toplevel
+        from scipy import sparse # type: ignore
+
+        row_ids = [i for i, row in enumerate(rows) for _ in row]
+        codes = [code for row in rows for code in row]
+        counts = [count for row in rows for count in row.values()]
+        return sparse.csr_matrix(
+            (np.array(counts, dtype=np.int64), (row_ids, codes)),
+            shape=(len(rows), len(self._codes))
+        )
+
+    def _transitions(self, rows: List[Dict[int, int]]):
+        """
+        Computes the chronnet transitions between consecutive intervals.
+
+        Args:
+            rows: a list of {cell code: count} dictionaries of consecutive
+            observed intervals
+
+        Returns:
+            A scipy sparse cell x cell matrix
+        """
+        matrix = self._count_rows(rows)
+        return matrix[:-1].T @ matrix[1:]
+
+    def add(self, fcol: FeatureCollection):
+        """
+        Adds a chunk of features. Chunks must be time-ordered: no shape may
+        start before the last shape of the previous chunk.
+
+        Args:
+            fcol: a FeatureCollection with time bound shapes
+
+        Returns:
+            The builder itself
+        """
+        track = Track(fcol.geoshapes)
+        if not track:
+            return self
+
+        starts, ends = track_time_bounds(track)
+        if self._origin is None:
+            self._origin = starts[0]
+        elif starts[0] < self._last_start:
+            raise ValueError('Chunks must be added in time order.')
+        self._last_start, self._last_end = starts[-1], ends[-1]
+
+        buckets = (starts - self._origin) // self._step
+        buckets[buckets != (ends - self._origin) // self._step] = -1
+        kept = np.flatnonzero(buckets >= 0)
+        positions, cells = hash_items(
+            [track.geoshapes[pos] for pos in kept], self.hash_func, wrap=Track
+        )
+        table = count_cells_by_interval(buckets, kept[positions], cells)
+
+        codes = np.array([
+            self._codes.setdefault(cell, len(self._codes))
+            for cell in table['cell'].cat.categories
+        ], dtype=np.int64)
+        rows: List[Tuple[int, Dict[int, int]]] = []
+        for interval, code, count in zip(
+            table['interval'].tolist(),
+            codes[table['cell'].cat.codes.to_numpy()].tolist(),
+            table['count'].tolist()
+        ):
+            if not rows or rows[-1][0] != interval:
+                rows.append((interval, {}))
+            rows[-1][1][code] = count
+
+        if self._open is not None:
+            if rows and rows[0][0] == self._open[0]:
+                for code, count in rows.pop(0)[1].items():
+                    self._open[1][code] = self._open[1].get(code, 0) + count
+            rows.insert(0, self._open)
+        if not rows:
+            return self
+
+        # everything but the last interval is now closed and its edges final
+        chain = self._closed[-1:] + rows[:-1]
+        size = len(self._codes)
+        self._edges.resize((size, size))
+        if len(chain) > 1:
+            self._edges = self._edges + self._transitions([row for _, row in chain])
+        self._closed = (self._closed + rows[:-1])[-2:]
+        self._open = rows[-1]
+
+        return self
+
+    def add_many(self, chunks: Iterable[FeatureCollection]):
+        """
+        Adds several time-ordered chunks of features.
+
+        Args:
+            chunks: an iterable of FeatureCollections
+
+        Returns:
+            The builder itself
+        """
+        for chunk in chunks:
+            self.add(chunk)
+
+        return self
+
+    def result(self, self_loops: bool, mode: str, output: str = 'networkx'):
+        """
+        Returns the chronnet of all chunks added so far. The builder state is
+        not modified, so more chunks can be added afterwards.
+
+        As in convert_chronnet the last interval is end-inclusive: when the
+        last shape falls exactly on an interval boundary it belongs to the
+        interval before that boundary.
+
+        Args:
+            self_loops: whether self loops are included in the network
+
+            mode: whether the network is directed or undirected
+
+            output: the output format, see chronnet_create
+
+        Returns:
+            The network in the requested output format
+        """
+        edges = self._edges
+        if self._open is not None and self._closed:
+            open_id, open_counts = self._open
+            chain = [self._closed[-1][1], open_counts]
+            boundary = self._origin + self._step * open_id
+            if self._last_end == boundary and self._closed[-1][0] == open_id - 1:
+                # the open interval merges into the previous one
+                chain = [row for _, row in self._closed[:-1]] + [open_counts]
+            if len(chain) > 1:
+                edges = edges + self._transitions(chain)
+
+        labels = list(self._codes)
+        links = _edge_frame(edges, labels)
+        nodes = np.unique(np.array(labels, dtype=object))
+
+        return _finish_chronnet(links, nodes, self_loops, mode, output)
@@ -0,0 +1,207 @@
+""" Columnar point input: hashing lat, lon and timestamp columns without geoshapes"""
+from concurrent.futures import Executor
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from geostructures import Coordinate, GeoPoint
+from geostructures.collections import FeatureCollection, Track
+from geostructures.geohash import H3Hasher
+from geochron.hashing import (
+    count_cells_by_interval, hash_items, hash_track_by_interval, merge_cell_tables
+)
+from geochron.intervals import interval_ends, interval_table
+from geochron.parallel import map_partitions, partition_count, partition_ranges
+
+# the columns a dataframe of points needs, in (lat, lon, timestamp) order
+POINT_COLUMNS = ('lat', 'lon', 'timestamp')
+# the hashing functions whose cells are computed straight from the h3 library
+_H3_POINT_METHODS = (H3Hasher.hash_collection, H3Hasher.hash_coordinates)
+
+
+def point_times(points: pd.DataFrame) -> np.ndarray:
+    """
+    Checks that a dataframe holds points and converts its timestamps into
+    UTC. Naive timestamps are assumed to be UTC, consistent with
+    geostructures.
+
+    Args:
+        points: a pandas dataframe with the columns lat, lon and timestamp
+
+    Returns:
+        A numpy datetime64[ns] array, in the order of the rows
+    """
+    missing = [column for column in POINT_COLUMNS if column not in points.columns]
+    if missing:
+        raise ValueError(f"points must have the columns {POINT_COLUMNS}, missing {missing}")
+
+    times = pd.to_datetime(points['timestamp'], utc=True).dt.tz_localize(None)
+    return times.to_numpy(dtype='datetime64[ns]')
+
+
+def point_columns(points: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pulls the coordinates and times of a dataframe of points into arrays
+    sorted by time, the order a Track of the same points would have.
+
+    Args:
+        points: a pandas dataframe with the columns lat, lon and timestamp
+
+    Returns:
+        A tuple of (latitudes, longitudes, UTC datetime64[ns] times) arrays
+    """
+    times = point_times(points)
+    order = np.argsort(times, kind='stable')
+
+    return (
+        points['lat'].to_numpy(dtype=np.float64)[order],
+        points['lon'].to_numpy(dtype=np.float64)[order],
+        times[order]
+    )
+
+
+def hash_points(lat: np.ndarray, lon: np.ndarray,
+     hash_func: Callable) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hashes points given as coordinate arrays, like hash_items does for
+    geoshapes. Repeated coordinates are hashed once. H3Hasher methods call
+    h3 directly; other hashing functions are given one GeoPoint per
+    distinct coordinate.
+
+    Args:
+        lat: the latitude of each point
+
+        lon: the longitude of each point
+
+        hash_func: the hashing function, as used with a FeatureCollection
+
+    Returns:
+        A tuple of (point positions, cells) arrays
+    """
+    if not lat.size:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=object)
+
+    unique, inverse = np.unique(np.column_stack([lat, lon]), axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    resolution = getattr(getattr(hash_func, '__self__', None), 'resolution', None)
+
+    if getattr(hash_func, '__func__', None) in _H3_POINT_METHODS and resolution:
+        # pylint: disable=import-outside-toplevel
+        import h3 # type: ignore
+
+        cells: List = [h3.geo_to_h3(y, x, resolution) for y, x in unique.tolist()]
+        return np.arange(len(lat), dtype=np.int64), np.array(cells, dtype=object)[inverse]
+
+    # the time of the points does not affect their cells
+    epoch = datetime(1970, 1, 1)
+    unique_positions, unique_cells = hash_items(
+        [GeoPoint(Coordinate(x, y), dt=epoch) for y, x in unique.tolist()], hash_func, wrap=Track
+    )
+    # hand the cells of every distinct coordinate to each point sharing it
+    offsets = np.searchsorted(unique_positions, np.arange(len(unique) + 1))
+    repeats = np.diff(offsets)[inverse]
+    positions = np.repeat(np.arange(len(lat), dtype=np.int64), repeats)
+    firsts = np.repeat(offsets[inverse], repeats)
+    within = np.arange(len(positions)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+
+    return positions, unique_cells[firsts + within]
+
+
+def _point_partition(shared: Tuple, part: slice):
+    """
+    Hashes one partition of points and counts its hits per (interval, cell)
+    pair. Runs in the workers of hash_by_interval.
+
+    Args:
+        shared: a tuple of (latitudes, longitudes, interval index of each
+        point, hashing function)
+
+        part: the slice of the points making up the partition
+
+    Returns:
+        A cell table with the columns interval, cell and count
+    """
+    lat, lon, buckets, hash_func = shared
+    positions, cells = hash_points(lat[part], lon[part], hash_func)
+    return count_cells_by_interval(buckets[part], positions, cells)
+
+
+def hash_points_by_interval(lat: np.ndarray, lon: np.ndarray, buckets: np.ndarray,
+     hash_func: Callable, n_jobs: Optional[int] = None, executor: Optional[Executor] = None):
+    """
+    Hashes points that were already assigned to intervals and counts the
+    hits per cell for each interval, like hash_shapes_by_interval does for
+    geoshapes.
+
+    Args:
+        lat: the latitude of each point
+
+        lon: the longitude of each point
+
+        buckets: the interval index of each point, -1 for unassigned points
+
+        hash_func: the hashing function
+
+        n_jobs: the number of worker processes; -1 uses every core
+
+        executor: a concurrent.futures Executor to run the hashing on
+
+    Returns:
+        A cell table with the columns interval, cell and count
+    """
+    # points outside of every interval never need to be hashed
+    kept = np.flatnonzero(buckets >= 0)
+    shared = (lat[kept], lon[kept], buckets[kept], hash_func)
+    parts = partition_ranges(len(kept), partition_count(n_jobs, executor))
+    if not parts:
+        return _point_partition(shared, slice(0, 0))
+
+    return merge_cell_tables(map_partitions(
+        _point_partition, shared, parts, n_jobs, executor, split=3
+    ))
+
+
+def hash_by_interval(fcol: Union[FeatureCollection, pd.DataFrame], time_delta: timedelta,
+     hash_func: Callable, n_jobs: Optional[int] = None, executor: Optional[Executor] = None):
+    """
+    Splits a FeatureCollection or a dataframe of points into intervals of a
+    fixed length starting at its first time, and counts the hits per cell
+    for each interval. Points give the same counts as a FeatureCollection
+    of the equivalent GeoPoints.
+
+    Args:
+        fcol: a FeatureCollection with time bound shapes, or a pandas
+        dataframe of points with the columns lat, lon and timestamp
+
+        time_delta: the desired time interval
+
+        hash_func: the hashing function
+
+        n_jobs: the number of worker processes; -1 uses every core
+
+        executor: a concurrent.futures Executor to run the hashing on
+
+    Returns:
+        A tuple of (interval table, cell table); the interval table holds
+        the start and end timestamps of every interval id of the cell table
+    """
+    if not isinstance(fcol, pd.DataFrame):
+        track = Track(fcol.geoshapes)
+        timestamps = interval_ends(track.start, track.end, time_delta)
+        return (
+            interval_table(track.start, timestamps),
+            hash_track_by_interval(track, timestamps, hash_func, n_jobs, executor)
+        )
+
+    lat, lon, times = point_columns(fcol)
+    if not times.size:
+        raise ValueError("points must not be empty")
+
+    start_time = pd.Timestamp(times[0], tz='UTC')
+    timestamps = interval_ends(start_time, pd.Timestamp(times[-1], tz='UTC'), time_delta)
+    buckets = np.searchsorted(timestamps, times, side='right')
+    buckets[buckets >= len(timestamps)] = -1
+
+    return interval_table(start_time, timestamps), hash_points_by_interval(
+        lat, lon, buckets, hash_func, n_jobs, executor
+    )
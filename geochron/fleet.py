@@ -0,0 +1,184 @@
+""" Fleet mode: bucketing and hashing the tracks of many entities in one pass"""
+from collections import namedtuple
+from concurrent.futures import Executor
+from datetime import timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from geostructures.collections import FeatureCollection
+from geochron.columnar import hash_points_by_interval, point_times
+from geochron.hashing import hash_shapes_by_interval
+from geochron.intervals import interval_ends, to_datetime64
+
+# the cell table of a fleet numbers the intervals of every entity after those
+# of the previous entities: entity e owns intervals offsets[e] to offsets[e+1] - 1
+FleetCells = namedtuple('FleetCells', ['entities', 'starts', 'ends', 'offsets', 'cells'])
+
+_ONE_SECOND = np.timedelta64(1, 's')
+
+
+def entity_buckets(codes: np.ndarray, starts: np.ndarray, ends: np.ndarray, n_entities: int,
+     time_delta: timedelta) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Assigns the shapes of many entities to intervals anchored on the start of
+    each entity, in one vectorized pass. Within an entity the intervals and
+    the dropped shapes match interval_ends and bucket_track on the track of
+    that entity alone.
+
+    Args:
+        codes: the entity index of each shape, grouped by entity with the
+        shapes of an entity in track order
+
+        starts: the UTC start time of each shape
+
+        ends: the UTC end time of each shape
+
+        n_entities: the number of entities
+
+        time_delta: the desired time interval
+
+    Returns:
+        A tuple of (fleet wide interval of each shape or -1, start of each
+        entity, end of each entity, first fleet wide interval of each entity
+        plus the total number of intervals)
+    """
+    bounds = np.searchsorted(codes, np.arange(n_entities + 1))
+    entity_starts = starts[bounds[:-1]]
+    entity_ends = ends[bounds[1:] - 1]
+    step = np.timedelta64(time_delta).astype('timedelta64[ns]')
+    counts = np.maximum(-((entity_starts - entity_ends) // step), 0)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    origin, count = entity_starts[codes], counts[codes]
+    # the last interval of every entity ends one second late, see interval_ends
+    last_edge = origin + step * count + _ONE_SECOND
+
+    def interval_of(times):
+        regular = np.minimum(np.maximum((times - origin) // step, 0), np.maximum(count - 1, 0))
+        return regular + (times >= last_edge)
+
+    buckets = interval_of(starts)
+    buckets[(buckets != interval_of(ends)) | (buckets >= count)] = -1
+    kept = buckets >= 0
+    buckets[kept] += offsets[codes[kept]]
+
+    return buckets.astype(np.int64), entity_starts, entity_ends, offsets
+
+
+def group_shapes(fcol: FeatureCollection, entity_key: str) -> Tuple[List, List]:
+    """
+    Groups the shapes of a FeatureCollection by an entity property. The
+    shapes of each entity are sorted like a Track.
+
+    Args:
+        fcol: a FeatureCollection with time bound shapes
+
+        entity_key: the shape property identifying the entity of each shape
+
+    Returns:
+        A tuple of (entities in order of first appearance, list of the shape
+        lists of each entity)
+    """
+    entity_shapes: Dict = {}
+    for shape in fcol.geoshapes:
+        if entity_key not in shape.properties:
+            raise ValueError(f'Every shape needs the entity property {entity_key!r}')
+        entity_shapes.setdefault(shape.properties[entity_key], []).append(shape)
+
+    return list(entity_shapes), [
+        sorted(shapes, key=lambda shape: shape.start) for shapes in entity_shapes.values()
+    ]
+
+
+def hash_fleet_by_interval(fcol: Union[FeatureCollection, pd.DataFrame], time_delta: timedelta,
+     hash_func: Callable, entity_key: str, n_jobs: Optional[int] = None,
+     executor: Optional[Executor] = None) -> FleetCells:
+    """
+    Splits the track of every entity of a FeatureCollection or a dataframe of
+    points into intervals starting at its own first time, and counts the
+    hits per cell for each interval of each entity. Bucketing and hashing
+    run once over the whole fleet; with n_jobs or executor the shapes are
+    hashed in parallel.
+
+    Args:
+        fcol: a FeatureCollection with time bound shapes, or a pandas
+        dataframe of points with the columns lat, lon and timestamp
+
+        time_delta: the desired time interval
+
+        hash_func: the hashing function
+
+        entity_key: the shape property, or the dataframe column, identifying
+        the entity of each shape
+
+        n_jobs: the number of worker processes; -1 uses every core
+
+        executor: a concurrent.futures Executor to run the hashing on
+
+    Returns:
+        A FleetCells tuple of (entities in order of first appearance, start
+        and end of each entity, interval offsets of the entities, fleet wide
+        cell table)
+    """
+    if isinstance(fcol, pd.DataFrame):
+        if entity_key not in fcol.columns:
+            raise ValueError(f'points need the entity column {entity_key!r}')
+        times = point_times(fcol)
+        codes, entities = pd.factorize(fcol[entity_key])
+        if (codes < 0).any():
+            raise ValueError(f'Every point needs a value in the entity column {entity_key!r}')
+        order = np.lexsort((times, codes))
+        codes, times = codes[order], times[order]
+        buckets, starts, ends, offsets = entity_buckets(
+            codes, times, times, len(entities), time_delta
+        )
+        cells = hash_points_by_interval(
+            fcol['lat'].to_numpy(dtype=np.float64)[order],
+            fcol['lon'].to_numpy(dtype=np.float64)[order],
+            buckets, hash_func, n_jobs, executor
+        )
+        return FleetCells(list(entities), starts, ends, offsets, cells)
+
+    entities, groups = group_shapes(fcol, entity_key)
+    shapes = [shape for group in groups for shape in group]
+    codes = np.repeat(np.arange(len(groups)), [len(group) for group in groups])
+    buckets, starts, ends, offsets = entity_buckets(
+        codes, to_datetime64(shape.start for shape in shapes),
+        to_datetime64(shape.end for shape in shapes), len(entities), time_delta
+    )
+    cells = hash_shapes_by_interval(shapes, buckets, hash_func, n_jobs, executor)
+
+    return FleetCells(entities, starts, ends, offsets, cells)
+
+
+def split_fleet(fleet: FleetCells, time_delta: timedelta) -> Iterator[Tuple]:
+    """
+    Splits a fleet wide cell table into the cell table of each entity, as
+    hash_by_interval would have counted it on the entity alone.
+
+    Args:
+        fleet: a FleetCells tuple
+
+        time_delta: the interval the fleet was bucketed with
+
+    Returns:
+        A generator of (entity, start time, interval end timestamps, cell
+        table) tuples in the order of the entities
+    """
+    intervals = fleet.cells['interval'].to_numpy()
+    cells = fleet.cells['cell'].to_numpy(dtype=object)
+    counts = fleet.cells['count'].to_numpy()
+    rows = np.searchsorted(intervals, fleet.offsets)
+
+    for code, entity in enumerate(fleet.entities):
+        part = slice(rows[code], rows[code + 1])
+        table = pd.DataFrame({
+            'interval': intervals[part] - fleet.offsets[code],
+            'cell': pd.Categorical(cells[part], categories=pd.unique(cells[part])),
+            'count': counts[part]
+        })
+        start_time = pd.Timestamp(fleet.starts[code], tz='UTC')
+        timestamps = interval_ends(
+            start_time, pd.Timestamp(fleet.ends[code], tz='UTC'), time_delta
+        )
+        yield entity, start_time, timestamps, table
@@ -1,66 +1,266 @@
 """ Representation as geosynchnet"""
-from datetime import  timedelta
-from typing import Callable
+from collections import deque
+from concurrent.futures import Executor
+from datetime import  datetime, timedelta
+from typing import Any, Callable, Deque, Dict, Mapping, Optional, Tuple, Union
+import numpy as np
 import pandas as pd
 
 from geostructures.collections import  FeatureCollection,Track
-from geochron.chronnet import hash_tracks_into_netdf
-from geochron.time_slicing import get_timestamp_intervals, time_slice_track
+from geochron.columnar import hash_by_interval
+from geochron.fleet import hash_fleet_by_interval, split_fleet
+from geochron.hashing import as_cell_table, count_matrix, hash_items
+from geochron.intervals import to_datetime64
+from geochron.networks import format_network
 
-def geosynchnet_create(df: pd.DataFrame):
+def cooccurrence_edges(cells: pd.DataFrame):
     """
-    Converts a properly formatted pandas dataframe with the columns
-    of cell and time to a networkx network where nodes are locations
-    and edges are formed between nodes with that share a time. 
-    
+    Computes the weighted geosynchnet edge list of a cell table as a sparse
+    co-occurrence product. With X the interval x cell count matrix, the
+    off diagonal entries of X^T X count every pair of hits of two different
+    cells sharing an interval. The diagonal of X^T X is dropped; instead a
+    cell hit c times in an interval forms a self loop of weight c * (c - 1) / 2,
+    one per pair of its own hits.
+
     Args:
-        df: a pandas dataframe withe two columns cell and time
+        cells: a cell table with the columns interval, cell and count
 
     Returns:
-        A networkx network
+        A pandas dataframe with the columns from, to and weight, ordered by
+        the first appearance of the cells
     """
-    import networkx as nx
-    net = nx.Graph()
+    matrix, labels = count_matrix(cells)
+    cooccurrence = (matrix.T @ matrix).tocoo()
 
-    grouped = df.groupby('time')
+    upper = cooccurrence.row < cooccurrence.col
+    rows, cols = cooccurrence.row[upper], cooccurrence.col[upper]
+    weights = cooccurrence.data[upper]
 
-    for name, group in grouped:
-        cells = group['cell'].tolist()
-        for i, cell_i in enumerate(cells):
-            for cell_j in cells[i+1:]:
-                if net.has_edge(cell_i, cell_j):
-                    # if the edge already exists, increment the weight by 1
-                    net[cell_i][cell_j]['weight'] += 1
-                else:
-                    # otherwise, add the edge with a weight of 1
-                    net.add_edge(cell_i, cell_j, weight=1)
+    # pairs of hits of the same cell: (sum of c^2 - sum of c) / 2 per cell
+    repeats = (matrix.multiply(matrix) - matrix).sum(axis=0).A1 // 2
+    looped = np.flatnonzero(repeats)
+    rows = np.concatenate([rows, looped])
+    cols = np.concatenate([cols, looped])
+    weights = np.concatenate([weights, repeats[looped]])
+
+    order = np.lexsort((cols, rows))
+    cell_labels = labels.to_numpy(dtype=object)
+    links = pd.DataFrame({
+        'from': cell_labels[rows[order]],
+        'to': cell_labels[cols[order]],
+        'weight': weights[order].astype(np.int64)
+    })
+
+    return links
+
+
+def geosynchnet_create(df: Union[pd.DataFrame, Tuple], output: str = 'networkx'):
+    """
+    Converts a cell table, or a properly formatted pandas dataframe with the
+    columns of cell and time, to a network where nodes are locations
+    and edges are formed between nodes with that share a time. Every pair of
+    hits sharing an interval increments the edge weight by one, so a cell hit
+    more than once in an interval forms a self loop.
+
+    Args:
+        df: a cell table with the columns interval, cell and count, an
+        (interval table, cell table) pair as returned by hash_by_interval, or
+        a pandas dataframe with the two columns cell and time
+
+        output: 'networkx' for a networkx network, 'edgelist' for a pandas
+        dataframe with the columns from, to and weight, or 'csr' for a scipy
+        CSR adjacency matrix and its node index
+
+    Returns:
+        The network in the requested output format
+    """
+    links = cooccurrence_edges(as_cell_table(df))
 
-    return net
+    return format_network(links, output)
 
 
-def convert_geosynchnet(fcol: FeatureCollection, time_delta: timedelta,
-     hash_func: Callable):
+def convert_geosynchnet(fcol: Union[FeatureCollection, pd.DataFrame], time_delta: timedelta,
+     hash_func: Callable, output: str = 'networkx', n_jobs: Optional[int] = None,
+     executor: Optional[Executor] = None, entity_key: Optional[str] = None,
+     per_entity: bool = False):
     """
     Converts a FeatureCollection into a chronnet with a specified time interval
     using a specified hashing function
     
     Args:
-        fcol: a FeatureCollection with time bound shapes 
+        fcol: a FeatureCollection with time bound shapes, or a pandas
+        dataframe of points with the columns lat, lon and timestamp
 
         time_delta: the desired time interval
 
         hash_func: the hashing function
 
+        output: 'networkx' for a networkx network, 'edgelist' for a pandas
+        dataframe with the columns from, to and weight, or 'csr' for a scipy
+        CSR adjacency matrix and its node index
+
+        n_jobs: the number of worker processes hashing consecutive time ranges
+        in parallel; -1 uses every core
+
+        executor: a concurrent.futures Executor to run the hashing on
+
+        entity_key: the shape property, or the dataframe column, identifying
+        the entity of each shape; each entity is sliced into intervals from
+        its own start and only hits of the same entity co-occur
+
+        per_entity: with entity_key, whether to return the network of every
+        entity instead of their sum
+
     Returns:
-        A networkx network 
+        The network in the requested output format, or with per_entity a dict
+        of the network of each entity in order of first appearance
     """
-    track = Track(fcol.geoshapes)
-    timestamps = get_timestamp_intervals(track, time_delta)
-
-    track_list = time_slice_track(track, timestamps)
+    if entity_key is not None:
+        fleet = hash_fleet_by_interval(fcol, time_delta, hash_func, entity_key, n_jobs, executor)
+        if per_entity:
+            return {
+                entity: geosynchnet_create(cells, output)
+                for entity, _, _, cells in split_fleet(fleet, time_delta)
+            }
+        # the intervals of different entities never coincide
+        return geosynchnet_create(fleet.cells, output)
 
-    df = hash_tracks_into_netdf(track_list, timestamps, hash_func)
+    tables = hash_by_interval(fcol, time_delta, hash_func, n_jobs, executor)
 
-    geosynchnet = geosynchnet_create(df)
+    geosynchnet = geosynchnet_create(tables, output)
 
     return geosynchnet
+
+
+class GeosynchnetWindow:
+    """
+    Maintains a geosynchnet over a sliding time window.
+
+    Each pushed interval adds its co-occurrence contributions to the edge
+    weights, and intervals falling out of the window subtract theirs. Edges
+    whose weight drops to zero are evicted. Contributions follow
+    geosynchnet_create: count(a) * count(b) for two different cells and
+    count * (count - 1) / 2 for a self loop. An update costs time
+    proportional to the pairs of cells in the pushed and evicted intervals,
+    not to the size of the window.
+
+    Args:
+        window: the length of time covered by the network; an interval is
+        evicted once it starts at least this long before the newest interval;
+        must be positive
+    """
+
+    def __init__(self, window: timedelta):
+        if window <= timedelta(0):
+            raise ValueError(f"window must be positive, not {window!r}")
+        self.window = window
+        self._window = np.timedelta64(window).astype('timedelta64[ns]')
+        self._intervals: Deque[Tuple[np.datetime64, Dict[Any, int]]] = deque()
+        self._weights: Dict[Tuple[Any, Any], int] = {}
+
+    def __len__(self):
+        """The number of intervals in the window"""
+        return len(self._intervals)
+
+    @staticmethod
+    def _contributions(counts: Dict[Any, int]):
+        """
+        Yields the edge weight contributions of a single interval.
+
+        Args:
+            counts: a {cell: count} dictionary
+
+        Returns:
+            A generator of ((cell, cell), weight) tuples
+        """
+        cells = sorted(counts)
+        for i, cell_i in enumerate(cells):
+            count_i = counts[cell_i]
+            if count_i > 1:
+                yield (cell_i, cell_i), count_i * (count_i - 1) // 2
+            for cell_j in cells[i + 1:]:
+                yield (cell_i, cell_j), count_i * counts[cell_j]
+
+    def _apply(self, counts: Dict[Any, int], sign: int):
+        """
+        Adds (sign 1) or subtracts (sign -1) the contributions of an interval,
+        evicting edges that drop to zero.
+
+        Args:
+            counts: a {cell: count} dictionary
+
+            sign: 1 or -1
+        """
+        for edge, weight in self._contributions(counts):
+            updated = self._weights.get(edge, 0) + sign * weight
+            if updated:
+                self._weights[edge] = updated
+            else:
+                del self._weights[edge]
+
+    def push(self, interval_start: datetime, counts: Mapping[Any, int]):
+        """
+        Adds an interval to the window and evicts the intervals that fall out
+        of it. Intervals must be pushed in time order.
+
+        Args:
+            interval_start: the start of the interval
+
+            counts: a {cell: count} mapping of the hits in the interval
+
+        Returns:
+            The window itself
+        """
+        start = to_datetime64([interval_start])[0]
+        if self._intervals and start < self._intervals[-1][0]:
+            raise ValueError('Intervals must be pushed in time order.')
+
+        counts = {cell: count for cell, count in counts.items() if count}
+        self._intervals.append((start, counts))
+        self._apply(counts, 1)
+
+        while self._intervals and self._intervals[0][0] <= start - self._window:
+            self._apply(self._intervals.popleft()[1], -1)
+
+        return self
+
+    def push_features(self, fcol: FeatureCollection, hash_func: Callable,
+         interval_start: Optional[datetime] = None):
+        """
+        Hashes a FeatureCollection and adds it to the window as one interval.
+
+        Args:
+            fcol: a FeatureCollection with time bound shapes
+
+            hash_func: the hashing function
+
+            interval_start: the start of the interval; defaults to the start
+            of the earliest shape
+
+        Returns:
+            The window itself
+        """
+        track = Track(fcol.geoshapes)
+        _, cells = hash_items(track.geoshapes, hash_func, wrap=Track)
+        counts = pd.Series(cells, dtype=object).value_counts(sort=False).to_dict()
+
+        return self.push(interval_start or track.start, counts)
+
+    def result(self, output: str = 'networkx'):
+        """
+        Returns the geosynchnet of the intervals currently in the window.
+
+        Args:
+            output: 'networkx' for a networkx network, 'edgelist' for a pandas
+            dataframe with the columns from, to and weight, or 'csr' for a scipy
+            CSR adjacency matrix and its node index
+
+        Returns:
+            The network in the requested output format
+        """
+        links = pd.DataFrame(
+            [(cell_i, cell_j, weight) for (cell_i, cell_j), weight in self._weights.items()],
+            columns=['from', 'to', 'weight']
+        )
+
+        return format_network(links, output)
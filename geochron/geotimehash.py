@@ -1,10 +1,38 @@
 """ Geotime hash representation"""
-from typing import Callable, List
+import heapq
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from collections import Counter
+from concurrent.futures import Executor
 from datetime import  datetime, timedelta
+import numpy as np
+import pandas as pd
 from geostructures.typing import GeoShape
 from geostructures.time import TimeInterval
 from geostructures import FeatureCollection, Track
+from geochron.columnar import hash_points, point_columns
+from geochron.hash_cache import HashCache
+from geochron.intervals import epoch_seconds, inclusive_range, to_datetime64, utc_datetime64
+from geochron.parallel import map_partitions, partition_count, partition_ranges
+from geochron.timehash_codec import cover_timehashes, encode_timehashes, expand_timehash
+
+GEOTIMEHASH_OUTPUTS = ('dict', 'series')
+TIMEHASH_COVERS = ('fixed', 'mixed')
+# the number of shapes whose times iter_geotimehash encodes in a single call
+ITER_CHUNK_SIZE = 4096
+# the time step of each supported timehash precision
+PRECISION_DELTAS = {
+    1: timedelta(days = 5840),
+    2: timedelta(days = 730),
+    3: timedelta(days = 91.2),
+    4: timedelta(days = 11.4),
+    5: timedelta(hours = 34.2),
+    6: timedelta(hours = 4.2),
+    7: timedelta(minutes = 32),
+    8: timedelta(minutes = 4),
+    9: timedelta(seconds = 30),
+    10: timedelta(seconds = 3.6),
+}
+
 
 def precision_delta(precision: int):
     """
@@ -16,29 +44,10 @@ def precision_delta(precision: int):
     Returns:
         A timedelta
     """
-    if precision == 1:
-        delta = timedelta(days = 5840)
-    elif precision == 2:
-        delta = timedelta(days = 730)
-    elif precision == 3:
-        delta = timedelta(days = 91.2)
-    elif precision == 4:
-        delta = timedelta(days = 11.4)
-    elif precision == 5:
-        delta = timedelta(hours = 34.2)
-    elif precision == 6:
-        delta = timedelta(hours = 4.2)
-    elif precision == 7:
-        delta = timedelta(minutes = 32)
-    elif precision == 8:
-        delta = timedelta(minutes = 4)
-    elif precision == 9:
-        delta = timedelta(seconds = 30)
-    elif precision == 10:
-        delta = timedelta(seconds = 3.6)
-    else:
-        print("Only precision up to 10 is supported")
-    return delta
+    if precision not in PRECISION_DELTAS:
+        raise ValueError(f"Unsupported timehash precision: {precision}")
+
+    return PRECISION_DELTAS[precision]
 
 def generate_times(start_time: datetime, end_time: datetime, precision: int):
     """
@@ -54,22 +63,16 @@ def generate_times(start_time: datetime, end_time: datetime, precision: int):
         then 10 is not supported
 
     Returns:
-        A list of times
+        An array of epoch seconds
     """
-    start = start_time
-    end = end_time
-    time_list = []
+    times = inclusive_range(start_time, end_time, precision_delta(precision))
 
-    while start <= end:
-        time_list.append(start.timestamp())
-        start += precision_delta(precision)
+    return epoch_seconds(times)
 
-    return time_list
 
 
 
-
-def timehash_geoshape(geoshape: GeoShape, precision: int):
+def timehash_geoshape(geoshape: GeoShape, precision: int, cover: str = 'fixed'):
     """
     Converts a geoshape time into a  list of timehashes of varying precision. 
     A single timepoint produces a list of 1.  
@@ -81,23 +84,26 @@ def timehash_geoshape(geoshape: GeoShape, precision: int):
         precision: the desired precision of the timehash precision higher
         then 10 is not supported
 
+        cover: 'fixed' for timehashes sampled at the given precision, or
+        'mixed' for the minimal set of mixed precision timehash prefixes
+        covering every timehash the interval touches
+
     Returns:
         A timehash list
     """
-    # pylint: disable=import-outside-toplevel
-    import timehash
-    timehash_list = []
     assert isinstance(geoshape.dt, TimeInterval)
     start_time = geoshape.dt.start
     end_time = geoshape.dt.end
 
-    time_list = generate_times(start_time, end_time, precision)
+    if cover == 'mixed':
+        start, end = epoch_seconds(np.array([utc_datetime64(start_time), utc_datetime64(end_time)]))
+        return cover_timehashes(start, end, precision)
+    if cover != 'fixed':
+        raise ValueError(f"cover must be one of {TIMEHASH_COVERS}, not {cover!r}")
 
-    for time in time_list:
-        timehash1 = timehash.encode(time, precision)
-        timehash_list.append(timehash1)
+    time_list = generate_times(start_time, end_time, precision)
 
-    return timehash_list
+    return encode_timehashes(time_list, precision).tolist()
 
 
 def append_timehash_to_geohashmap(hashmap: dict, timehash_list: List):
@@ -161,40 +167,586 @@ def combine_dicts(d:dict):
     return combined_dict
 
 
-def convert_geotimehash(fcol: FeatureCollection, precision: int,
-     hash_func: Callable):
+def _hash_shape(shape: GeoShape, hash_func: Callable, hash_cache: Optional[HashCache]) -> dict:
+    """
+    Hashes a single shape, through the cache when one is given.
+
+    Args:
+        shape: a geoshape
+
+        hash_func: the hashing function
+
+        hash_cache: an optional HashCache
+
+    Returns:
+        The hashmap of the shape
+    """
+    if hash_cache is None:
+        return hash_func(Track([shape]))
+
+    return hash_cache.hash_shape(shape, hash_func)
+
+
+def _count_partition(shared: Tuple, part: slice):
+    """
+    Counts the geotime hashes of one partition of shapes. Runs in the workers
+    of convert_geotimehash.
+
+    Args:
+        shared: a tuple of (geoshapes, timehash precision, hashing function,
+        timehash cover, hash cache)
+
+        part: the slice of the shapes making up the partition
+
+    Returns:
+        A tuple of (geotime hash counter, timehash shape counter)
+    """
+    shapes, precision, hash_func, cover, hash_cache = shared
+    return count_geotimehashes(shapes[part], precision, hash_func, cover, hash_cache)
+
+
+def count_geotimehashes(shapes: List, precision: int, hash_func: Callable,
+     cover: str = 'fixed', hash_cache: Optional[HashCache] = None) -> Tuple[Counter, Counter]:
+    """
+    Counts the geotime hashes of a group of shapes along with the number of
+    shapes in each timehash. Counts of separate groups add up.
+
+    Args:
+        shapes: the geoshapes to hash
+
+        precision: the precision of the time hash
+
+        hash_func: the hashing function
+
+        cover: 'fixed' or 'mixed', see timehash_geoshape
+
+        hash_cache: an optional HashCache reusing the hashmaps of repeated
+        geometries
+
+    Returns:
+        A tuple of (geotime hash counter, timehash shape counter)
+    """
+    geotime_counts:Counter = Counter()
+    shape_count:Counter = Counter()
+
+    for shape in shapes:
+        geohashmap = _hash_shape(shape, hash_func, hash_cache)
+        timehash_list = timehash_geoshape(shape, precision, cover)
+        timehash_dict = {item: 1 for item in timehash_list}
+        temp_geotime_hashmap = append_timehash_to_geohashmap(geohashmap, timehash_list)
+        shape_count.update(timehash_dict)
+        geotime_counts.update(temp_geotime_hashmap)
+
+    return geotime_counts, shape_count
+
+
+def _pair_partition(shared: Tuple, part: slice):
+    """
+    Counts the (geohash, timehash) pairs of one partition of shapes. Runs in
+    the workers of convert_geotimehash.
+
+    Args:
+        shared: a tuple of (geoshapes, timehash precision, hashing function,
+        hash cache)
+
+        part: the slice of the shapes making up the partition
+
+    Returns:
+        A tuple of (pair counts, timehash shape counts) series
+    """
+    shapes, precision, hash_func, hash_cache = shared
+    return count_geotimehash_pairs(shapes[part], precision, hash_func, hash_cache)
+
+
+def count_geotimehash_pairs(shapes: List, precision: int, hash_func: Callable,
+     hash_cache: Optional[HashCache] = None) -> Tuple[pd.Series, pd.Series]:
+    """
+    Counts the geotime hashes of a group of shapes keyed by (geohash,
+    timehash) pairs, along with the number of shapes in each timehash.
+    Counts of separate groups add up.
+
+    Args:
+        shapes: the geoshapes to hash
+
+        precision: the precision of the time hash
+
+        hash_func: the hashing function
+
+        hash_cache: an optional HashCache reusing the hashmaps of repeated
+        geometries
+
+    Returns:
+        A tuple of (pair counts series indexed by geohash and timehash,
+        shape counts series indexed by timehash)
+    """
+    geohashes: List = []
+    timehashes: List = []
+    values: List = []
+    shape_timehashes: List = []
+
+    # the times of every shape are encoded in a single call
+    time_lists = []
+    for shape in shapes:
+        assert isinstance(shape.dt, TimeInterval)
+        time_lists.append(generate_times(shape.dt.start, shape.dt.end, precision))
+    offsets = np.cumsum([0] + [len(times) for times in time_lists])
+    encoded = encode_timehashes(np.concatenate(time_lists or [[]]), precision).tolist()
+
+    for shape, begin, end in zip(shapes, offsets[:-1], offsets[1:]):
+        geohashmap = _hash_shape(shape, hash_func, hash_cache)
+        # repeated timehashes of a shape only count once
+        timehash_list = list(dict.fromkeys(encoded[begin:end]))
+        shape_timehashes.extend(timehash_list)
+        for key, value in geohashmap.items():
+            geohashes.extend([key] * len(timehash_list))
+            timehashes.extend(timehash_list)
+            values.extend([value] * len(timehash_list))
+
+    pairs = pd.Series(
+        values,
+        index=pd.MultiIndex.from_arrays([geohashes, timehashes], names=['geohash', 'timehash'])
+    )
+    shape_count = pd.Series(1, index=pd.Index(shape_timehashes, name='timehash'))
+
+    return merge_geotimehash_pairs([(pairs, shape_count)])
+
+
+def _point_pair_partition(shared: Tuple, part: slice):
+    """
+    Counts the (geohash, timehash) pairs of one partition of points. Runs in
+    the workers of convert_geotimehash.
+
+    Args:
+        shared: a tuple of (latitudes, longitudes, timehash of each point,
+        hashing function)
+
+        part: the slice of the points making up the partition
+
+    Returns:
+        A tuple of (pair counts, timehash shape counts) series
+    """
+    lat, lon, timehashes, hash_func = shared
+    positions, cells = hash_points(lat[part], lon[part], hash_func)
+    part_timehashes = timehashes[part]
+
+    pairs = pd.Series(1, index=pd.MultiIndex.from_arrays(
+        [cells, part_timehashes[positions]], names=['geohash', 'timehash']
+    ))
+    shape_count = pd.Series(1, index=pd.Index(part_timehashes, name='timehash'))
+
+    return merge_geotimehash_pairs([(pairs, shape_count)])
+
+
+def count_point_geotimehash_pairs(points: pd.DataFrame, precision: int, hash_func: Callable,
+     n_jobs: Optional[int] = None,
+     executor: Optional[Executor] = None) -> Tuple[pd.Series, pd.Series]:
+    """
+    Counts the geotime hashes of a dataframe of points keyed by (geohash,
+    timehash) pairs, the way count_geotimehash_pairs counts the equivalent
+    GeoPoints, without building any geoshapes.
+
+    Args:
+        points: a pandas dataframe with the columns lat, lon and timestamp
+
+        precision: the precision of the time hash
+
+        hash_func: the hashing function
+
+        n_jobs: the number of worker processes; -1 uses every core
+
+        executor: a concurrent.futures Executor to run the hashing on
+
+    Returns:
+        A tuple of (pair counts series indexed by geohash and timehash,
+        shape counts series indexed by timehash)
+    """
+    precision_delta(precision)
+    lat, lon, times = point_columns(points)
+    timehashes = encode_timehashes(epoch_seconds(times), precision).astype(object)
+    shared = (lat, lon, timehashes, hash_func)
+    parts = partition_ranges(len(times), partition_count(n_jobs, executor))
+    if not parts:
+        return _point_pair_partition(shared, slice(0, 0))
+
+    return merge_geotimehash_pairs(map_partitions(
+        _point_pair_partition, shared, parts, n_jobs, executor, split=3
+    ))
+
+
+def merge_geotimehash_pairs(parts: List[Tuple[pd.Series, pd.Series]]):
+    """
+    Adds up (geohash, timehash) pair counts and timehash shape counts,
+    keeping the order of first appearance.
+
+    Args:
+        parts: a list of (pair counts, timehash shape counts) series
+
+    Returns:
+        A tuple of (pair counts, timehash shape counts) series
+    """
+    pairs = pd.concat([pair_counts for pair_counts, _ in parts])
+    shape_count = pd.concat([timehash_counts for _, timehash_counts in parts])
+
+    return (
+        pairs.groupby(level=['geohash', 'timehash'], sort=False).sum(),
+        shape_count.groupby(level='timehash', sort=False).sum()
+    )
+
+
+def normalize_geotimehash_pairs(pairs: pd.Series, shape_count: pd.Series) -> pd.Series:
+    """
+    Divides every (geohash, timehash) pair count by the number of shapes in
+    its timehash in one vectorized step.
+
+    Args:
+        pairs: the pair counts indexed by geohash and timehash
+
+        shape_count: the shape counts indexed by timehash
+
+    Returns:
+        A series of normalized values indexed by geohash and timehash
+    """
+    shapes = shape_count.reindex(pairs.index.get_level_values('timehash')).to_numpy()
+    return pairs / shapes
+
+
+def geotimehash_series_to_dict(series: pd.Series) -> dict:
+    """
+    Converts a geotime hash series into the string keyed geotime hashmap,
+    grouped by timehash in order of first appearance.
+
+    Args:
+        series: a series of values indexed by geohash and timehash
+
+    Returns:
+        A geotime hashmap keyed by "geohash_timehash"
+    """
+    timehashes = series.index.get_level_values('timehash').astype(str)
+    order = np.argsort(pd.factorize(timehashes)[0], kind='stable')
+    geohashes = series.index.get_level_values('geohash').astype(str)
+    keys = geohashes[order] + "_" + timehashes[order]
+
+    return dict(zip(keys, series.to_numpy()[order].tolist()))
+
+
+def convert_geotimehash(fcol: Union[FeatureCollection, pd.DataFrame], precision: int,
+     hash_func: Callable, n_jobs: Optional[int] = None, executor: Optional[Executor] = None,
+     cover: str = 'fixed', output: str = 'dict', hash_cache: Optional[HashCache] = None):
     """
     Converts a FeatureCollection into a chronnet by a specified timehash precision
     using a specified hashing function
     
     Args:
-        fcol: a FeatureCollection with time bound shapes 
+        fcol: a FeatureCollection with time bound shapes, or a pandas
+        dataframe of points with the columns lat, lon and timestamp
 
         precision: the precision of the time hash
 
         hash_func: the hashing function
 
+        n_jobs: the number of worker processes hashing consecutive time ranges
+        of shapes in parallel; -1 uses every core
+
+        executor: a concurrent.futures Executor to run the hashing on
+
+        cover: 'fixed' to hash every shape at the given precision, or 'mixed'
+        to hash long intervals with mixed precision timehash prefixes and get
+        a GeotimehashCover that expands to the given precision on request
+
+        output: 'dict' for a geotime hashmap keyed by "geohash_timehash"
+        strings, or 'series' for a pandas series indexed by geohash and
+        timehash; only applies to the fixed cover
+
+        hash_cache: an optional HashCache; shapes repeating a geometry already
+        hashed with the same hashing configuration reuse its hashmap; points
+        hash every distinct coordinate once without it
 
     Returns:
-        A geotime hashmap
+        A geotime hashmap, a series, or a GeotimehashCover for the mixed cover
     """
+    if cover not in TIMEHASH_COVERS:
+        raise ValueError(f"cover must be one of {TIMEHASH_COVERS}, not {cover!r}")
+    if output not in GEOTIMEHASH_OUTPUTS:
+        raise ValueError(f"output must be one of {GEOTIMEHASH_OUTPUTS}, not {output!r}")
+
+    if isinstance(fcol, pd.DataFrame):
+        pairs, timehash_counts = count_point_geotimehash_pairs(
+            fcol, precision, hash_func, n_jobs, executor
+        )
+        if cover == 'mixed':
+            # the cover of a single time is its full precision timehash
+            return GeotimehashCover(
+                Counter(geotimehash_series_to_dict(pairs)), Counter(timehash_counts.to_dict()),
+                precision
+            )
+        series = normalize_geotimehash_pairs(pairs, timehash_counts)
+        return series if output == 'series' else geotimehash_series_to_dict(series)
+
     track = Track(fcol.geoshapes)
+    parts = partition_ranges(len(track.geoshapes), partition_count(n_jobs, executor))
+
+    if cover == 'fixed':
+        pairs, timehash_counts = merge_geotimehash_pairs(map_partitions(
+            _pair_partition, (track.geoshapes, precision, hash_func, hash_cache), parts,
+            n_jobs, executor
+        ))
+        series = normalize_geotimehash_pairs(pairs, timehash_counts)
+        return series if output == 'series' else geotimehash_series_to_dict(series)
+
     master_geotime_hashmap:Counter = Counter()
     shape_count:Counter = Counter()
+    for geotime_counts, timehash_counts in map_partitions(
+        _count_partition, (track.geoshapes, precision, hash_func, cover, hash_cache), parts,
+        n_jobs, executor
+    ):
+        master_geotime_hashmap.update(geotime_counts)
+        shape_count.update(timehash_counts)
+
+    return GeotimehashCover(master_geotime_hashmap, shape_count, precision)
+
+
+def _pop_timehash(pending: Dict[str, list], heap: List[str]) -> Tuple[str, Dict]:
+    """
+    Removes the earliest pending timehash and normalizes its geohash counts
+    by its number of shapes.
+
+    Args:
+        pending: the [geohash counts, number of shapes] of each open timehash
+
+        heap: a heap of the open timehashes
+
+    Returns:
+        A tuple of (timehash, {geohash: value})
+    """
+    timehash = heapq.heappop(heap)
+    counts, shape_count = pending.pop(timehash)
+    return timehash, {key: value / shape_count for key, value in counts.items()}
+
+
+def _utc_sorted_shapes(fcol: FeatureCollection) -> List:
+    """
+    Sorts the shapes of a FeatureCollection by their UTC start time, the
+    order of their first timehashes.
+
+    Args:
+        fcol: a FeatureCollection with time bound shapes
+
+    Returns:
+        A list of geoshapes
+    """
+    shapes = Track(fcol.geoshapes).geoshapes
+    order = np.argsort(to_datetime64(shape.start for shape in shapes), kind='stable')
+    return [shapes[pos] for pos in order]
+
+
+def _shape_timehash_entries(shapes: List, precision: int, hash_func: Callable,
+     hash_cache: Optional[HashCache] = None) -> Iterator[Tuple[List[str], Dict]]:
+    """
+    Lists the distinct timehashes and the hashmap of each shape, encoding the
+    times of ITER_CHUNK_SIZE shapes at a time.
+
+    Args:
+        shapes: the geoshapes, in UTC start time order
+
+        precision: the precision of the time hash
+
+        hash_func: the hashing function
+
+        hash_cache: an optional HashCache
+
+    Returns:
+        A generator of (timehash list, hashmap) tuples
+    """
+    for chunk in range(0, len(shapes), ITER_CHUNK_SIZE):
+        chunk_shapes = shapes[chunk:chunk + ITER_CHUNK_SIZE]
+        time_lists = [
+            generate_times(shape.start, shape.end, precision) for shape in chunk_shapes
+        ]
+        offsets = np.cumsum([0] + [len(times) for times in time_lists])
+        encoded = encode_timehashes(np.concatenate(time_lists), precision).tolist()
+
+        for shape, begin, end in zip(chunk_shapes, offsets[:-1], offsets[1:]):
+            yield (
+                list(dict.fromkeys(encoded[begin:end])), _hash_shape(shape, hash_func, hash_cache)
+            )
+
+
+def _point_timehash_entries(points: pd.DataFrame, precision: int,
+     hash_func: Callable) -> Iterator[Tuple[List[str], Dict]]:
+    """
+    Lists the timehash and the hashmap of each point of a dataframe, the way
+    _shape_timehash_entries does for the equivalent GeoPoints.
+
+    Args:
+        points: a pandas dataframe with the columns lat, lon and timestamp
+
+        precision: the precision of the time hash
+
+        hash_func: the hashing function
+
+    Returns:
+        A generator of (timehash list, hashmap) tuples in time order
+    """
+    lat, lon, times = point_columns(points)
+    timehashes = encode_timehashes(epoch_seconds(times), precision).tolist()
+    positions, cells = hash_points(lat, lon, hash_func)
+    offsets = np.searchsorted(positions, np.arange(len(times) + 1))
+
+    for pos, timehash in enumerate(timehashes):
+        yield [timehash], dict.fromkeys(cells[offsets[pos]:offsets[pos + 1]].tolist(), 1)
 
-    for shape in track:
-        geohashmap = hash_func(Track([shape]))
-        timehash_list = timehash_geoshape(shape, precision)
-        timehash_dict = {item: 1 for item in timehash_list}
-        temp_geotime_hashmap = append_timehash_to_geohashmap(geohashmap, timehash_list)
-        shape_count.update(timehash_dict)
-        master_geotime_hashmap.update(temp_geotime_hashmap)
 
-    suffix_dict = breakdown_hashmap_by_suffix(master_geotime_hashmap)
+def stream_geotimehash(entries: Iterable[Tuple[List[str], Dict]]) -> Iterator[Tuple[str, Dict]]:
+    """
+    Accumulates the geotime hashes of a stream of shapes and yields every
+    timehash as soon as no later shape can reach it, so only the timehashes
+    of the shapes still open are held.
+
+    Args:
+        entries: the (timehash list, hashmap) of each shape, in the order of
+        their first timehashes
+
+    Returns:
+        A generator of (timehash, {geohash: value}) tuples in timehash order
+    """
+    # timehash -> [geohash counts, number of shapes]; timehash strings sort in time order
+    pending: Dict[str, list] = {}
+    heap: List[str] = []
+    first = None
+
+    for timehash_list, geohashmap in entries:
+        if first is not None and timehash_list[0] < first:
+            raise ValueError('Shapes must be added in time order.')
+        first = timehash_list[0]
+        # later shapes start no earlier, so earlier timehashes are complete
+        while heap and heap[0] < first:
+            yield _pop_timehash(pending, heap)
+
+        for timehash in timehash_list:
+            if timehash not in pending:
+                pending[timehash] = [Counter(), 0]
+                heapq.heappush(heap, timehash)
+            pending[timehash][0].update(geohashmap)
+            pending[timehash][1] += 1
+
+    while heap:
+        yield _pop_timehash(pending, heap)
+
+
+def iter_geotimehash(fcol: FeatureCollection, precision: int, hash_func: Callable,
+     hash_cache: Optional[HashCache] = None) -> Iterator[Tuple[str, Dict]]:
+    """
+    Lazily converts a FeatureCollection into geotime hashes, one timehash at
+    a time. The values match convert_geotimehash. The time ordered shapes are
+    walked once, and a timehash is yielded as soon as no later shape can
+    reach it, so only the timehashes of the shapes still open are held.
+
+    Args:
+        fcol: a FeatureCollection with time bound shapes
+
+        precision: the precision of the time hash
+
+        hash_func: the hashing function
 
-    for outer_key, inner_dict in suffix_dict.items():
-        num_shapes = shape_count[outer_key]
-        for inner_key, value in inner_dict.items():
-            inner_dict[inner_key] /= num_shapes
+        hash_cache: an optional HashCache; shapes repeating a geometry already
+        hashed with the same hashing configuration reuse its hashmap
+
+    Returns:
+        A generator of (timehash, {geohash: value}) tuples in timehash order
+    """
+    return stream_geotimehash(
+        _shape_timehash_entries(_utc_sorted_shapes(fcol), precision, hash_func, hash_cache)
+    )
+
+
+def iter_geotimehash_chunks(chunks: Iterable, precision: int, hash_func: Callable,
+     hash_cache: Optional[HashCache] = None) -> Iterator[Tuple[str, Dict]]:
+    """
+    Lazily converts time-ordered chunks of features into geotime hashes, like
+    iter_geotimehash does for a single FeatureCollection. Timehashes reached
+    by the shapes of several chunks are carried across chunk boundaries, so
+    only one chunk and the open timehashes are held at once.
+
+    Args:
+        chunks: an iterable of FeatureCollections, or of pandas dataframes of
+        points with the columns lat, lon and timestamp; no shape may start
+        before the last shape of the previous chunk
+
+        precision: the precision of the time hash
+
+        hash_func: the hashing function
+
+        hash_cache: an optional HashCache for the shapes of FeatureCollections
+
+    Returns:
+        A generator of (timehash, {geohash: value}) tuples in timehash order
+    """
+    def entries():
+        for chunk in chunks:
+            if isinstance(chunk, pd.DataFrame):
+                yield from _point_timehash_entries(chunk, precision, hash_func)
+            else:
+                yield from _shape_timehash_entries(
+                    _utc_sorted_shapes(chunk), precision, hash_func, hash_cache
+                )
+
+    return stream_geotimehash(entries())
+
+
+class GeotimehashCover:
+    """
+    Geotime hash counts keyed by mixed precision timehash prefixes, as
+    produced by convert_geotimehash with cover='mixed'.
+
+    A prefix stands for every timehash of the target precision it starts
+    with, so the normalized value of a full precision geotime hash is the
+    count summed over the prefixes of its timehash divided by the number of
+    shapes summed the same way. Single values are computed on lookup;
+    expand() materializes the full precision geotime hashmap.
+
+    Args:
+        counts: a Counter of geotime hashes keyed by "geohash_prefix"
+
+        shape_counts: a Counter of the number of shapes per timehash prefix
+
+        precision: the precision the prefixes expand to
+    """
 
-    return combine_dicts(suffix_dict)
+    def __init__(self, counts: Counter, shape_counts: Counter, precision: int):
+        self.counts = counts
+        self.shape_counts = shape_counts
+        self.precision = precision
+
+    def __getitem__(self, key: str) -> float:
+        geohash, _, timehash = key.rpartition('_')
+        prefixes = [timehash[:end] for end in range(1, len(timehash) + 1)]
+        count = sum(self.counts.get(f"{geohash}_{prefix}", 0) for prefix in prefixes)
+        if len(timehash) != self.precision or not count:
+            raise KeyError(key)
+
+        return count / sum(self.shape_counts.get(prefix, 0) for prefix in prefixes)
+
+    def expand(self) -> dict:
+        """
+        Expands every prefix to the timehashes of the target precision.
+
+        Returns:
+            A geotime hashmap keyed by "geohash_timehash"
+        """
+        shape_count: Counter = Counter()
+        for prefix, value in self.shape_counts.items():
+            timehashes = expand_timehash(prefix, self.precision).tolist()
+            shape_count.update(dict.fromkeys(timehashes, value))
+
+        geotime_hashmap: Counter = Counter()
+        for key, value in self.counts.items():
+            geohash, _, prefix = key.rpartition('_')
+            timehashes = expand_timehash(prefix, self.precision).tolist()
+            geotime_hashmap.update(
+                append_timehash_to_geohashmap({geohash: value}, timehashes)
+            )
+
+        return {
+            key: value / shape_count[key.rpartition('_')[2]]
+            for key, value in geotime_hashmap.items()
+        }
@@ -0,0 +1,180 @@
+""" A bounded LRU cache for the spatial hashing of individual shapes"""
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Any, Callable, Hashable, Optional
+from geostructures.collections import Track
+from geostructures.typing import GeoShape
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'evictions', 'entries', 'nbytes'])
+
+
+def _freeze(value: Any) -> Hashable:
+    """
+    Converts nested lists and dictionaries into hashable tuples.
+
+    Args:
+        value: a value made of lists, tuples, dictionaries and scalars
+
+    Returns:
+        A hashable equivalent of the value
+    """
+    if isinstance(value, dict):
+        return tuple((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _hashmap_size(hashmap: dict) -> int:
+    """
+    Estimates the memory held by a cached hashmap.
+
+    Args:
+        hashmap: a hashmap produced by a hashing function
+
+    Returns:
+        An approximate size in bytes
+    """
+    return sys.getsizeof(hashmap) + sum(
+        sys.getsizeof(key) + sys.getsizeof(value) for key, value in hashmap.items()
+    )
+
+
+def geometry_fingerprint(shape: GeoShape) -> Hashable:
+    """
+    Builds a key identifying the geometry of a shape, ignoring its time and
+    properties, from its __geo_interface__.
+
+    Args:
+        shape: a geoshape
+
+    Returns:
+        A hashable fingerprint
+    """
+    return type(shape).__name__, _freeze(shape.__geo_interface__)
+
+
+def hasher_fingerprint(hash_func: Callable) -> Hashable:
+    """
+    Builds a key identifying a hashing function and its configuration. The
+    attributes of the hasher a bound method belongs to (such as an H3Hasher
+    resolution) are part of the key. Any other function is its own key, so
+    lambdas and closures sharing a name are told apart.
+
+    Args:
+        hash_func: the hashing function
+
+    Returns:
+        A hashable fingerprint
+    """
+    owner = getattr(hash_func, '__self__', None)
+    if owner is None:
+        return hash_func
+
+    config = tuple(sorted((key, repr(value)) for key, value in vars(owner).items()))
+    return type(owner).__qualname__, hash_func.__name__, config
+
+
+class HashCache:
+    """
+    A bounded least recently used cache of per-shape hashmaps. Shapes that
+    repeat the same geometry, such as stationary sensors, are only hashed
+    once per hashing configuration.
+
+    Entries are evicted once either limit is exceeded. The memory limit is
+    an estimate of the size of the cached hashmaps. The cache is thread safe;
+    worker processes each use their own copy, which starts out empty, so
+    only work done in the calling process shows up in cache_info.
+
+    Args:
+        max_entries: the maximum number of cached hashmaps
+
+        max_bytes: the maximum estimated memory of the cached hashmaps, or
+        None for no memory limit
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        # copies sent to worker processes keep the limits but start empty
+        return {'max_entries': self.max_entries, 'max_bytes': self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _evict(self):
+        """
+        Drops the least recently used entries until both limits hold.
+        """
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self._nbytes > self.max_bytes)
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._nbytes -= size
+            self._evictions += 1
+
+    def cache_info(self) -> CacheInfo:
+        """
+        Reports the cache statistics.
+
+        Returns:
+            A CacheInfo tuple of (hits, misses, evictions, entries, nbytes)
+        """
+        with self._lock:
+            return CacheInfo(
+                self._hits, self._misses, self._evictions, len(self._entries), self._nbytes
+            )
+
+    def clear(self):
+        """
+        Empties the cache and resets its statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = self._nbytes = 0
+
+    def hash_shape(self, shape: GeoShape, hash_func: Callable) -> dict:
+        """
+        Hashes a single shape, reusing the hashmap of an earlier shape with the
+        same geometry and hashing configuration. Cached hashmaps are shared
+        and must not be modified.
+
+        Args:
+            shape: a geoshape
+
+            hash_func: the hashing function, called with a Track of the shape
+
+        Returns:
+            The hashmap of the shape
+        """
+        key = (hasher_fingerprint(hash_func), geometry_fingerprint(shape))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+            self._misses += 1
+
+        hashmap = hash_func(Track([shape]))
+        size = _hashmap_size(hashmap)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (hashmap, size)
+                self._nbytes += size
+                self._evict()
+
+        return hashmap
@@ -0,0 +1,335 @@
+""" Functions needed to hash shapes once and bucket the results by time"""
+import inspect
+from collections import defaultdict
+from concurrent.futures import Executor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+from geostructures.collections import Track
+from geochron.parallel import map_partitions, partition_count, partition_ranges
+from geochron.time_slicing import bucket_track
+
+# the value of every ASCII hexadecimal digit; other characters map to 16
+_HEX_DIGITS = np.full(128, 16, dtype=np.uint64)
+_HEX_DIGITS[[ord(char) for char in '0123456789']] = np.arange(10, dtype=np.uint64)
+_HEX_DIGITS[[ord(char) for char in 'abcdef']] = np.arange(10, 16, dtype=np.uint64)
+_HEX_DIGITS[[ord(char) for char in 'ABCDEF']] = np.arange(10, 16, dtype=np.uint64)
+
+
+def _accepts_agg_fn(hash_func: Callable) -> bool:
+    """
+    Checks whether a hashing function accepts the agg_fn keyword used by
+    the geostructures hashers: either it names agg_fn as a parameter or it
+    is a method of a hasher exposing hash_collection. Functions only taking
+    **kwargs are not assumed to support it.
+
+    Args:
+        hash_func: the hashing function
+
+    Returns:
+        A boolean
+    """
+    if hasattr(getattr(hash_func, '__self__', None), 'hash_collection'):
+        return True
+
+    try:
+        params = inspect.signature(hash_func).parameters
+    except (TypeError, ValueError): # pragma: no cover
+        return False
+
+    return 'agg_fn' in params and params['agg_fn'].kind in (
+        inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY
+    )
+
+
+def _count_partition(shared: Tuple[List, np.ndarray, Callable], part: slice):
+    """
+    Hashes one partition of shapes and counts its hits per (interval, cell)
+    pair. Runs in the workers of hash_track_by_interval.
+
+    Args:
+        shared: a tuple of (geoshapes, interval index of each shape, hashing
+        function)
+
+        part: the slice of the shapes making up the partition
+
+    Returns:
+        A cell table with the columns interval, cell and count
+    """
+    shapes, buckets, hash_func = shared
+    positions, cells = hash_items(shapes[part], hash_func, wrap=Track)
+    return count_cells_by_interval(buckets[part], positions, cells)
+
+
+def _hit_count(value) -> int:
+    """
+    Checks that a value returned by a hashing function is a count of hits.
+
+    Args:
+        value: the value mapped to a cell
+
+    Returns:
+        The value as an integer
+    """
+    count = int(value)
+    if count != value or count < 0:
+        raise ValueError(f"hash_func values must be non-negative integer counts, not {value!r}")
+
+    return count
+
+
+def hash_items(items: Sequence, hash_func: Callable, wrap: Callable = list,
+     weighted: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hashes every item (geoshape or coordinate) in one batched call and
+    returns the cell of each item as parallel arrays. Items covering several
+    cells appear once per cell. Hashing functions that do not accept the
+    geostructures agg_fn keyword are called once per item instead; when
+    weighted, each cell then appears as many times as the count it is mapped
+    to, so their values must be non-negative integers.
+
+    Args:
+        items: the geoshapes or coordinates to hash
+
+        hash_func: the hashing function
+
+        wrap: builds the hash_func argument from a list of items
+
+        weighted: whether the values returned by hash_func are counts
+
+    Returns:
+        A tuple of (item positions, cells) arrays
+    """
+    positions: List[int] = []
+    cells: List = []
+    weights: List[int] = []
+
+    if _accepts_agg_fn(hash_func):
+        lookup: Dict[int, List[int]] = defaultdict(list)
+        for pos, item in enumerate(items):
+            lookup[id(item)].append(pos)
+
+        hashmap = hash_func(wrap(list(items)), agg_fn=list)
+        for cell, hashed in hashmap.items():
+            # the same object can appear twice; count each position once
+            for item_id in {id(item) for item in hashed}:
+                item_positions = lookup[item_id]
+                positions.extend(item_positions)
+                cells.extend([cell] * len(item_positions))
+    else:
+        for pos, item in enumerate(items):
+            for cell, value in hash_func(wrap([item])).items():
+                positions.append(pos)
+                cells.append(cell)
+                weights.append(_hit_count(value) if weighted else 1)
+
+    position_array = np.repeat(np.array(positions, dtype=np.int64), weights or 1)
+    cell_array = np.repeat(np.array(cells, dtype=object), weights or 1)
+    order = np.argsort(position_array, kind='stable')
+
+    return position_array[order], cell_array[order]
+
+
+def hex_to_uint64(hashes) -> np.ndarray:
+    """
+    Converts hexadecimal hashes (such as H3 cells) into unsigned integers in
+    one vectorized pass, the equivalent of int(hash, 16) for each hash.
+
+    Args:
+        hashes: a sequence of hexadecimal strings of at most 16 characters
+
+    Returns:
+        A numpy uint64 array
+    """
+    chars = np.asarray(hashes, dtype=str)
+    width = chars.dtype.itemsize // 4
+    if width > 16:
+        raise ValueError('Only hashes of up to 16 hexadecimal digits fit into uint64')
+
+    codes = chars.reshape(-1).view(np.uint32).reshape(-1, max(width, 1))
+    lengths = np.char.str_len(chars.reshape(-1))
+    digits = _HEX_DIGITS[np.minimum(codes, 127)]
+    if ((digits == 16) & (np.arange(codes.shape[1]) < lengths[:, np.newaxis])).any():
+        raise ValueError('Hashes must be hexadecimal strings')
+
+    values = np.zeros(len(codes), dtype=np.uint64)
+    for pos in range(width):
+        values = np.where(pos < lengths, (values << np.uint64(4)) | digits[:, pos], values)
+
+    return values.reshape(chars.shape)
+
+
+def as_cell_table(df: Union[pd.DataFrame, Tuple[pd.DataFrame, pd.DataFrame]]):
+    """
+    Returns a cell table unchanged, takes the cell table out of an (interval
+    table, cell table) pair as returned by hash_by_interval, and converts a
+    row expanded dataframe with the columns cell and time (one row per hit,
+    as produced by hash_tracks_into_netdf) into a cell table. Intervals are
+    numbered in the sorted order of the time column.
+
+    Args:
+        df: a cell table, an (interval table, cell table) pair or a pandas
+        dataframe with the columns cell and time
+
+    Returns:
+        A cell table with the columns interval, cell and count
+    """
+    if isinstance(df, tuple):
+        intervals, cells = df
+        if not cells['interval'].isin(intervals.index).all():
+            raise ValueError("Every interval of the cell table needs a row in the interval table")
+        return cells
+
+    if 'count' in df.columns:
+        return df
+
+    intervals = np.unique(df['time'].to_numpy(), return_inverse=True)[1]
+    return count_cells_by_interval(
+        intervals.astype(np.int64), np.arange(len(df)), df['cell'].to_numpy(dtype=object)
+    )
+
+
+def count_matrix(cells: pd.DataFrame):
+    """
+    Builds a sparse interval x cell count matrix from a cell table. Only
+    intervals that contain cells get a row, in interval order, so consecutive
+    rows are consecutive observed intervals.
+
+    Args:
+        cells: a cell table with the columns interval, cell and count
+
+    Returns:
+        A tuple of (scipy CSR matrix, cell labels indexing its columns)
+    """
+    # pylint: disable=import-outside-toplevel
+    from scipy import sparse # type: ignore
+
+    cell_column = cells['cell'].astype('category').cat.remove_unused_categories()
+    intervals, rows = np.unique(cells['interval'].to_numpy(), return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (cells['count'].to_numpy(dtype=np.int64), (rows, cell_column.cat.codes.to_numpy())),
+        shape=(len(intervals), len(cell_column.cat.categories))
+    )
+
+    return matrix, cell_column.cat.categories
+
+
+def count_cells_by_interval(buckets: np.ndarray, positions: np.ndarray, cells: np.ndarray):
+    """
+    Counts the hits per (interval, cell) pair with a single group-by.
+
+    Args:
+        buckets: the interval index of each item, -1 for unassigned items
+
+        positions: the item position of each hashed cell
+
+        cells: the hashed cells
+
+    Returns:
+        A cell table: a pandas dataframe with an integer interval column, a
+        categorical cell column (categories in order of first appearance) and
+        a count column, sorted by interval and then by cell appearance
+    """
+    intervals = buckets[positions]
+    keep = intervals >= 0
+    kept_cells = cells[keep]
+    hits = pd.DataFrame({
+        'interval': intervals[keep],
+        'cell': pd.Categorical(kept_cells, categories=pd.unique(kept_cells))
+    })
+
+    counts = hits.groupby(['interval', 'cell'], sort=False, observed=True).size()
+    counts = counts.reset_index(name='count')
+    counts = counts.sort_values('interval', kind='stable').reset_index(drop=True)
+
+    return counts
+
+
+def merge_cell_tables(tables: Sequence[pd.DataFrame]):
+    """
+    Merges cell tables counted over separate groups of shapes by adding the
+    counts of matching (interval, cell) pairs. Tables covering consecutive
+    time ranges, in order, give the same cell table as counting all shapes
+    at once.
+
+    Args:
+        tables: the cell tables to merge
+
+    Returns:
+        A cell table with the columns interval, cell and count
+    """
+    if len(tables) == 1:
+        return tables[0]
+
+    hits = pd.concat(
+        [table.astype({'cell': object}) for table in tables], ignore_index=True
+    )
+    counts = hits.groupby(['interval', 'cell'], sort=False)['count'].sum().reset_index()
+    counts['cell'] = pd.Categorical(counts['cell'], categories=pd.unique(counts['cell']))
+    counts = counts.sort_values('interval', kind='stable').reset_index(drop=True)
+
+    return counts.astype({'interval': np.int64, 'count': np.int64})
+
+
+def hash_track_by_interval(track: Track, timestamps: Union[List, np.ndarray], hash_func: Callable,
+     n_jobs: Optional[int] = None, executor: Optional[Executor] = None):
+    """
+    Hashes every shape of a Track once and counts the hits per cell for each
+    interval defined by a list of timestamps. Throughput depends on the number
+    of shapes rather than the number of intervals. With n_jobs or executor,
+    the shapes are split into consecutive time ranges that are hashed in
+    parallel and their counts merged.
+
+    Args:
+        track: the target geostructures Track
+
+        timestamps: a list or datetime64 array of interval end timestamps
+
+        hash_func: the hashing function; must be picklable to run on a
+        process pool
+
+        n_jobs: the number of worker processes; -1 uses every core
+
+        executor: a concurrent.futures Executor to run the hashing on
+
+    Returns:
+        A cell table with the columns interval, cell and count
+    """
+    return hash_shapes_by_interval(
+        track.geoshapes, bucket_track(track, timestamps), hash_func, n_jobs, executor
+    )
+
+
+def hash_shapes_by_interval(shapes: Sequence, buckets: np.ndarray, hash_func: Callable,
+     n_jobs: Optional[int] = None, executor: Optional[Executor] = None):
+    """
+    Hashes shapes that were already assigned to intervals and counts the hits
+    per cell for each interval. With n_jobs or executor, the shapes are split
+    into consecutive ranges that are hashed in parallel and their counts
+    merged.
+
+    Args:
+        shapes: the geoshapes, in time order within each interval
+
+        buckets: the interval index of each shape, -1 for unassigned shapes
+
+        hash_func: the hashing function; must be picklable to run on a
+        process pool
+
+        n_jobs: the number of worker processes; -1 uses every core
+
+        executor: a concurrent.futures Executor to run the hashing on
+
+    Returns:
+        A cell table with the columns interval, cell and count
+    """
+    # shapes outside of every interval never need to be hashed
+    kept = np.flatnonzero(buckets >= 0)
+    shared = ([shapes[pos] for pos in kept], buckets[kept], hash_func)
+    parts = partition_ranges(len(kept), partition_count(n_jobs, executor))
+    if not parts:
+        return _count_partition(shared, slice(0, 0))
+
+    return merge_cell_tables(map_partitions(
+        _count_partition, shared, parts, n_jobs, executor, split=2
+    ))
@@ -0,0 +1,324 @@
+""" Vectorized generation of time intervals backed by numpy datetime64 ranges"""
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+
+# datetime.min is the reference point round_down_datetime floors against
+_FLOOR_ORIGIN = datetime(1970, 1, 1) - datetime.min
+_ONE_SECOND = np.timedelta64(1, 's')
+
+
+def _to_timedelta64(delta: timedelta) -> np.timedelta64:
+    """
+    Converts a timedelta into a numpy timedelta64 with nanosecond resolution.
+
+    Args:
+        delta: a timedelta
+
+    Returns:
+        A numpy timedelta64
+    """
+    return np.timedelta64(delta).astype('timedelta64[ns]')
+
+
+def _wall_clock(dt: datetime) -> np.datetime64:
+    """
+    Converts a datetime into a datetime64 holding its wall clock time,
+    dropping any timezone without converting.
+
+    Args:
+        dt: a datetime or pandas Timestamp
+
+    Returns:
+        A numpy datetime64
+    """
+    return pd.Timestamp(dt).tz_localize(None).to_datetime64()
+
+
+def epoch_seconds(values: np.ndarray) -> np.ndarray:
+    """
+    Converts a datetime64 array into floating point seconds since the
+    unix epoch, rounded to the microsecond like datetime.timestamp.
+
+    Args:
+        values: a numpy datetime64 array
+
+    Returns:
+        A numpy float array
+    """
+    return values.astype('datetime64[us]').astype(np.int64) / 10**6
+
+
+def floor_datetime64(values: np.ndarray, delta: timedelta) -> np.ndarray:
+    """
+    Rounds down datetime64 values to the nearest interval of the specified
+    timedelta, using the same reference point as round_down_datetime.
+
+    Args:
+        values: a numpy datetime64 array
+
+        delta: a timedelta representing the interval to round down to
+
+    Returns:
+        A numpy datetime64[ns] array
+    """
+    step = _to_timedelta64(delta).astype(np.int64)
+    origin = _to_timedelta64(_FLOOR_ORIGIN % delta).astype(np.int64)
+    ticks = values.astype('datetime64[ns]').astype(np.int64)
+    return (ticks - (ticks + origin) % step).astype('datetime64[ns]')
+
+
+def floored_intervals(start_time: datetime, end_time: datetime, interval: timedelta) -> np.ndarray:
+    """
+    Generates interval starts covering a range, rounded down to the nearest
+    interval. Works on wall clock time; timezones are dropped.
+
+    Args:
+        start_time: a datetime marking the start of the range
+
+        end_time: a datetime marking the end of the range
+
+        interval: a timedelta representing the interval to round down to
+
+    Returns:
+        A numpy datetime64[ns] array of interval starts
+    """
+    start, end = _wall_clock(start_time), _wall_clock(end_time)
+    step = _to_timedelta64(interval)
+    count = (end - start) // step + 1
+    first = floor_datetime64(np.array([start]), interval)[0]
+    starts = first + step * np.arange(count)
+
+    # Add an extra interval to cover the end time if necessary
+    if starts[-1] < end:
+        starts = np.append(starts, first + step * count)
+
+    return starts
+
+
+def inclusive_range(start_time: datetime, end_time: datetime, step: timedelta) -> np.ndarray:
+    """
+    Generates the times from a start time up to and including an end time
+    at a fixed step.
+
+    Args:
+        start_time: the start time
+
+        end_time: the end time
+
+        step: the timedelta between times
+
+    Returns:
+        A numpy datetime64[ns] array
+    """
+    start, end = utc_datetime64(start_time), utc_datetime64(end_time)
+    step64 = _to_timedelta64(step)
+    count = max(int((end - start) // step64) + 1, 0)
+    return start + step64 * np.arange(count)
+
+
+def _interval_count(start: np.datetime64, end: np.datetime64, step: np.timedelta64) -> int:
+    """
+    Counts the intervals of a fixed length needed from a start to cover an
+    end.
+
+    Args:
+        start: the start of the first interval
+
+        end: the time the intervals need to cover
+
+        step: the interval length as a numpy timedelta64
+
+    Returns:
+        The number of intervals
+    """
+    return max(-int((start - end) // step), 0)
+
+
+def interval_ends(start_time: datetime, end_time: datetime, time_delta: timedelta) -> np.ndarray:
+    """
+    Generates the end timestamps of consecutive intervals of a fixed length
+    starting at a start time and covering an end time. The last end is
+    pushed back by one second so the end time is inclusive.
+
+    Args:
+        start_time: the start of the first interval
+
+        end_time: the time the intervals need to cover
+
+        time_delta: the desired time interval
+
+    Returns:
+        A numpy datetime64[ns] array
+    """
+    start, end = utc_datetime64(start_time), utc_datetime64(end_time)
+    step = _to_timedelta64(time_delta)
+    count = _interval_count(start, end, step)
+    ends = start + step * np.arange(1, count + 1)
+    if count:
+        # change the last value to be inclusive
+        ends[-1] += _ONE_SECOND
+
+    return ends
+
+
+def iter_interval_ends(start_time: datetime, end_time: datetime,
+     time_delta: timedelta) -> Iterator[np.datetime64]:
+    """
+    Lazily generates the same end timestamps as interval_ends, one at a time.
+
+    Args:
+        start_time: the start of the first interval
+
+        end_time: the time the intervals need to cover
+
+        time_delta: the desired time interval
+
+    Returns:
+        A generator of numpy datetime64[ns] values
+    """
+    start, end = utc_datetime64(start_time), utc_datetime64(end_time)
+    step = _to_timedelta64(time_delta)
+    count = _interval_count(start, end, step)
+    for interval in range(1, count + 1):
+        yield start + step * interval + (_ONE_SECOND if interval == count else 0)
+
+
+def interval_table(start_time: datetime, timestamps) -> pd.DataFrame:
+    """
+    Builds the interval table matching a cell table: one row per interval id
+    holding the real start and end timestamps of the interval, in the
+    timezone of the start time (UTC for naive start times).
+
+    Args:
+        start_time: the start of the first interval
+
+        timestamps: a list or datetime64 array of interval end timestamps
+
+    Returns:
+        A pandas dataframe with the columns start_time and end_time, indexed
+        by interval id
+    """
+    edges = pd.DatetimeIndex(
+        np.concatenate([to_datetime64([start_time]), to_datetime64(timestamps)])
+    ).tz_localize('UTC').tz_convert(pd.Timestamp(start_time).tzinfo or 'UTC')
+    return pd.DataFrame(
+        {'start_time': edges[:-1], 'end_time': edges[1:]},
+        index=pd.RangeIndex(len(edges) - 1, name='interval')
+    )
+
+
+def interval_bounds(intervals: pd.DataFrame) -> Tuple[pd.Timestamp, np.ndarray]:
+    """
+    Splits an interval table back into the start of its first interval and
+    the interval end timestamps.
+
+    Args:
+        intervals: an interval table, as built by interval_table
+
+    Returns:
+        A tuple of (start time, UTC datetime64[ns] array of interval ends)
+    """
+    starts = intervals['start_time']
+    start_time = starts.iloc[0] if len(starts) else pd.Timestamp(0, tz=starts.dt.tz)
+    ends = intervals['end_time'].dt.tz_convert(None).to_numpy(dtype='datetime64[ns]')
+
+    return start_time, ends
+
+
+def stepped_times(start_time: datetime, num_intervals: int, interval: timedelta) -> np.ndarray:
+    """
+    Generates a fixed number of times from a start time, pulling the final
+    time back by one second. Works on wall clock time; timezones are dropped.
+
+    Args:
+        start_time: a datetime marking the start time
+
+        num_intervals: the number of times to create
+
+        interval: a timedelta representing the interval between times
+
+    Returns:
+        A numpy datetime64[ns] array
+    """
+    times = _wall_clock(start_time) + _to_timedelta64(interval) * np.arange(num_intervals)
+    times[-1] -= _ONE_SECOND
+    return times
+
+
+def to_datetime64(datetimes) -> np.ndarray:
+    """
+    Converts a sequence of datetimes into a numpy datetime64[ns] array
+    expressed in UTC. Naive datetimes are assumed to be UTC, consistent
+    with geostructures.
+
+    Args:
+        datetimes: a sequence of datetimes or a datetime64 array
+
+    Returns:
+        A numpy datetime64[ns] array
+    """
+    if isinstance(datetimes, np.ndarray) and np.issubdtype(datetimes.dtype, np.datetime64):
+        return datetimes.astype('datetime64[ns]')
+
+    index = pd.to_datetime(list(datetimes), utc=True)
+    return index.tz_localize(None).to_numpy(dtype='datetime64[ns]')
+
+
+def to_datetimes(values: Union[Sequence, np.ndarray],
+     tzinfo: Optional[object] = None) -> List[datetime]:
+    """
+    Converts a datetime64 array back into a list of datetimes.
+
+    Args:
+        values: a numpy datetime64 array
+
+        tzinfo: when given, values are read as UTC and converted to this timezone
+
+    Returns:
+        A list of datetimes
+    """
+    index = pd.DatetimeIndex(values)
+    if tzinfo is not None:
+        index = index.tz_localize('UTC').tz_convert(tzinfo)
+
+    return list(index.to_pydatetime())
+
+
+def local_datetime64(values: np.ndarray, tzinfo: Optional[object] = None) -> np.ndarray:
+    """
+    Converts a UTC datetime64 array into the wall clock time of a timezone.
+
+    Args:
+        values: a numpy datetime64 array expressed in UTC
+
+        tzinfo: the target timezone; values are returned unchanged when None
+
+    Returns:
+        A numpy datetime64[ns] array
+    """
+    index = pd.DatetimeIndex(values)
+    if tzinfo is not None:
+        index = index.tz_localize('UTC').tz_convert(tzinfo).tz_localize(None)
+
+    return index.to_numpy(dtype='datetime64[ns]')
+
+
+def utc_datetime64(value: datetime) -> np.datetime64:
+    """
+    Converts a single datetime into a numpy datetime64[ns] expressed in UTC,
+    without the overhead of converting a whole sequence. Naive datetimes are
+    assumed to be UTC.
+
+    Args:
+        value: a datetime or pandas Timestamp
+
+    Returns:
+        A numpy datetime64
+    """
+    stamp = pd.Timestamp(value)
+    if stamp.tzinfo is not None:
+        stamp = stamp.tz_convert(None)
+
+    return stamp.to_datetime64().astype('datetime64[ns]')
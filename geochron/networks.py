@@ -0,0 +1,282 @@
+""" Output formats for chronnets and geosynchnets"""
+import struct
+import zipfile
+from typing import Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+
+NETWORK_OUTPUTS = ('networkx', 'edgelist', 'csr')
+# the node labels save_network can store in a plain numpy array
+_LABEL_KINDS = ('empty', 'string', 'integer', 'floating', 'mixed-integer-float')
+
+
+def collapse_undirected(links: pd.DataFrame):
+    """
+    Collapses a directed edge list into an undirected one the way networkx's
+    DiGraph.to_undirected does: when both (a, b) and (b, a) exist, the weight
+    of the edge encountered last in (from, to) order is kept.
+
+    Args:
+        links: a pandas dataframe with the columns from, to and weight, sorted
+        by from and to
+
+    Returns:
+        A pandas dataframe with the columns from, to and weight where from is
+        never greater than to
+    """
+    swap = (links['from'] > links['to']).to_numpy()
+    undirected = pd.DataFrame({
+        'from': np.where(swap, links['to'], links['from']),
+        'to': np.where(swap, links['from'], links['to']),
+        'weight': links['weight'].to_numpy()
+    })
+    undirected = undirected.drop_duplicates(['from', 'to'], keep='last')
+
+    return undirected.sort_values(['from', 'to']).reset_index(drop=True)
+
+
+def edges_to_csr(links: pd.DataFrame, nodes: Optional[Union[Sequence, np.ndarray]] = None,
+     directed: bool = False):
+    """
+    Converts an edge list into a scipy CSR adjacency matrix. Undirected edges
+    are stored in both directions, self loops once.
+
+    Args:
+        links: a pandas dataframe with the columns from, to and weight
+
+        nodes: the node labels; defaults to the nodes of the edges in order of
+        appearance
+
+        directed: whether the edges are directed
+
+    Returns:
+        A tuple of (scipy CSR matrix, pandas Index of the node labels)
+    """
+    # pylint: disable=import-outside-toplevel
+    from scipy import sparse # type: ignore
+
+    if nodes is None:
+        nodes = pd.unique(links[['from', 'to']].to_numpy(dtype=object).ravel())
+    node_index = pd.Index(nodes)
+
+    rows = node_index.get_indexer(links['from'])
+    cols = node_index.get_indexer(links['to'])
+    weights = links['weight'].to_numpy()
+    if not directed:
+        mirrored = rows != cols
+        rows, cols = np.concatenate([rows, cols[mirrored]]), np.concatenate([cols, rows[mirrored]])
+        weights = np.concatenate([weights, weights[mirrored]])
+
+    matrix = sparse.csr_matrix(
+        (weights, (rows, cols)), shape=(len(node_index), len(node_index))
+    )
+
+    return matrix, node_index
+
+
+def edges_to_networkx(links: pd.DataFrame, nodes: Optional[Union[Sequence, np.ndarray]] = None,
+     directed: bool = False):
+    """
+    Converts an edge list into a weighted networkx graph.
+
+    Args:
+        links: a pandas dataframe with the columns from, to and weight
+
+        nodes: node labels added before the edges, also keeping isolated nodes
+
+        directed: whether a DiGraph or a Graph is built
+
+    Returns:
+        A networkx network
+    """
+    # pylint: disable=import-outside-toplevel
+    import networkx as nx # type: ignore
+
+    net = nx.DiGraph() if directed else nx.Graph()
+    if nodes is not None:
+        net.add_nodes_from(nodes)
+    net.add_weighted_edges_from(zip(links['from'], links['to'], links['weight'].tolist()))
+
+    return net
+
+
+def format_network(links: pd.DataFrame, output: str,
+     nodes: Optional[Union[Sequence, np.ndarray]] = None, directed: bool = False):
+    """
+    Returns an edge list in the requested output format.
+
+    Args:
+        links: a pandas dataframe with the columns from, to and weight
+
+        output: one of 'networkx' (a networkx graph), 'edgelist' (the pandas
+        dataframe) or 'csr' (a scipy CSR adjacency matrix with a node index)
+
+        nodes: the node labels of the network
+
+        directed: whether the edges are directed
+
+    Returns:
+        The network in the requested format
+    """
+    if output == 'edgelist':
+        return links.reset_index(drop=True)
+    if output == 'csr':
+        return edges_to_csr(links, nodes, directed)
+    if output == 'networkx':
+        return edges_to_networkx(links, nodes, directed)
+
+    raise ValueError(f"output must be one of {NETWORK_OUTPUTS}, not {output!r}")
+
+
+def _network_arrays(network, directed: Optional[bool] = None):
+    """
+    Pulls the CSR arrays and node labels out of a network in any of the
+    NETWORK_OUTPUTS formats.
+
+    Args:
+        network: a networkx graph, an edge list dataframe or a (scipy CSR
+        matrix, node labels) tuple
+
+        directed: whether the edges are directed; required for an edge list,
+        which does not record its direction, and defaulting to the direction
+        of a networkx graph and to whether a CSR matrix is asymmetric
+
+    Returns:
+        A tuple of (scipy CSR matrix, node label array, directed)
+    """
+    if isinstance(network, tuple):
+        matrix, nodes = network
+        if directed is None:
+            directed = (matrix != matrix.T).nnz > 0
+    elif isinstance(network, pd.DataFrame):
+        if directed is None:
+            raise ValueError("directed must be given for edge lists")
+        nodes = np.unique(network[['from', 'to']].to_numpy(dtype=object).ravel())
+        matrix, nodes = edges_to_csr(network, nodes, directed=directed)
+    else:
+        directed = network.is_directed() if directed is None else directed
+        links = pd.DataFrame(
+            list(network.edges(data='weight', default=1)), columns=['from', 'to', 'weight']
+        )
+        # a graph without edges would otherwise give object weights
+        links['weight'] = pd.to_numeric(links['weight'])
+        matrix, nodes = edges_to_csr(links, list(network), directed=directed)
+
+    if pd.api.types.infer_dtype(nodes, skipna=False) not in _LABEL_KINDS:
+        raise ValueError("node labels must all be strings or all be numbers")
+    labels = np.asarray(list(nodes))
+
+    return matrix.tocsr(), labels, bool(directed)
+
+
+def save_network(network, path, directed: Optional[bool] = None) -> None:
+    """
+    Saves a chronnet or geosynchnet as an uncompressed .npz file holding its
+    CSR arrays (indptr, indices, weights) and node labels, which
+    load_network can memory-map.
+
+    Args:
+        network: a networkx graph, an edge list dataframe or a (scipy CSR
+        matrix, node labels) tuple, as returned by the network converters
+
+        path: the path of the .npz file
+
+        directed: whether the edges are directed; required for an edge list,
+        which does not record its direction, and defaulting to the direction
+        of a networkx graph and to whether a CSR matrix is asymmetric
+    """
+    matrix, labels, directed = _network_arrays(network, directed)
+    matrix.sort_indices()
+    np.savez(
+        path, indptr=matrix.indptr, indices=matrix.indices, weights=matrix.data,
+        nodes=labels, directed=np.array(directed)
+    )
+
+
+def _mmap_npz(path) -> dict:
+    """
+    Memory-maps the arrays of an uncompressed .npz file in place. Every
+    member is a stored .npy file, so its data starts right after the zip
+    local header and the .npy header.
+
+    Args:
+        path: the path of the .npz file
+
+    Returns:
+        A dict of read-only numpy memmaps (or empty arrays) by name
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as file:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path} is compressed and cannot be memory-mapped")
+            file.seek(info.header_offset)
+            name_length, extra_length = struct.unpack('<2H', file.read(30)[26:30])
+            file.seek(info.header_offset + 30 + name_length + extra_length)
+            # .npy headers are version 1.0, or 2.0 when they outgrow 64 KiB
+            major, _ = np.lib.format.read_magic(file)
+            read_header = getattr(np.lib.format, f'read_array_header_{major}_0')
+            shape, fortran_order, dtype = read_header(file)
+
+            name = info.filename[:-len('.npy')]
+            if np.prod(shape) == 0:
+                arrays[name] = np.empty(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(
+                    path, dtype=dtype, mode='r', offset=file.tell(), shape=shape,
+                    order='F' if fortran_order else 'C'
+                )
+
+    return arrays
+
+
+def load_network(path, output: str = 'csr', mmap: bool = True):
+    """
+    Loads a network saved with save_network. By default the CSR arrays are
+    memory-mapped rather than read, so reopening a large network is near
+    instant and processes opening the same file share its pages.
+
+    Args:
+        path: the path of the .npz file
+
+        output: one of NETWORK_OUTPUTS, see format_network
+
+        mmap: whether the arrays are memory-mapped
+
+    Returns:
+        The network in the requested format
+    """
+    # pylint: disable=import-outside-toplevel
+    from scipy import sparse # type: ignore
+
+    if output not in NETWORK_OUTPUTS:
+        raise ValueError(f"output must be one of {NETWORK_OUTPUTS}, not {output!r}")
+    if mmap:
+        arrays = _mmap_npz(path)
+    else:
+        with np.load(path) as npz:
+            arrays = {name: npz[name] for name in npz.files}
+
+    nodes = pd.Index(arrays['nodes'].tolist())
+    directed = bool(arrays['directed'])
+    # assigning the arrays skips the checks of the constructor, which copy them
+    matrix = sparse.csr_matrix((len(nodes), len(nodes)), dtype=arrays['weights'].dtype)
+    matrix.data, matrix.indices, matrix.indptr = (
+        arrays['weights'], arrays['indices'], arrays['indptr']
+    )
+    if output == 'csr':
+        return matrix, nodes
+
+    coo = matrix.tocoo()
+    # undirected matrices hold every edge in both directions
+    kept = np.ones(coo.nnz, dtype=bool) if directed else coo.row <= coo.col
+    labels = nodes.to_numpy(dtype=object)
+    links = pd.DataFrame({
+        'from': labels[coo.row[kept]],
+        'to': labels[coo.col[kept]],
+        'weight': coo.data[kept]
+    })
+    if output == 'edgelist':
+        return links
+
+    return edges_to_networkx(links, nodes, directed)
@@ -0,0 +1,251 @@
+""" Out of core conversion: streaming feature files into partitioned Parquet datasets"""
+import json
+import os
+from datetime import timedelta
+from typing import Callable, Iterator, List, Optional, Union
+import pandas as pd
+from geostructures.collections import FeatureCollection
+from geochron.columnar import POINT_COLUMNS
+from geochron.geotimehash import iter_geotimehash_chunks
+from geochron.hash_cache import HashCache
+from geochron.timehash_codec import timehash_start_seconds
+from geochron.timehex import iter_timehex_chunks
+
+SOURCE_FORMATS = ('geojsonl', 'parquet')
+# the source format of each recognized file suffix
+_SOURCE_SUFFIXES = {
+    '.geojsonl': 'geojsonl',
+    '.geojsons': 'geojsonl',
+    '.jsonl': 'geojsonl',
+    '.ndjson': 'geojsonl',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+}
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def read_geojsonl_chunks(path: Union[str, os.PathLike], chunk_size: int = DEFAULT_CHUNK_SIZE,
+     time_start_property: str = 'datetime_start',
+     time_end_property: str = 'datetime_end') -> Iterator[FeatureCollection]:
+    """
+    Reads a newline delimited GeoJSON file, one feature per line, in
+    FeatureCollections of at most chunk_size features.
+
+    Args:
+        path: the path of the file
+
+        chunk_size: the number of features in each chunk
+
+        time_start_property: the feature property holding the start time
+
+        time_end_property: the feature property holding the end time
+
+    Returns:
+        A generator of FeatureCollections in file order
+    """
+    features: List = []
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                features.append(json.loads(line))
+            if len(features) == chunk_size:
+                yield FeatureCollection.from_geojson(
+                    {'type': 'FeatureCollection', 'features': features},
+                    time_start_property=time_start_property, time_end_property=time_end_property
+                )
+                features = []
+
+    if features:
+        yield FeatureCollection.from_geojson(
+            {'type': 'FeatureCollection', 'features': features},
+            time_start_property=time_start_property, time_end_property=time_end_property
+        )
+
+
+def read_parquet_chunks(path: Union[str, os.PathLike],
+     chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Reads the lat, lon and timestamp columns of a Parquet file of points in
+    dataframes of at most chunk_size rows.
+
+    Args:
+        path: the path of the file
+
+        chunk_size: the number of rows in each chunk
+
+    Returns:
+        A generator of pandas dataframes in file order
+    """
+    # pylint: disable=import-outside-toplevel
+    import pyarrow.parquet as pq # type: ignore
+
+    batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=list(POINT_COLUMNS))
+    for batch in batches:
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def read_chunks(path: Union[str, os.PathLike], chunk_size: int = DEFAULT_CHUNK_SIZE,
+     source_format: Optional[str] = None) -> Iterator[Union[FeatureCollection, pd.DataFrame]]:
+    """
+    Reads a feature file in chunks, with the reader of its format.
+
+    Args:
+        path: the path of the file
+
+        chunk_size: the number of features in each chunk
+
+        source_format: one of SOURCE_FORMATS; by default it is inferred from
+        the file suffix
+
+    Returns:
+        A generator of FeatureCollections or pandas dataframes of points
+    """
+    if source_format is None:
+        suffix = os.path.splitext(os.fspath(path))[1].lower()
+        if suffix not in _SOURCE_SUFFIXES:
+            raise ValueError(
+                "source_format must be given for files without a suffix in "
+                f"{tuple(_SOURCE_SUFFIXES)}"
+            )
+        source_format = _SOURCE_SUFFIXES[suffix]
+    if source_format not in SOURCE_FORMATS:
+        raise ValueError(f"source_format must be one of {SOURCE_FORMATS}, not {source_format!r}")
+
+    if source_format == 'geojsonl':
+        return read_geojsonl_chunks(path, chunk_size)
+    return read_parquet_chunks(path, chunk_size)
+
+
+def _write_partition(frame: pd.DataFrame, dates: pd.Series, destination: Union[str, os.PathLike],
+     part: int) -> None:
+    """
+    Appends a dataframe to a Parquet dataset partitioned by date, in files
+    named after the part number so that earlier parts are never overwritten.
+
+    Args:
+        frame: the rows to write
+
+        dates: the date partition of every row, as YYYY-MM-DD strings
+
+        destination: the directory of the dataset
+
+        part: the number of the part being written
+    """
+    # pylint: disable=import-outside-toplevel
+    import pyarrow as pa # type: ignore
+    import pyarrow.parquet as pq # type: ignore
+
+    table = pa.Table.from_pandas(frame.assign(date=dates.to_numpy()), preserve_index=False)
+    pq.write_to_dataset(
+        table, os.fspath(destination), partition_cols=['date'],
+        basename_template=f'part-{part:06d}-{{i}}.parquet'
+    )
+
+
+def convert_timehex_file(source: Union[str, os.PathLike], destination: Union[str, os.PathLike],
+     time_delta: timedelta, hash_func: Callable, chunk_size: int = DEFAULT_CHUNK_SIZE,
+     source_format: Optional[str] = None) -> int:
+    """
+    Converts a time-ordered feature file into a long timehex Parquet dataset,
+    partitioned by the date of each interval start, without loading the file
+    at once. The file is read and bucketed chunk by chunk, as in
+    iter_timehex_chunks, so memory is bounded by the chunk size.
+
+    Args:
+        source: a newline delimited GeoJSON file of time bound features, or
+        a Parquet file of points with the columns lat, lon and timestamp, in
+        time order
+
+        destination: the directory of the Parquet dataset
+
+        time_delta: the desired time interval
+
+        hash_func: the hashing function
+
+        chunk_size: the number of features read at once
+
+        source_format: one of SOURCE_FORMATS; by default it is inferred from
+        the file suffix
+
+    Returns:
+        The number of rows written
+    """
+    rows = 0
+    chunks = read_chunks(source, chunk_size, source_format)
+    frames = iter_timehex_chunks(chunks, time_delta, hash_func)
+    for part, frame in enumerate(frames):
+        _write_partition(
+            frame.astype({'cell': str}), frame['interval_start'].dt.strftime('%Y-%m-%d'),
+            destination, part
+        )
+        rows += len(frame)
+
+    return rows
+
+
+def _write_geotimehash_rows(rows: List, destination: Union[str, os.PathLike], part: int) -> None:
+    """
+    Appends geotime hash rows to a Parquet dataset partitioned by the date
+    each timehash starts on.
+
+    Args:
+        rows: a list of (geohash, timehash, value) tuples
+
+        destination: the directory of the dataset
+
+        part: the number of the part being written
+    """
+    frame = pd.DataFrame(rows, columns=['geohash', 'timehash', 'value'])
+    codes, timehashes = pd.factorize(frame['timehash'])
+    starts = pd.to_datetime(timehash_start_seconds(timehashes), unit='s')
+    _write_partition(frame, pd.Series(starts.strftime('%Y-%m-%d')[codes]), destination, part)
+
+
+def convert_geotimehash_file(source: Union[str, os.PathLike], destination: Union[str, os.PathLike],
+     precision: int, hash_func: Callable, chunk_size: int = DEFAULT_CHUNK_SIZE,
+     source_format: Optional[str] = None, hash_cache: Optional[HashCache] = None) -> int:
+    """
+    Converts a time-ordered feature file into a Parquet dataset of geotime
+    hashes with the columns geohash, timehash and value, partitioned by the
+    date each timehash starts on. The file is read chunk by chunk, as in
+    iter_geotimehash_chunks, and the rows are written chunk_size at a time,
+    so memory is bounded by the chunk size and the open timehashes.
+
+    Args:
+        source: a newline delimited GeoJSON file of time bound features, or
+        a Parquet file of points with the columns lat, lon and timestamp, in
+        time order
+
+        destination: the directory of the Parquet dataset
+
+        precision: the precision of the time hash
+
+        hash_func: the hashing function
+
+        chunk_size: the number of features read, and rows written, at once
+
+        source_format: one of SOURCE_FORMATS; by default it is inferred from
+        the file suffix
+
+        hash_cache: an optional HashCache for the shapes of GeoJSON files
+
+    Returns:
+        The number of rows written
+    """
+    written, part = 0, 0
+    rows: List = []
+    timehashes = iter_geotimehash_chunks(
+        read_chunks(source, chunk_size, source_format), precision, hash_func, hash_cache
+    )
+    for timehash, hashmap in timehashes:
+        rows.extend((geohash, timehash, value) for geohash, value in hashmap.items())
+        if len(rows) >= chunk_size:
+            _write_geotimehash_rows(rows, destination, part)
+            written, part, rows = written + len(rows), part + 1, []
+
+    if rows:
+        _write_geotimehash_rows(rows, destination, part)
+        written += len(rows)
+
+    return written
@@ -0,0 +1,190 @@
+""" Helpers to spread the convert_* pipelines across a process pool"""
+import io
+import os
+import pickle
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+from geostructures import (
+    GeoBox, GeoCircle, GeoEllipse, GeoLineString, GeoPoint, GeoPolygon, GeoRing,
+    MultiGeoLineString, MultiGeoPoint, MultiGeoPolygon
+)
+
+# Shapes whose GeoJSON only approximates them with a polygon, or drops the
+# times of their members, are rebuilt from the public attributes matching the
+# arguments of their constructor
+_SHAPE_ARGS = {
+    GeoBox: ('nw_bound', 'se_bound', 'holes'),
+    GeoCircle: ('center', 'radius', 'holes'),
+    GeoEllipse: ('center', 'semi_major', 'semi_minor', 'rotation', 'holes'),
+    GeoRing: ('center', 'inner_radius', 'outer_radius', 'angle_min', 'angle_max', 'holes'),
+    MultiGeoLineString: ('geoshapes',),
+    MultiGeoPoint: ('geoshapes',),
+    MultiGeoPolygon: ('geoshapes',),
+}
+
+_GEOJSON_SHAPES = (GeoPoint, GeoLineString, GeoPolygon)
+
+
+def _shape_from_args(cls: type, args: dict, time, properties: dict):
+    """
+    Rebuilds a geoshape pickled by _PartitionPickler from its constructor
+    arguments.
+
+    Args:
+        cls: the class of the shape
+
+        args: the geometric arguments of the constructor
+
+        time: the datetime or TimeInterval of the shape
+
+        properties: the properties of the shape
+
+    Returns:
+        The geoshape
+    """
+    return cls(**args, dt=time, properties=properties)
+
+
+class _PartitionPickler(pickle.Pickler):
+    """
+    Pickles partitions of work for other processes. Geoshapes hold a per
+    instance lru_cache wrapper that pickle refuses, so they are sent as their
+    GeoJSON, or their constructor arguments when GeoJSON would lose part of
+    them, and rebuilt with the public constructors on loading.
+    """
+
+    def reducer_override(self, obj):
+        """ Pickles geoshapes as the arguments of their public constructors"""
+        cls = type(obj)
+        if cls in _SHAPE_ARGS:
+            args = {name: getattr(obj, name) for name in _SHAPE_ARGS[cls]}
+            return _shape_from_args, (cls, args, obj.dt, obj.properties)
+        if cls in _GEOJSON_SHAPES:
+            return cls.from_geojson, (obj.to_geojson(),)
+        return NotImplemented
+
+
+def _dump_partition(func: Callable, shared: Tuple, part: slice, split: int) -> bytes:
+    """
+    Pickles one task of map_partitions: the function and only the data of
+    its own partition.
+
+    Args:
+        func: the function applied to the partition
+
+        shared: the data shared by every partition
+
+        part: the slice of the partition
+
+        split: the number of leading elements of shared holding one entry per
+        item, which are sliced to the partition
+
+    Returns:
+        The pickled (function, partition data, slice) task
+    """
+    data = tuple(item[part] for item in shared[:split]) + tuple(shared[split:])
+    buffer = io.BytesIO()
+    _PartitionPickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(
+        (func, data, slice(0, part.stop - part.start))
+    )
+    return buffer.getvalue()
+
+
+def _run_partition(task: bytes):
+    """
+    Runs a task pickled by _dump_partition. Runs in the worker processes.
+
+    Args:
+        task: the pickled task
+
+    Returns:
+        The result of the function on its partition
+    """
+    func, data, part = pickle.loads(task)
+    return func(data, part)
+
+
+def map_partitions(func: Callable, shared: Tuple, parts: List[slice], n_jobs: Optional[int] = None,
+     executor: Optional[Executor] = None, split: int = 1) -> List:
+    """
+    Applies func(shared, part) to every partition, in order. Work runs on the
+    given executor, on a new process pool of n_jobs workers, or serially when
+    neither is requested.
+
+    Thread pools share the data as it is. Every other executor, and the pool
+    started for n_jobs, is sent one pickled task per partition holding only
+    the data of that partition, so the function (defined at module level),
+    the hashing function and any other shared values must be picklable.
+    The pool uses the default start method of the platform; with the spawn
+    method, calls must be guarded by if __name__ == '__main__'.
+
+    Args:
+        func: the function applied to each partition
+
+        shared: a tuple of the data shared by every partition
+
+        parts: the slices of the items making up the partitions
+
+        n_jobs: the number of worker processes; -1 uses every core
+
+        executor: a concurrent.futures Executor to run the work on
+
+        split: the number of leading elements of shared holding one entry per
+        item; only their partition is sent to each task
+
+    Returns:
+        A list with the result of each partition
+    """
+    if executor is None:
+        workers = min(partition_count(n_jobs), len(parts))
+        if workers < 2:
+            return [func(shared, part) for part in parts]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return map_partitions(func, shared, parts, executor=pool, split=split)
+
+    if isinstance(executor, ThreadPoolExecutor):
+        return list(executor.map(func, repeat(shared), parts))
+
+    tasks = [_dump_partition(func, shared, part, split) for part in parts]
+    return list(executor.map(_run_partition, tasks))
+
+
+def partition_count(n_jobs: Optional[int] = None, executor: Optional[Executor] = None) -> int:
+    """
+    Resolves the number of partitions to split work into. On an executor the
+    work is split into n_jobs partitions, one per core by default.
+
+    Args:
+        n_jobs: the number of worker processes, or of partitions on an
+        executor; -1 uses every core
+
+        executor: a concurrent.futures Executor to run the work on
+
+    Returns:
+        The number of partitions
+    """
+    if n_jobs is None and executor is None:
+        return 1
+    if n_jobs is None or n_jobs < 0:
+        return os.cpu_count() or 1
+
+    return max(n_jobs, 1)
+
+
+def partition_ranges(n_items: int, n_parts: int) -> List[slice]:
+    """
+    Splits a range of items into contiguous, near equal slices. Items sorted
+    by time therefore give one time range per slice.
+
+    Args:
+        n_items: the number of items
+
+        n_parts: the desired number of slices
+
+    Returns:
+        A list of non-empty slices, in order
+    """
+    bounds = np.linspace(0, n_items, max(min(n_parts, n_items), 1) + 1).astype(int)
+    return [slice(start, stop) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
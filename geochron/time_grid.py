@@ -1,11 +1,20 @@
 "Representation as a time grid"
 import math
-from datetime import  date, datetime, timedelta
-from typing import Callable, List
+from concurrent.futures import Executor
+from datetime import  datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+import numpy as np
 import pandas as pd
+from geostructures import Coordinate
 from geostructures.collections import FeatureCollection, Track
-from geochron.time_slicing import get_timestamp_intervals, time_slice_track
-from geostructures.time import TimeInterval
+from geochron.fleet import group_shapes
+from geochron.hashing import hash_items, hex_to_uint64
+from geochron.intervals import floored_intervals, stepped_times, to_datetime64, to_datetimes
+from geochron.parallel import map_partitions, partition_count, partition_ranges
+from geochron.time_slicing import time_slice_track
+
+# the value of subintervals without any shapes, in both hash and integer grids
+EMPTY_SUBINTERVAL = 0
 
 
 def break_time_interval(track: Track, interval_list: List, time_interval: timedelta):
@@ -61,18 +70,9 @@ def extract_intervals_in_range(start_time: datetime, end_time: datetime, interva
         A list of datetime objects representing the intervals rounded 
         down to the nearest specified interval within the range.
     """
-    current_time = start_time
-    intervals_list = []
-
-    while current_time <= end_time:
-        intervals_list.append(round_down_datetime(current_time, interval))
-        current_time += interval
+    intervals = to_datetimes(floored_intervals(start_time, end_time, interval))
 
-    # Add an extra interval to cover the end time if necessary
-    if intervals_list[-1] < end_time:
-        intervals_list.append(round_down_datetime(current_time, interval))
-
-    return intervals_list
+    return [item.replace(tzinfo=start_time.tzinfo) for item in intervals]
 
 
 
@@ -89,23 +89,293 @@ def create_time_list_from_datetimes(start_datetime: datetime, num_intervals: int
     Returns:
         A list of datetime objects representing each interval.
     """
-    times = []
-    current_time = start_datetime
+    times = to_datetimes(stepped_times(start_datetime, num_intervals, interval))
+
+    return [item.replace(tzinfo=start_datetime.tzinfo) for item in times]
+
+
+
+
+def _interval_rows(shapes: List, interval_list: List, time_interval: timedelta):
+    """
+    Assigns shapes sorted by start time to the interval they fall in with one
+    searchsorted pass over the interval starts, as break_time_interval does.
+    Shapes crossing an interval boundary or outside every interval are dropped.
+
+    Args:
+        shapes: The geoshapes, sorted by start time.
+        interval_list: The start time of each interval.
+        time_interval: A timedelta object representing the interval.
+
+    Returns:
+        A tuple of (positions of the kept shapes, interval of each kept shape) arrays
+    """
+    edges = to_datetime64(interval_list + [interval_list[-1] + time_interval])
+    first = np.searchsorted(edges, to_datetime64([shape.start for shape in shapes]), side='right')
+    last = np.searchsorted(edges, to_datetime64([shape.end for shape in shapes]), side='right')
+    kept = np.flatnonzero((first == last) & (first > 0) & (first < len(edges)))
+
+    return kept, first[kept] - 1
+
+
+def _interval_parts(rows: np.ndarray, n_intervals: int, n_parts: int) -> List[slice]:
+    """
+    Splits shapes sorted by interval into partitions holding whole intervals,
+    so no subinterval is split between two partitions.
+
+    Args:
+        rows: The interval of each shape, in non-decreasing order.
+        n_intervals: The number of intervals.
+        n_parts: The desired number of partitions.
+
+    Returns:
+        A list of non-empty slices of the shapes, in order
+    """
+    intervals = partition_ranges(n_intervals, n_parts)
+    bounds = np.searchsorted(rows, [part.start for part in intervals] + [n_intervals])
+    return [slice(begin, end) for begin, end in zip(bounds[:-1], bounds[1:]) if end > begin]
+
+
+def _grid_partition(shared: Tuple, part: slice):
+    """
+    Hashes the subintervals of one partition of shapes, holding whole
+    intervals. Runs in the workers of convert_time_grid.
+
+    Args:
+        shared: a tuple of (shapes, interval of each shape, windows, timezone,
+        hashing function, integerize)
+
+        part: the slice of the shapes making up the partition
+
+    Returns:
+        A tuple of (grid cells, hashes) arrays
+    """
+    shapes, rows, *args = shared
+    return _hash_grid_cells(shapes[part], rows[part], rows[part], *args)
+
+
+def _batch_partition(shared: Tuple, part: slice):
+    """
+    Assigns the shapes of one partition of entities to intervals and hashes
+    their time grids. Runs in the workers of convert_time_grid_batch.
+
+    Args:
+        shared: a tuple of (shapes of each entity, interval start times, interval,
+        windows, hashing function)
+
+        part: the slice of the entities making up the partition
+
+    Returns:
+        A tuple of (grid cells, hashes) arrays, numbered from the first entity
+        of the partition
+    """
+    entity_shapes, interval_list, time_interval, windows, hash_func = shared
+    groups = entity_shapes[part]
+    shapes = [shape for group in groups for shape in group]
+    entity = np.repeat(np.arange(len(groups)), [len(group) for group in groups])
+    kept, rows = _interval_rows(shapes, interval_list, time_interval)
+
+    return _hash_grid_cells(
+        [shapes[pos] for pos in kept],
+        entity[kept] * len(interval_list) + rows,
+        rows,
+        windows,
+        interval_list[0].tzinfo,
+        hash_func,
+        integerize=True
+    )
+
+
+def subinterval_windows(interval_list: List, num_intervals: int,
+     time_subinterval: timedelta) -> np.ndarray:
+    """
+    Computes the wall clock boundaries of the subinterval windows of every
+    interval: the times of create_time_list_from_datetimes(interval,
+    num_intervals + 1, time_subinterval), each moved back a microsecond.
+
+    Args:
+        interval_list: The start time of each interval.
+        num_intervals: The number of subintervals per interval.
+        time_subinterval: A timedelta object representing the subinterval.
+
+    Returns:
+        A datetime64[ns] array with one row per interval and num_intervals + 1 columns.
+    """
+    starts = np.array(
+        [pd.Timestamp(interval).tz_localize(None) for interval in interval_list],
+        dtype='datetime64[ns]'
+    )
+    offsets = stepped_times(datetime(1970, 1, 1), num_intervals + 1, time_subinterval)
+    return starts[:, np.newaxis] + (offsets - np.datetime64(0, 'ns')) - np.timedelta64(1, 'us')
+
+
+def _shape_times(shapes: List, windows: np.ndarray, tzinfo):
+    """
+    Expresses the shape bounds and the subinterval windows on one timeline.
+    Datetimes sharing a tzinfo compare by wall clock time, so those stay in
+    wall clock time; otherwise everything is converted to UTC.
+
+    Args:
+        shapes: The geoshapes of the tracks, in order.
+        windows: The wall clock windows, from subinterval_windows.
+        tzinfo: The timezone of the interval start times.
+
+    Returns:
+        A tuple of (shape starts, shape ends, windows) datetime64 arrays
+    """
+    if all(shape.start.tzinfo is tzinfo and shape.end.tzinfo is tzinfo for shape in shapes):
+        return (
+            to_datetime64([shape.start.replace(tzinfo=None) for shape in shapes]),
+            to_datetime64([shape.end.replace(tzinfo=None) for shape in shapes]),
+            windows
+        )
+
+    if tzinfo is not None:
+        times = [item.replace(tzinfo=tzinfo) for item in to_datetimes(list(windows.ravel()))]
+        windows = to_datetime64(times).reshape(windows.shape)
+
+    return (
+        to_datetime64([shape.start for shape in shapes]),
+        to_datetime64([shape.end for shape in shapes]),
+        windows
+    )
+
+
+def _intersects(window_start: np.ndarray, window_end: np.ndarray, start: np.ndarray,
+     end: np.ndarray) -> np.ndarray:
+    """
+    Vectorized TimeInterval.intersects, which is inclusive when either
+    interval is an instant.
 
-    for _ in range(num_intervals):
-        times.append(current_time)
-        current_time += interval
-    times[-1] = times[-1]- timedelta(seconds=1)
-    return times
+    Args:
+        window_start: The start of each window.
+        window_end: The end of each window.
+        start: The start of each shape.
+        end: The end of each shape.
 
+    Returns:
+        A boolean array
+    """
+    instant = (start == end) | (window_start == window_end)
+    return np.where(
+        instant,
+        (window_end >= start) & (window_start <= end),
+        (window_end > start) & (window_start < end)
+    )
+
+
+def _assign_subintervals(tracks: np.ndarray, rows: np.ndarray, windows: np.ndarray,
+     starts: np.ndarray, ends: np.ndarray):
+    """
+    Finds every subinterval each shape intersects, with the semantics of
+    Track.filter_by_dt on each window, in one pass over all shapes. The
+    window rows are laid out one after the other on a single sorted axis, so
+    one searchsorted call finds the candidate windows of every shape.
+
+    Args:
+        tracks: The grid row of each shape.
+        rows: The interval (row of windows) of each shape.
+        windows: The window boundaries of each interval, from subinterval_windows.
+        starts: The start time of each shape.
+        ends: The end time of each shape.
+
+    Returns:
+        A tuple of (grid cells, shape positions) arrays, where a grid cell numbers
+        subinterval i of grid row j as j * num_intervals + i.
+    """
+    num_intervals = windows.shape[1] - 1
+    ticks = windows.astype(np.int64)
+    origins = ticks[:, 0]
+    offsets = ticks - origins[:, np.newaxis]
+    low_offset = offsets.min()
+    # the band of each row, with room below and above its windows
+    span = offsets.max() - low_offset + 3
+    axis = offsets - low_offset + 1 + span * np.arange(len(ticks))[:, np.newaxis]
+
+    def place(times):
+        relative = times.astype(np.int64) - origins[rows] - low_offset + 1
+        return np.clip(relative, 0, span - 1) + span * rows
+
+    # candidate windows satisfy the inclusive test; the exact test follows below
+    base = rows * num_intervals
+    low = np.searchsorted(axis[:, 1:].ravel(), place(starts), side='left') - base
+    high = np.searchsorted(axis[:, :-1].ravel(), place(ends), side='right') - base
+    sizes = np.maximum(high - low, 0)
+    shape = np.repeat(np.arange(len(rows)), sizes)
+    sub = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes - low, sizes)
+
+    row = rows[shape]
+    keep = _intersects(windows[row, sub], windows[row, sub + 1], starts[shape], ends[shape])
+    return (tracks[shape] * num_intervals + sub)[keep], shape[keep]
+
+
+def _grid_centroids(shapes: List, cell: np.ndarray, shape: np.ndarray):
+    """
+    Averages the centroids of the shapes assigned to each grid cell, like
+    Track.centroid does for the shapes of a subinterval.
+
+    Args:
+        shapes: The geoshapes of the tracks, in order.
+        cell: The grid cell of each assignment.
+        shape: The shape position of each assignment.
+
+    Returns:
+        A tuple of (occupied grid cells, centroid Coordinates)
+    """
+    positions, member = np.unique(shape, return_inverse=True)
+    centroids = np.array([shapes[pos].centroid.to_float() for pos in positions])
+    occupied, group = np.unique(cell, return_inverse=True)
+    sizes = np.bincount(group)
+    lons = np.bincount(group, weights=centroids[member, 0]) / sizes
+    lats = np.bincount(group, weights=centroids[member, 1]) / sizes
 
+    return occupied, [Coordinate(lon, lat) for lon, lat in zip(lons, lats)]
+
+
+def _hash_grid_cells(shapes: List, tracks: np.ndarray, rows: np.ndarray, windows: np.ndarray,
+     tzinfo, hash_func: Callable, integerize=False):
+    """
+    Hashes the centroid of every occupied subinterval of a list of shapes.
+    Shapes are assigned to subintervals in one vectorized pass, centroids are
+    grouped means of the shape centroids, and every centroid is hashed in one
+    batched call.
+
+    Args:
+        shapes: The geoshapes, in track order.
+        tracks: The grid row of each shape.
+        rows: The interval (row of windows) of each shape.
+        windows: The wall clock window boundaries of each interval, from subinterval_windows.
+        tzinfo: The timezone of the interval start times.
+        hash_func: A callable function used to hash coordinates of track centroids.
+            Must use hash_coordinates
+        integerize: A boolean flag indicating whether to convert hashed values to integers.
+
+    Returns:
+        A tuple of (grid cells, hashes) arrays for the occupied subintervals, where a
+        grid cell numbers subinterval i of grid row j as j * num_intervals + i.
+    """
+    starts, ends, windows = _shape_times(shapes, windows, tzinfo)
+    cell, shape = _assign_subintervals(tracks, rows, windows, starts, ends)
+    if len(cell) == 0:
+        return cell, np.empty(0, dtype=np.uint64 if integerize else object)
+
+    occupied, points = _grid_centroids(shapes, cell, shape)
+    positions, hashes = hash_items(points, hash_func, weighted=False)
+    # keep the first hash of each centroid
+    positions, first = np.unique(positions, return_index=True)
+    hashes = hashes[first]
+
+    return occupied[positions], hex_to_uint64(hashes) if integerize else hashes
 
 
 def convert_time_grid(fcol: FeatureCollection,
                       time_interval: timedelta,
                       time_subinterval: timedelta,
                       hash_func: Callable,
-                      integerize=False):
+                      integerize=False,
+                      n_jobs: Optional[int] = None,
+                      executor: Optional[Executor] = None,
+                      sparse=False):
     """
     Converts a track into a time grid dataframe,
     partitioning it by specified time intervals and subintervals.
@@ -114,37 +384,100 @@ def convert_time_grid(fcol: FeatureCollection,
         track: The target geostructures Track to be converted.
         time_interval: A timedelta object representing the primary interval to partition the track.
         time_subinterval: A timedelta object representing the subinterval.
-        hash_func: A callable function used to hash coordinates of track centroids. Must use hash_coordinates
+        hash_func: A callable function used to hash coordinates of track centroids.
+            Must use hash_coordinates
         integerize: A boolean flag indicating whether to convert hashed values to integers.
+            Integerized periods are uint64 columns.
+        n_jobs: The number of worker processes hashing ranges of intervals in parallel;
+            -1 uses every core.
+        executor: A concurrent.futures Executor to run the hashing on.
+        sparse: A boolean flag indicating whether to store the periods as pandas sparse columns,
+            which only hold the non-empty subintervals.
 
     Returns:
-        A pandas DataFrame representing the time grid with track segments hashed into intervals (rows) and subintervals (columns).
+        A pandas DataFrame representing the time grid with track segments hashed into
+        intervals (rows) and subintervals (columns).
+        Empty subintervals hold EMPTY_SUBINTERVAL (0).
     """
-    all_tracks = []
     track = Track(fcol.geoshapes)
     num_intervals = math.ceil(time_interval / time_subinterval)
     columns = [f"Period_{i+1}" for i in range(num_intervals)]
     interval_list = extract_intervals_in_range(track.start, track.end, time_interval)
-    track_list = break_time_interval(track,interval_list, time_interval)
-
-    for tr, interval in zip(track_list, interval_list):
-        time_list = create_time_list_from_datetimes(interval, num_intervals+1, time_subinterval)
-        interval_tracks = []
-        for i in range(len(time_list) - 1):
-            current_time = time_list[i] - timedelta(microseconds=1)
-            next_time = time_list[i + 1] - timedelta(microseconds=1)
-            subinterval_track = tr.filter_by_dt(TimeInterval(current_time,next_time))
-            if len(subinterval_track) > 0:
-                point = subinterval_track.centroid
-                hash_value = list(hash_func([point]).keys())[0]
-                if integerize:
-                    interval_tracks.append(int(hash_value, 16))
-                else:
-                    interval_tracks.append(hash_value)
-            else:
-                interval_tracks.append(0)
-        all_tracks.append(interval_tracks)
-
-    time_grid = pd.DataFrame(all_tracks, columns=columns)
+    kept, rows = _interval_rows(track.geoshapes, interval_list, time_interval)
+
+    shared = (
+        [track.geoshapes[pos] for pos in kept], rows,
+        subinterval_windows(interval_list, num_intervals, time_subinterval),
+        interval_list[0].tzinfo, hash_func, integerize
+    )
+    parts = _interval_parts(rows, len(interval_list), partition_count(n_jobs, executor))
+    grid = np.full(
+        len(interval_list) * num_intervals, EMPTY_SUBINTERVAL,
+        dtype=np.uint64 if integerize else object
+    )
+    for cells, hashes in map_partitions(_grid_partition, shared, parts, n_jobs, executor, split=2):
+        grid[cells] = hashes
+    grid = grid.reshape(len(interval_list), num_intervals)
+
+    if sparse:
+        # built column by column; astype to a sparse dtype goes through float64
+        time_grid = pd.DataFrame({
+            column: pd.arrays.SparseArray(grid[:, i], fill_value=grid.dtype.type(EMPTY_SUBINTERVAL))
+            for i, column in enumerate(columns)
+        })
+    else:
+        time_grid = pd.DataFrame(grid, columns=columns)
+    if not (sparse or integerize):
+        # periods that are empty throughout become integer columns
+        time_grid = time_grid.infer_objects()
     time_grid['interval_start'] = interval_list
     return time_grid
+
+
+def convert_time_grid_batch(fcol: FeatureCollection,
+                            time_interval: timedelta,
+                            time_subinterval: timedelta,
+                            hash_func: Callable,
+                            entity_key: str,
+                            n_jobs: Optional[int] = None,
+                            executor: Optional[Executor] = None):
+    """
+    Converts the tracks of many entities into one integerized time grid
+    tensor. Shapes are grouped into tracks by an entity property and every
+    entity shares the same interval start times. The tensor is allocated once
+    and filled from partitions of entities, which can run in parallel.
+
+    Args:
+        fcol: The geostructures FeatureCollection holding the shapes of every entity.
+        time_interval: A timedelta object representing the primary interval to partition the tracks.
+        time_subinterval: A timedelta object representing the subinterval.
+        hash_func: A callable function used to hash coordinates of track centroids.
+            Must use hash_coordinates
+        entity_key: The shape property identifying the entity of each shape.
+        n_jobs: The number of worker processes hashing ranges of entities in parallel;
+            -1 uses every core.
+        executor: A concurrent.futures Executor to run the hashing on.
+
+    Returns:
+        A tuple of (tensor, entities, interval starts). The tensor is a uint64 array
+        of shape (entity, interval, subinterval) holding integerized hashes, with
+        EMPTY_SUBINTERVAL (0) for empty subintervals. Entities are in order of first appearance.
+    """
+    entities, groups = group_shapes(fcol, entity_key)
+    track = Track(fcol.geoshapes)
+    num_intervals = math.ceil(time_interval / time_subinterval)
+    interval_list = extract_intervals_in_range(track.start, track.end, time_interval)
+    tensor = np.full(
+        (len(entities), len(interval_list), num_intervals), EMPTY_SUBINTERVAL, dtype=np.uint64
+    )
+
+    windows = subinterval_windows(interval_list, num_intervals, time_subinterval)
+    shared = (groups, interval_list, time_interval, windows, hash_func)
+    parts = partition_ranges(len(entities), partition_count(n_jobs, executor))
+    flat = tensor.reshape(-1)
+    for part, (cells, hashes) in zip(
+        parts, map_partitions(_batch_partition, shared, parts, n_jobs, executor)
+    ):
+        flat[part.start * len(interval_list) * num_intervals + cells] = hashes
+
+    return tensor, entities, interval_list
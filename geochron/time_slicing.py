@@ -1,15 +1,35 @@
 """ Functions needed to slice tracks by time"""
 from datetime import  timedelta
-from typing import List
+from typing import List, Tuple, Union
+import numpy as np
+import pandas as pd
 from geostructures.collections import  Track
+from geochron.intervals import interval_ends, local_datetime64, to_datetime64, to_datetimes
 
 
 
+def track_time_bounds(track: Track) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pulls the start and end times of every shape in a Track into two
+    datetime64 arrays. Tracks are sorted by start time, so the start
+    array is sorted as well.
+
+    Args:
+        track: the target geostructures Track
+
+    Returns:
+        A tuple of (start times, end times) arrays
+    """
+    starts = to_datetime64(shape.start for shape in track.geoshapes)
+    ends = to_datetime64(shape.end for shape in track.geoshapes)
+    return starts, ends
+
+
 def get_timestamp_intervals(track: Track, time_delta: timedelta):
     """
     gets the timestamps for a Track partitioned by a specified length
-    of time   
-    
+    of time
+
     Args:
         track: the target geostructures Track
 
@@ -19,27 +39,83 @@ def get_timestamp_intervals(track: Track, time_delta: timedelta):
         A list of timestamps starting from an interval from the start
     """
     start_time = track.start
-    end_time = track.end
-    timestamps = []
+    timestamps = interval_ends(start_time, track.end, time_delta)
+
+    return to_datetimes(timestamps, start_time.tzinfo)
+
+
+def bucket_track(track: Track, timestamps: Union[List, np.ndarray]) -> np.ndarray:
+    """
+    Assigns every shape of a Track to the interval it falls in, in a single
+    searchsorted pass. Interval i spans [timestamps[i-1], timestamps[i]) with
+    the first interval starting at the start of the track, matching the
+    semantics of time_slice_track. Shapes whose time span crosses an interval
+    boundary, or that fall after the last timestamp, are assigned -1.
+
+    Args:
+        track: the target geostructures Track
+
+        timestamps: a list or datetime64 array of interval end timestamps
+
+    Returns:
+        An integer array holding the interval index of each shape
+    """
+    if not track.geoshapes:
+        return np.empty(0, dtype=np.int64)
 
-    # get timestamp intervals
-    date_x = start_time
-    while date_x < end_time:
-        date_x += time_delta
-        timestamps.append(date_x)
-    if timestamps:
-    # change the last value to be inclusive
-        timestamps[-1] = timestamps[-1] + timedelta(seconds=1)
+    edges = to_datetime64(timestamps)
+    starts, ends = track_time_bounds(track)
+    buckets = np.searchsorted(edges, starts, side='right')
+    end_buckets = np.searchsorted(edges, ends, side='right')
+    buckets[(buckets != end_buckets) | (buckets >= len(edges))] = -1
 
+    return buckets.astype(np.int64)
 
-    return timestamps
+
+def bucket_offsets(buckets: np.ndarray, n_intervals: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Groups the output of bucket_track into index ranges. The shapes of
+    interval i are the shapes at positions[offsets[i]:offsets[i+1]].
+
+    Args:
+        buckets: the interval index of each shape, as produced by bucket_track
+
+        n_intervals: the total number of intervals
+
+    Returns:
+        A tuple of (positions, offsets) arrays
+    """
+    positions = np.flatnonzero(buckets >= 0)
+    # Tracks are sorted by start time, so the retained buckets are non-decreasing
+    offsets = np.searchsorted(buckets[positions], np.arange(n_intervals + 1), side='left')
+    return positions, offsets
+
+
+def interval_labels(start_time, timestamps: Union[List, np.ndarray]) -> List[str]:
+    """
+    Formats the intervals defined by a start time and a list of interval
+    end timestamps as "start, end" strings, in the timezone of the start
+    time.
+
+    Args:
+        start_time: the start of the first interval
+
+        timestamps: a list of interval end timestamps
+
+    Returns:
+        A list of interval strings
+    """
+    edges = pd.DatetimeIndex(local_datetime64(
+        np.concatenate([to_datetime64([start_time]), to_datetime64(timestamps)]), start_time.tzinfo
+    )).strftime("%Y-%m-%d %H:%M:%S")
+    return list(edges[:-1] + ", " + edges[1:])
 
 
 def time_slice_track(track: Track, timestamps: List):
     """
     Slices a Track into several tracks that are partitioned by a list
-    of time stamps  
-    
+    of time stamps
+
     Args:
         track: the target geostructures Track
 
@@ -48,13 +124,11 @@ def time_slice_track(track: Track, timestamps: List):
     Returns:
         A list of tracks
     """
-    start_time = track.start
-    sliced_tracks = []
-
-
-    for timestamp in timestamps:
-        sliced_track = track[start_time: timestamp]
-        start_time = timestamp
-        sliced_tracks.append(sliced_track)
+    buckets = bucket_track(track, timestamps)
+    positions, offsets = bucket_offsets(buckets, len(timestamps))
+    geoshapes = track.geoshapes
 
-    return sliced_tracks
+    return [
+        Track([geoshapes[pos] for pos in positions[begin:end]])
+        for begin, end in zip(offsets[:-1], offsets[1:])
+    ]
@@ -0,0 +1,162 @@
+""" Vectorized timehash encoding, bit compatible with the timehash package"""
+from typing import List
+import numpy as np
+
+TIMEHASH_ALPHABET = np.array(list('01abcdef'))
+# January 1, 1970 to January 1, 2098 in epoch seconds
+TIMEHASH_SPAN = (0.0, 4039372800.0)
+TIMEHASH_BITS = 3
+
+
+def _decode_prefix(prefix: str) -> int:
+    """
+    Converts a timehash into its integer cell code.
+
+    Args:
+        prefix: a timehash of any precision
+
+    Returns:
+        The integer code of the timehash
+    """
+    code = 0
+    for char in prefix:
+        code = (code << TIMEHASH_BITS) | '01abcdef'.index(char)
+    return code
+
+
+def cover_timehashes(start_seconds: float, end_seconds: float, precision: int) -> List[str]:
+    """
+    Covers a time interval with the minimal set of mixed precision timehash
+    prefixes, the way a geohash cover describes a polygon. Together the
+    prefixes hold exactly the timehashes of the given precision from the one
+    containing the start to the one containing the end, and none overlap.
+
+    Args:
+        start_seconds: the start of the interval in epoch seconds
+
+        end_seconds: the end of the interval in epoch seconds
+
+        precision: the finest precision of the cover
+
+    Returns:
+        A list of timehash prefixes in time order
+    """
+    first, last = timehash_codes([start_seconds, end_seconds], precision).tolist()
+    prefixes = []
+    while first <= last:
+        # grow the block while it stays aligned and inside the interval
+        level = 0
+        while (level < precision - 1 and first % (1 << TIMEHASH_BITS * (level + 1)) == 0
+               and first + (1 << TIMEHASH_BITS * (level + 1)) - 1 <= last):
+            level += 1
+        prefixes.append(
+            format_timehashes(np.array([first >> TIMEHASH_BITS * level]), precision - level)[0]
+        )
+        first += 1 << TIMEHASH_BITS * level
+
+    return [str(prefix) for prefix in prefixes]
+
+
+def encode_timehashes(seconds, precision: int = 10) -> np.ndarray:
+    """
+    Encodes an array of epoch seconds into timehashes in one pass. Each
+    character halves the time span three times, comparing every time
+    against the midpoint exactly like timehash.encode, so the results match
+    it character for character.
+
+    Args:
+        seconds: an array (or scalar) of floating point epoch seconds
+
+        precision: the number of characters of each timehash
+
+    Returns:
+        A numpy string array of timehashes with the shape of seconds
+    """
+    return format_timehashes(timehash_codes(seconds, precision), precision)
+
+
+def expand_timehash(prefix: str, precision: int) -> np.ndarray:
+    """
+    Lists every timehash of a given precision starting with a prefix.
+
+    Args:
+        prefix: a timehash prefix
+
+        precision: the precision of the expanded timehashes, at least the
+        length of the prefix
+
+    Returns:
+        A numpy string array of timehashes in time order
+    """
+    depth = TIMEHASH_BITS * (precision - len(prefix))
+    codes = (_decode_prefix(prefix) << depth) + np.arange(1 << depth, dtype=np.int64)
+    return format_timehashes(codes, precision)
+
+
+def format_timehashes(codes: np.ndarray, precision: int) -> np.ndarray:
+    """
+    Formats integer timehash codes as timehash strings.
+
+    Args:
+        codes: an integer array of timehash codes
+
+        precision: the number of characters of each timehash
+
+    Returns:
+        A numpy string array of timehashes with the shape of codes
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    if precision < 1:
+        return np.full(codes.shape, '')
+
+    shifts = TIMEHASH_BITS * np.arange(precision - 1, -1, -1)
+    digits = (codes[..., np.newaxis] >> shifts) & ((1 << TIMEHASH_BITS) - 1)
+    chars = np.ascontiguousarray(TIMEHASH_ALPHABET[digits])
+
+    return chars.view(f'<U{precision}').reshape(codes.shape)
+
+
+def timehash_codes(seconds, precision: int = 10) -> np.ndarray:
+    """
+    Computes the integer code of the timehash of every epoch second: the
+    index of its timehash among all timehashes of the same precision.
+
+    Args:
+        seconds: an array (or scalar) of floating point epoch seconds
+
+        precision: the precision of the timehashes, at most 21
+
+    Returns:
+        An integer array with the shape of seconds
+    """
+    times = np.asarray(seconds, dtype=np.float64)
+    low = np.full(times.shape, TIMEHASH_SPAN[0])
+    high = np.full(times.shape, TIMEHASH_SPAN[1])
+    codes = np.zeros(times.shape, dtype=np.int64)
+
+    for _ in range(TIMEHASH_BITS * max(precision, 0)):
+        mid = (low + high) / 2
+        above = times > mid
+        low = np.where(above, mid, low)
+        high = np.where(above, high, mid)
+        codes = codes * 2 + above
+
+    return codes
+
+
+def timehash_start_seconds(timehashes) -> np.ndarray:
+    """
+    Decodes timehashes into the epoch seconds at which they start.
+
+    Args:
+        timehashes: an iterable of timehashes of any precision
+
+    Returns:
+        A float array of epoch seconds
+    """
+    timehashes = list(timehashes)
+    codes = np.array([_decode_prefix(timehash) for timehash in timehashes], dtype=np.float64)
+    widths = (TIMEHASH_SPAN[1] - TIMEHASH_SPAN[0]) / 8.0 ** np.array(
+        [len(timehash) for timehash in timehashes], dtype=np.float64
+    )
+    return TIMEHASH_SPAN[0] + codes * widths
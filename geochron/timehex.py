@@ -1,14 +1,40 @@
 """ Representation as time hexes """
+from concurrent.futures import Executor
 from datetime import  timedelta
-from typing import Callable, List
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import numpy as np
 import pandas as pd
 from geostructures.collections import FeatureCollection, Track
-from geochron.time_slicing import get_timestamp_intervals, time_slice_track
+from geochron.columnar import hash_by_interval, hash_points_by_interval, point_columns
+from geochron.fleet import FleetCells, hash_fleet_by_interval, split_fleet
+from geochron.hashing import hash_items, hash_shapes_by_interval, merge_cell_tables
+from geochron.intervals import (
+    floor_datetime64, interval_bounds, iter_interval_ends, local_datetime64, to_datetime64,
+    utc_datetime64
+)
+from geochron.time_slicing import interval_labels, track_time_bounds
 
+TIMEHEX_LAYOUTS = ('wide', 'long')
 
 
 
 
+def _interval_edges(start_time, timestamps: Union[List, np.ndarray]) -> np.ndarray:
+    """
+    Computes the edges of the intervals as wall clock times in the timezone
+    of the start time, to the second like the interval labels.
+
+    Args:
+        start_time: the start of the first interval
+
+        timestamps: a list or datetime64 array of interval end timestamps
+
+    Returns:
+        A numpy datetime64[ns] array with one more edge than there are intervals
+    """
+    edges = np.concatenate([to_datetime64([start_time]), to_datetime64(timestamps)])
+    return floor_datetime64(local_datetime64(edges, start_time.tzinfo), timedelta(seconds=1))
+
 def hash_tracks_into_timehexdf(track_list: List, timestamps: List, hash_func: Callable):
     """
     Converts a list of tracks into a pandas dataframe using
@@ -25,32 +51,188 @@ def hash_tracks_into_timehexdf(track_list: List, timestamps: List, hash_func: Ca
     Returns:
         A pandas dataframe
     """
-    interval_start = track_list[0].start
-    row_list = []
-    for track,timestamp  in zip(track_list, timestamps):
+    intervals, cells, counts = [], [], []
+    for interval, track in enumerate(track_list[:len(timestamps)]):
         hashmap = hash_func(track)
-        start_string= interval_start.strftime("%Y-%m-%d %H:%M:%S")
-        end_string= timestamp.strftime("%Y-%m-%d %H:%M:%S")
-        interval = start_string + ", " + end_string
-        new_row = pd.Series(data=hashmap, name=interval)
-        row_list.append(new_row)
-        interval_start = timestamp
+        intervals.extend([interval] * len(hashmap))
+        cells.extend(hashmap.keys())
+        counts.extend(hashmap.values())
+
+    table = pd.DataFrame({'interval': intervals, 'cell': cells, 'count': counts})
+    return counts_into_timehexdf(table, track_list[0].start, timestamps[:len(track_list)])
+
+def counts_into_timehexdf(counts: pd.DataFrame, start_time, timestamps: Union[List, np.ndarray],
+     sparse: bool = False):
+    """
+    Converts per interval cell counts into a timehex pandas dataframe
+    with one row per interval and one column per cell
+
+    Args:
+        counts: a pandas dataframe with the columns interval, cell and count
 
-    df = pd.DataFrame(row_list)
+        start_time: the start of the first interval
 
-    df = df.reset_index(names='interval')
+        timestamps: a list or datetime64 array of interval end timestamps
 
-    split_df = df['interval'].str.split(',', expand=True)# pylint: disable=unsubscriptable-object
-    df.loc[:, 'start_time'] = pd.to_datetime(split_df[0])
-    df.loc[:, 'end_time'] = pd.to_datetime(split_df[1])
+        sparse: whether to store the cell columns as pandas sparse columns
+        built from a scipy sparse matrix, where empty cells are 0, instead of
+        dense columns where empty cells are NaN
+
+    Returns:
+        A pandas dataframe
+    """
+    edges = _interval_edges(start_time, timestamps)
+    codes, cells = pd.factorize(counts['cell'])
+    rows = counts['interval'].to_numpy()
+
+    if sparse:
+        # pylint: disable=import-outside-toplevel
+        from scipy.sparse import csc_matrix # type: ignore
+
+        matrix = csc_matrix(
+            (counts['count'].to_numpy(dtype=np.int64), (rows, codes)),
+            shape=(len(edges) - 1, len(cells))
+        )
+        df = pd.DataFrame.sparse.from_spmatrix(matrix, columns=cells)
+    else:
+        values = np.full((len(edges) - 1, len(cells)), np.nan)
+        values[rows, codes] = counts['count'].to_numpy()
+        df = pd.DataFrame(values, columns=cells)
+        filled = df.columns[df.notna().all()]
+        df[filled] = df[filled].astype('int64')
+
+    df.insert(0, 'interval', interval_labels(start_time, timestamps))
+    df['start_time'] = edges[:-1]
+    df['end_time'] = edges[1:]
 
     return df
 
-def convert_timehex(fcol: FeatureCollection, time_delta: timedelta, hash_func: Callable):
+def counts_into_timehex_long(counts: pd.DataFrame, start_time, timestamps):
+    """
+    Converts per interval cell counts into a long timehex pandas dataframe
+    with one row per interval and cell that has hits
+
+    Args:
+        counts: a pandas dataframe with the columns interval, cell and count
+
+        start_time: the start of the first interval
+
+        timestamps: a list of interval end timestamps
+
+    Returns:
+        A pandas dataframe with the columns interval_start, interval_end, cell
+        (categorical) and count
+    """
+    edges = _interval_edges(start_time, timestamps)
+    intervals = counts['interval'].to_numpy()
+
+    return pd.DataFrame({
+        'interval_start': edges[intervals],
+        'interval_end': edges[intervals + 1],
+        'cell': counts['cell'].astype('category').array,
+        'count': counts['count'].to_numpy(dtype=np.int64)
+    })
+
+def _fleet_timehex_long(fleet: FleetCells, time_delta: timedelta):
+    """
+    Converts the cell table of a fleet into one long timehex pandas dataframe,
+    with the entity of every row in a leading column.
+
+    Args:
+        fleet: a FleetCells tuple
+
+        time_delta: the interval the fleet was bucketed with
+
+    Returns:
+        A pandas dataframe with the columns entity, interval_start,
+        interval_end, cell (categorical) and count
+    """
+    step = np.timedelta64(time_delta).astype('timedelta64[ns]')
+    intervals = fleet.cells['interval'].to_numpy()
+    codes = np.searchsorted(fleet.offsets, intervals, side='right') - 1
+    # interval i of an entity spans [start + i * step, start + (i + 1) * step)
+    # apart from the last one, which ends at the same time as the entity
+    within = intervals - fleet.offsets[codes]
+    edges = fleet.starts[codes] + step * within
+    last = within + 1 == np.diff(fleet.offsets)[codes]
+    ends = np.where(last, edges + step + np.timedelta64(1, 's'), edges + step)
+
+    return pd.DataFrame({
+        'entity': np.asarray(fleet.entities, dtype=object)[codes],
+        'interval_start': floor_datetime64(edges, timedelta(seconds=1)),
+        'interval_end': floor_datetime64(ends, timedelta(seconds=1)),
+        'cell': fleet.cells['cell'].astype('category').array,
+        'count': fleet.cells['count'].to_numpy(dtype=np.int64)
+    })
+
+def convert_timehex(fcol: Union[FeatureCollection, pd.DataFrame], time_delta: timedelta,
+     hash_func: Callable, n_jobs: Optional[int] = None, executor: Optional[Executor] = None,
+     sparse: bool = False, layout: str = 'wide', entity_key: Optional[str] = None):
     """
     Converts a FeatureCollection into a timehex representation with a specified time interval
     using a specified hashing function
     
+    Args:
+        fcol: a FeatureCollection with time bound shapes, or a pandas
+        dataframe of points with the columns lat, lon and timestamp
+
+        time_delta: the desired time interval
+
+        hash_func: the hashing function
+
+        n_jobs: the number of worker processes hashing consecutive time ranges
+        in parallel; -1 uses every core
+
+        executor: a concurrent.futures Executor to run the hashing on
+
+        sparse: whether to return the cell columns as pandas sparse columns,
+        where empty cells are 0 instead of NaN; requires scipy
+
+        layout: 'wide' for one row per interval and one column per cell, or
+        'long' for one (interval_start, interval_end, cell, count) row per
+        interval and cell with hits
+
+        entity_key: the shape property, or the dataframe column, identifying
+        the entity of each shape; each entity is sliced into intervals from
+        its own start
+
+    Returns:
+        A pandas dataframe; with entity_key, a dict of the wide dataframe of
+        each entity in order of first appearance, or a single long dataframe
+        with a leading entity column
+    """
+    if layout not in TIMEHEX_LAYOUTS:
+        raise ValueError(f"layout must be one of {TIMEHEX_LAYOUTS}, not {layout!r}")
+    if sparse and layout == 'long':
+        raise ValueError("sparse only applies to the wide layout")
+
+    if entity_key is not None:
+        fleet = hash_fleet_by_interval(fcol, time_delta, hash_func, entity_key, n_jobs, executor)
+        if layout == 'long':
+            return _fleet_timehex_long(fleet, time_delta)
+        return {
+            entity: counts_into_timehexdf(counts, start_time, timestamps, sparse)
+            for entity, start_time, timestamps, counts in split_fleet(fleet, time_delta)
+        }
+
+    intervals, counts = hash_by_interval(fcol, time_delta, hash_func, n_jobs, executor)
+    start_time, timestamps = interval_bounds(intervals)
+
+    if layout == 'long':
+        return counts_into_timehex_long(counts, start_time, timestamps)
+
+    timehex_df = counts_into_timehexdf(counts, start_time, timestamps, sparse)
+
+
+    return timehex_df
+
+def iter_timehex(fcol: FeatureCollection, time_delta: timedelta,
+     hash_func: Callable) -> Iterator[Tuple[pd.Timestamp, pd.Timestamp, Dict]]:
+    """
+    Lazily converts a FeatureCollection into timehex counts, one interval at
+    a time. The intervals match the rows of convert_timehex, but only the
+    shapes and hits of the interval being yielded are held at once.
+
     Args:
         fcol: a FeatureCollection with time bound shapes
 
@@ -59,15 +241,148 @@ def convert_timehex(fcol: FeatureCollection, time_delta: timedelta, hash_func: C
         hash_func: the hashing function
 
     Returns:
-        A pandas dataframe
+        A generator of (interval_start, interval_end, {cell: count}) tuples in
+        time order, with an empty dict for intervals without hits
     """
     track = Track(fcol.geoshapes)
+    if not track.geoshapes:
+        return
 
-    timestamps = get_timestamp_intervals(track, time_delta)
+    shapes = track.geoshapes
+    cursor = 0
+    begin = _interval_edges(track.start, [])[0]
+    for end in iter_interval_ends(track.start, track.end, time_delta):
+        # the track is sorted, so the shapes of each interval are the next run
+        # starting before its end; shapes crossing that end are dropped
+        inside = []
+        while cursor < len(shapes) and utc_datetime64(shapes[cursor].start) < end:
+            if utc_datetime64(shapes[cursor].end) < end:
+                inside.append(shapes[cursor])
+            cursor += 1
 
-    track_list = time_slice_track(track, timestamps)
+        hashmap: Dict = {}
+        if inside:
+            _, cells = hash_items(inside, hash_func, wrap=Track)
+            for cell in cells.tolist():
+                hashmap[cell] = hashmap.get(cell, 0) + 1
 
-    timehex_df = hash_tracks_into_timehexdf(track_list, timestamps, hash_func)
+        edge = _interval_edges(track.start, [end])[1]
+        yield pd.Timestamp(begin), pd.Timestamp(edge), hashmap
+        begin = edge
 
 
-    return timehex_df
+def _chunk_cell_table(chunk: Union[FeatureCollection, pd.DataFrame],
+     origin: Optional[np.datetime64], step: np.timedelta64, hash_func: Callable) -> Optional[Tuple]:
+    """
+    Assigns the shapes of one chunk to intervals of a fixed length from an
+    origin, dropping shapes that straddle an interval boundary as
+    ChronnetBuilder does, and counts the hits per cell for each interval.
+
+    Args:
+        chunk: a FeatureCollection, or a pandas dataframe of points with the
+        columns lat, lon and timestamp
+
+        origin: the start of the first interval, or None to anchor the
+        intervals on the start of this chunk
+
+        step: the interval length as a numpy timedelta64
+
+        hash_func: the hashing function
+
+    Returns:
+        A tuple of (origin, first start, last start, cell table), or None for
+        an empty chunk
+    """
+    if isinstance(chunk, pd.DataFrame):
+        lat, lon, starts = point_columns(chunk)
+        ends = starts
+    else:
+        track = Track(chunk.geoshapes)
+        starts, ends = track_time_bounds(track)
+    if not starts.size:
+        return None
+
+    origin = starts.min() if origin is None else origin
+    buckets = (starts - origin) // step
+    buckets[buckets != (ends - origin) // step] = -1
+    if isinstance(chunk, pd.DataFrame):
+        table = hash_points_by_interval(lat, lon, buckets, hash_func)
+    else:
+        table = hash_shapes_by_interval(track.geoshapes, buckets, hash_func)
+
+    return origin, starts.min(), starts.max(), table
+
+
+def _chunk_timehex_long(table: pd.DataFrame, origin: np.datetime64, step: np.timedelta64):
+    """
+    Converts a cell table with intervals counted from an origin into a long
+    timehex pandas dataframe.
+
+    Args:
+        table: a pandas dataframe with the columns interval, cell and count
+
+        origin: the start of the first interval
+
+        step: the interval length as a numpy timedelta64
+
+    Returns:
+        A pandas dataframe with the columns interval_start, interval_end, cell
+        (categorical) and count
+    """
+    edges = origin + step * table['interval'].to_numpy()
+    cells = table['cell'].to_numpy(dtype=object)
+
+    return pd.DataFrame({
+        'interval_start': floor_datetime64(edges, timedelta(seconds=1)),
+        'interval_end': floor_datetime64(edges + step, timedelta(seconds=1)),
+        'cell': pd.Categorical(cells, categories=pd.unique(cells)),
+        'count': table['count'].to_numpy(dtype=np.int64)
+    })
+
+
+def iter_timehex_chunks(chunks: Iterable, time_delta: timedelta,
+     hash_func: Callable) -> Iterator[pd.DataFrame]:
+    """
+    Converts time-ordered chunks of features into long timehex frames
+    incrementally. Intervals are anchored on the start of the first chunk,
+    as in ChronnetBuilder, and every interval lasts exactly time_delta. Each
+    yielded frame holds the intervals no later chunk can add to; the open
+    last interval is carried across chunk boundaries, so only one chunk and
+    the counts of one interval are held at once.
+
+    Args:
+        chunks: an iterable of FeatureCollections, or of pandas dataframes of
+        points with the columns lat, lon and timestamp; no shape may start
+        before the last shape of the previous chunk
+
+        time_delta: the desired time interval
+
+        hash_func: the hashing function
+
+    Returns:
+        A generator of pandas dataframes with the columns interval_start,
+        interval_end, cell (categorical) and count, in time order
+    """
+    step = np.timedelta64(time_delta).astype('timedelta64[ns]')
+    origin, last_start = None, None
+    carried = None
+
+    for chunk in chunks:
+        counted = _chunk_cell_table(chunk, origin, step, hash_func)
+        if counted is None:
+            continue
+        origin, first_start, chunk_last_start, table = counted
+        if last_start is not None and first_start < last_start:
+            raise ValueError('Chunks must be added in time order.')
+        last_start = chunk_last_start
+
+        if carried is not None:
+            table = merge_cell_tables([carried, table])
+        # later shapes start no earlier than this chunk's last start
+        closed = table['interval'].to_numpy() < (last_start - origin) // step
+        carried = table[~closed]
+        if closed.any():
+            yield _chunk_timehex_long(table[closed], origin, step)
+
+    if origin is not None and carried is not None and not carried.empty:
+        yield _chunk_timehex_long(carried, origin, step)
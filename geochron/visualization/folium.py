@@ -7,18 +7,42 @@ from branca.colormap import LinearColormap
 from geostructures.geohash import h3_to_geopolygon
 from geostructures import FeatureCollection
 
-def timehex_styledict(timehex: pd.DataFrame, opacity= float(.7), cmap:Optional[Callable] = None):
+def _is_long_timehex(timehex: pd.DataFrame) -> bool:
     """
-    Creates a styledict appropriate for a folium TimeSliderChoropleth from
-    a timehex dataframe
+    Checks whether a timehex dataframe uses the long layout of
+    convert_timehex(..., layout="long")
 
     Args:
-        timehex: A timehex pandas dataframe 
+        timehex: A timehex pandas dataframe
 
     Returns:
-        A style dictionary suitable to use with folium's 
-        TimeSliderChoropleth
+        A boolean
+    """
+    return {'interval_start', 'cell', 'count'}.issubset(timehex.columns)
+
+def _timehex_records(timehex: pd.DataFrame) -> pd.DataFrame:
     """
+    Lists the value of every hex at every start time of a timehex dataframe,
+    with 0 for hexes without hits. Wide timehexes are melted; long timehexes
+    are completed directly, so intervals without any hits are left out.
+
+    Args:
+        timehex: A timehex pandas dataframe in the wide or long layout
+
+    Returns:
+        A pandas dataframe with the columns time (epoch seconds), id and value
+    """
+    if _is_long_timehex(timehex):
+        ids = timehex['cell'].astype(str).to_numpy()
+        times = timehex['interval_start'].astype("int64").to_numpy() // 10 ** 9
+        values = pd.Series(
+            timehex['count'].to_numpy(), index=pd.MultiIndex.from_arrays([ids, times])
+        )
+        complete = pd.MultiIndex.from_product(
+            [pd.unique(ids), pd.unique(times)], names=['id', 'time']
+        )
+        return values.reindex(complete, fill_value=0).reset_index(name='value')
+
     timehex_duplicate = timehex.copy()
     timehex_duplicate['time'] = timehex_duplicate['start_time'].astype("int64") // 10 ** 9
 
@@ -26,7 +50,21 @@ def timehex_styledict(timehex: pd.DataFrame, opacity= float(.7), cmap:Optional[C
 
     timehex_long = select_timehex.melt(id_vars='time', var_name='id', value_name='value')
 
-    timehex_long = timehex_long.fillna(0)
+    return timehex_long.fillna(0)
+
+def timehex_styledict(timehex: pd.DataFrame, opacity= float(.7), cmap:Optional[Callable] = None):
+    """
+    Creates a styledict appropriate for a folium TimeSliderChoropleth from
+    a timehex dataframe
+
+    Args:
+        timehex: A timehex pandas dataframe, in the wide or long layout
+
+    Returns:
+        A style dictionary suitable to use with folium's 
+        TimeSliderChoropleth
+    """
+    timehex_long = _timehex_records(timehex)
 
     #color scale
     max_color = max(timehex_long['value'])
@@ -96,13 +134,21 @@ def timehex_backgroundata(timehex: pd.DataFrame):
     a timehex dataframe
 
     Args:
-        timehex: A timehex dataframe
+        timehex: A timehex dataframe, in the wide or long layout
 
     Returns:
         a GeoJson FeatureCollection
     """
-    select_timehex = timehex.drop(['interval', 'start_time', 'end_time'], axis=1)
-    hashmap = select_timehex.to_dict()
+    if _is_long_timehex(timehex):
+        hashmap: dict = {}
+        for cell, start_time, count in zip(
+            timehex['cell'].astype(str), timehex['interval_start'].astype(str),
+            timehex['count'].tolist()
+        ):
+            hashmap.setdefault(cell, {})[start_time] = count
+    else:
+        select_timehex = timehex.drop(['interval', 'start_time', 'end_time'], axis=1)
+        hashmap = select_timehex.to_dict()
     backgroundata = h3_to_geojson(hashmap)
 
     return backgroundata
@@ -189,16 +235,23 @@ def timehex_timestampedgeojson(timehex: pd.DataFrame, opacity: Union[float, str]
     Formats a timehex into the correct data format for Folium's timestampedgeojson
 
     Args:
-        timehex: A timehex dataframe
+        timehex: A timehex dataframe, in the wide or long layout
         opacity: desired opacity of shapes takes key word gradient
         to vary opacity based on weight of shape in the time period
         cmap: a Branca colormap or a list of colors 
     Returns:
         a GeoJson FeatureCollection
     """
-    start_time_list = timehex['start_time'].tolist()
-    select_timehex = timehex.drop(['interval', 'start_time', 'end_time'], axis=1).fillna(0)
-    list_hashmaps = select_timehex.to_dict('records')
+    if _is_long_timehex(timehex):
+        groups = timehex.groupby('interval_start', sort=True)
+        start_time_list = list(groups.groups)
+        list_hashmaps = [
+            dict(zip(group['cell'].astype(str), group['count'].tolist())) for _, group in groups
+        ]
+    else:
+        start_time_list = timehex['start_time'].tolist()
+        select_timehex = timehex.drop(['interval', 'start_time', 'end_time'], axis=1).fillna(0)
+        list_hashmaps = select_timehex.to_dict('records')
     polygon_list:list = []
 
     for hashmap, start_time in zip(list_hashmaps, start_time_list):
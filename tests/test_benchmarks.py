@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+from benchmarks.run import CASES, main, measure, run_benchmarks
+from benchmarks.synthetic import interval_shapes, make_dataset, random_walk_points, stationary_points
+
+def test_synthetic_datasets():
+    walk = random_walk_points(200, n_tracks=4)
+
+    assert list(walk.columns) == ['lat', 'lon', 'timestamp', 'track_id']
+    assert walk['timestamp'].is_monotonic_increasing
+    assert walk['track_id'].nunique() == 4
+    pd.testing.assert_frame_equal(walk, random_walk_points(200, n_tracks=4))
+    assert not walk.equals(random_walk_points(200, n_tracks=4, seed=1))
+
+    sensors = stationary_points(200, n_sensors=5)
+    assert len(sensors[['lat', 'lon']].drop_duplicates()) <= 5
+
+    shapes = interval_shapes(20).geoshapes
+    assert len(shapes) == 20
+    assert all(shape.end > shape.start for shape in shapes)
+
+    with pytest.raises(ValueError):
+        make_dataset('clusters', 10)
+
+def test_run_benchmarks(tmp_path):
+    seconds, peak = measure(sum, [1, 2, 3], repeat=2)
+    assert seconds >= 0 and peak >= 0
+    assert measure(sum, [1, 2, 3], memory=False)[1] is None
+
+    cases = ['convert_timehex', 'timehex_styledict', 'timehex_backgroundata', 'network_arc_circle']
+    results = run_benchmarks([50], cases=cases, datasets=['random_walk'])
+    assert results[['case', 'size']].values.tolist() == [[case, 50] for case in cases]
+    assert (results['seconds'] > 0).all()
+
+    with pytest.raises(ValueError):
+        run_benchmarks([50], cases=['convert_nothing'])
+
+    output = tmp_path / 'results.csv'
+    main(['--sizes', '50', '--datasets', 'intervals', '--no-memory', '--output', str(output)])
+    assert pd.read_csv(output)['case'].tolist() == list(CASES)
@@ -1,9 +1,13 @@
 import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
 import networkx as nx
 import pandas as pd
-from geochron.chronnet import hash_tracks_into_netdf, chronnet_create, convert_chronnet
-from geostructures import Coordinate, GeoPoint
-from geostructures.collections import  Track
+import pytest
+from geochron.chronnet import hash_tracks_into_netdf, transition_edges, chronnet_create, convert_chronnet, \
+ChronnetBuilder
+from geostructures import Coordinate, GeoCircle, GeoPoint
+from geostructures.time import TimeInterval
+from geostructures.collections import  FeatureCollection, Track
 from geostructures.geohash import H3Hasher
 
 hasher = H3Hasher(resolution = 10)
@@ -31,6 +35,16 @@ def test_hash_tracks_into_netdf():
 
     assert test_df['cell'].values[4] == '8a194ad3078ffff'
 
+def test_transition_edges():
+    cell_table = pd.DataFrame({'interval': [0, 1, 1, 3], 'cell': ['b', 'b', 'a', 'a'],
+    'count': [2, 1, 3, 1]})
+
+    links = transition_edges(cell_table)
+
+    assert links['from'].tolist() == ['a', 'b', 'b']
+    assert links['to'].tolist() == ['a', 'a', 'b']
+    assert links['weight'].tolist() == [3, 7, 2]
+
 def test_chronnet_create():
     test_dict={'cell': {0: '8a194ad32167fff',
     1: '8a194ad32b07fff',
@@ -54,6 +68,21 @@ def test_chronnet_create():
     assert list(nx.selfloop_edges(test_network )) == [('8a194ad3078ffff', '8a194ad3078ffff')]
     assert list(nx.selfloop_edges(no_self_loop)) == []
 
+    cell_table = pd.DataFrame({'interval': [0, 1, 1, 3], 'cell': ['a', 'a', 'b', 'b'],
+    'count': [2, 1, 3, 1]})
+    table_network = chronnet_create(cell_table, True, "directed")
+
+    assert table_network['a']['b']['weight'] == 7
+    assert table_network['b']['b']['weight'] == 3
+    assert table_network.has_edge('b', 'a') == False
+
+    edgelist = chronnet_create(cell_table, False, "undirected", output='edgelist')
+    matrix, nodes = chronnet_create(cell_table, True, "directed", output='csr')
+
+    assert edgelist.values.tolist() == [['a', 'b', 7]]
+    assert list(nodes) == ['a', 'b']
+    assert matrix.toarray().tolist() == [[2, 7], [0, 3]]
+
 def test_convert_chronnet():
     track = Track(
     [
@@ -67,4 +96,77 @@ def test_convert_chronnet():
     test_chronnet = convert_chronnet(track, dt.timedelta(hours=1), hasher.hash_collection, True, "directed")
     
     assert list(test_chronnet)[0] == '8a194ad3056ffff'
-    
+
+    test_edgelist = convert_chronnet(track, dt.timedelta(hours=1), hasher.hash_collection, True, "directed",
+    output='edgelist')
+
+    assert list(test_edgelist.columns) == ['from', 'to', 'weight']
+    assert len(test_edgelist) == test_chronnet.number_of_edges()
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        parallel_edgelist = convert_chronnet(track, dt.timedelta(hours=1), hasher.hash_collection, True,
+        "directed", output='edgelist', executor=executor)
+
+    assert parallel_edgelist.equals(test_edgelist)
+
+def test_convert_chronnet_single_cell():
+    track = Track(
+    [
+        GeoPoint(Coordinate(-0.104154, 51.511920), dt=dt.datetime(2020, 1, 1, 8, 5)),
+        GeoPoint(Coordinate(-0.104154, 51.511920), dt=dt.datetime(2020, 1, 1, 9, 23)),
+    ]
+    )
+
+    for mode in ('directed', 'undirected'):
+        test_chronnet = convert_chronnet(track, dt.timedelta(hours=1), hasher.hash_collection, False, mode)
+
+        assert list(test_chronnet) == ['8a194ad32167fff']
+        assert test_chronnet.number_of_edges() == 0
+
+    single_interval = convert_chronnet(Track(track.geoshapes[:1]), dt.timedelta(hours=1), hasher.hash_collection,
+    True, 'directed')
+
+    assert single_interval.number_of_nodes() == 0
+
+def test_chronnet_builder():
+    points = [
+        GeoPoint(Coordinate(-0.104154, 51.511920), dt=dt.datetime(2020, 1, 1, 8, 5)),
+        GeoPoint(Coordinate(-0.096533, 51.511903), dt=dt.datetime(2020, 1, 1, 9, 23)),
+        GeoPoint(Coordinate(-0.083765, 51.514423), dt=dt.datetime(2020, 1, 1, 9, 44)),
+        GeoPoint(Coordinate(-0.087478, 51.508595), dt=dt.datetime(2020, 1, 1, 10, 5)),
+        GeoPoint(Coordinate(-0.104154, 51.511920), dt=dt.datetime(2020, 1, 1, 11, 5)),
+    ]
+    batch = convert_chronnet(Track(points), dt.timedelta(hours=1), hasher.hash_collection, True, "directed")
+
+    builder = ChronnetBuilder(dt.timedelta(hours=1), hasher.hash_collection)
+    builder.add(FeatureCollection(points[:2])).add(FeatureCollection([]))
+    builder.add_many([FeatureCollection(points[2:3]), FeatureCollection(points[3:])])
+    streamed = builder.result(True, "directed")
+
+    assert list(streamed) == list(batch)
+    assert list(streamed.edges(data=True)) == list(batch.edges(data=True))
+    # the last ping sits exactly on an interval boundary and joins the previous interval
+    assert streamed.has_edge('8a194ad3078ffff', '8a194ad32167fff') == False
+
+    with pytest.raises(ValueError):
+        builder.add(FeatureCollection(points[:1]))
+
+def test_chronnet_builder_boundary():
+    points = [
+        GeoPoint(Coordinate(-0.104154, 51.511920), dt=dt.datetime(2020, 1, 1, 8, 0)),
+        GeoPoint(Coordinate(-0.096533, 51.511903), dt=dt.datetime(2020, 1, 1, 9, 0)),
+        GeoPoint(Coordinate(-0.083765, 51.514423), dt=dt.datetime(2020, 1, 1, 10, 0)),
+    ]
+    batch = convert_chronnet(Track(points), dt.timedelta(hours=1), hasher.hash_collection, True, "directed",
+    output='edgelist')
+
+    builder = ChronnetBuilder(dt.timedelta(hours=1), hasher.hash_collection)
+    # a shape spanning an interval boundary is dropped, as in convert_chronnet
+    builder.add(FeatureCollection([GeoCircle(Coordinate(-0.104154, 51.511920), 100,
+    dt=TimeInterval(dt.datetime(2020, 1, 1, 8, 0), dt.datetime(2020, 1, 1, 9, 30)))]))
+    for point in points:
+        builder.add(FeatureCollection([point]))
+
+    assert builder.result(True, "directed", output='edgelist').equals(batch)
+    assert len(batch) == 2
+
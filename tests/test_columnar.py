@@ -0,0 +1,87 @@
+import datetime as dt
+import numpy as np
+import pandas as pd
+import pytest
+from geochron.columnar import hash_by_interval, hash_points, hash_points_by_interval, point_columns
+from geochron.geotimehash import convert_geotimehash
+from geochron.timehex import convert_timehex
+from geostructures import Coordinate, GeoPoint
+from geostructures.collections import  FeatureCollection, Track
+from geostructures.geohash import H3Hasher, NiemeyerHasher
+
+hasher = H3Hasher(resolution = 10)
+points = pd.DataFrame({
+    'lat': [51.511920, 51.508595, 51.511903, 51.508595],
+    'lon': [-0.104154, -0.087478, -0.096533, -0.087478],
+    'timestamp': [
+        dt.datetime(2020, 1, 1, 9, 23), dt.datetime(2020, 1, 1, 8, 5),
+        dt.datetime(2020, 1, 1, 9, 44), dt.datetime(2020, 1, 1, 10, 5),
+    ]
+})
+fcol = FeatureCollection([
+    GeoPoint(Coordinate(lon, lat), dt=timestamp)
+    for lat, lon, timestamp in points.itertuples(index=False)
+])
+
+def test_point_columns():
+    lat, lon, times = point_columns(points)
+
+    assert lat.tolist() == [51.508595, 51.511920, 51.511903, 51.508595]
+    assert lon.tolist() == [-0.087478, -0.104154, -0.096533, -0.087478]
+    assert times[0] == np.datetime64('2020-01-01T08:05')
+
+    aware = points.assign(timestamp=points['timestamp'].dt.tz_localize('Europe/Paris'))
+    assert point_columns(aware)[2][0] == np.datetime64('2020-01-01T07:05')
+
+    with pytest.raises(ValueError):
+        point_columns(points.rename(columns={'lat': 'latitude'}))
+
+def test_hash_points():
+    lat, lon, _ = point_columns(points)
+    shapes = Track(list(fcol.geoshapes)).geoshapes
+
+    positions, cells = hash_points(lat, lon, hasher.hash_collection)
+
+    assert positions.tolist() == [0, 1, 2, 3]
+    assert cells.tolist() == [hasher.hash_shape(shape).pop() for shape in shapes]
+
+    niemeyer = NiemeyerHasher(8, 32)
+    positions, cells = hash_points(lat, lon, niemeyer.hash_collection)
+
+    assert positions.tolist() == [0, 1, 2, 3]
+    assert cells.tolist() == [niemeyer.hash_shape(shape).pop() for shape in shapes]
+
+    positions, cells = hash_points(lat[:0], lon[:0], hasher.hash_collection)
+    assert positions.tolist() == cells.tolist() == []
+
+def test_hash_by_interval():
+    intervals, cells = hash_by_interval(points, dt.timedelta(hours=1), hasher.hash_collection)
+    track_intervals, track_cells = hash_by_interval(fcol, dt.timedelta(hours=1), hasher.hash_collection)
+
+    assert intervals.equals(track_intervals)
+    assert intervals.index.name == 'interval'
+    assert cells['interval'].isin(intervals.index).all()
+    assert intervals['start_time'][0] == min(shape.start for shape in fcol.geoshapes)
+    assert cells.equals(track_cells)
+    assert hash_by_interval(points, dt.timedelta(hours=1), hasher.hash_collection, n_jobs=2)[1].equals(cells)
+
+    lat, lon, _ = point_columns(points)
+    assert hash_points_by_interval(lat, lon, np.full(4, -1), hasher.hash_collection).empty
+
+    with pytest.raises(ValueError):
+        hash_by_interval(points[:0], dt.timedelta(hours=1), hasher.hash_collection)
+
+def test_convert_points():
+    pd.testing.assert_frame_equal(
+        convert_timehex(points, dt.timedelta(hours=1), hasher.hash_collection),
+        convert_timehex(fcol, dt.timedelta(hours=1), hasher.hash_collection)
+    )
+    assert convert_geotimehash(points, 8, hasher.hash_collection) == \
+        convert_geotimehash(fcol, 8, hasher.hash_collection)
+    assert convert_geotimehash(points, 8, hasher.hash_collection, n_jobs=2) == \
+        convert_geotimehash(fcol, 8, hasher.hash_collection)
+
+    assert convert_geotimehash(points[:0], 8, hasher.hash_collection) == {}
+
+    cover = convert_geotimehash(points, 8, hasher.hash_collection, cover='mixed')
+    assert cover.expand() == convert_geotimehash(fcol, 8, hasher.hash_collection, cover='mixed').expand()
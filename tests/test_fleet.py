@@ -0,0 +1,112 @@
+import datetime as dt
+import numpy as np
+import pandas as pd
+import pytest
+from geochron.chronnet import convert_chronnet
+from geochron.columnar import hash_by_interval
+from geochron.fleet import entity_buckets, hash_fleet_by_interval, split_fleet
+from geochron.geosynchnet import convert_geosynchnet
+from geochron.intervals import interval_ends, to_datetime64
+from geochron.time_slicing import bucket_track
+from geochron.timehex import convert_timehex
+from geostructures import Coordinate, GeoCircle, GeoPoint
+from geostructures.collections import  FeatureCollection, Track
+from geostructures.geohash import H3Hasher
+from geostructures.time import TimeInterval
+
+hasher = H3Hasher(resolution = 10)
+shapes = [
+    GeoPoint(Coordinate(-0.104154, 51.511920), dt=dt.datetime(2020, 1, 1, 8, 5), properties={'vid': 'a'}),
+    GeoPoint(Coordinate(-0.096533, 51.511903), dt=dt.datetime(2020, 1, 1, 9, 23), properties={'vid': 'a'}),
+    GeoPoint(Coordinate(-0.083765, 51.514423), dt=dt.datetime(2020, 1, 1, 9, 44), properties={'vid': 'b'}),
+    GeoCircle(Coordinate(-0.087478, 51.508595), 50, properties={'vid': 'a'},
+        dt=TimeInterval(dt.datetime(2020, 1, 1, 9, 50), dt.datetime(2020, 1, 1, 10, 20))),
+    GeoPoint(Coordinate(-0.087478, 51.508595), dt=dt.datetime(2020, 1, 1, 10, 5), properties={'vid': 'a'}),
+    GeoPoint(Coordinate(-0.104154, 51.511920), dt=dt.datetime(2020, 1, 1, 11, 2), properties={'vid': 'b'}),
+    GeoPoint(Coordinate(-0.096533, 51.511903), dt=dt.datetime(2020, 1, 1, 12, 40), properties={'vid': 'b'}),
+]
+fcol = FeatureCollection(shapes)
+entity_fcols = {
+    vid: FeatureCollection([shape for shape in shapes if shape.properties['vid'] == vid])
+    for vid in ('a', 'b')
+}
+points = pd.DataFrame({
+    'lat': [shape.centroid.latitude for shape in shapes],
+    'lon': [shape.centroid.longitude for shape in shapes],
+    'timestamp': [shape.start for shape in shapes],
+    'vid': [shape.properties['vid'] for shape in shapes],
+})
+
+def test_entity_buckets():
+    tracks = [Track(entity_fcols[vid].geoshapes) for vid in ('a', 'b')]
+    codes = np.repeat([0, 1], [len(track.geoshapes) for track in tracks])
+    starts = to_datetime64(shape.start for track in tracks for shape in track.geoshapes)
+    ends = to_datetime64(shape.end for track in tracks for shape in track.geoshapes)
+
+    buckets, entity_starts, _, offsets = entity_buckets(codes, starts, ends, 2, dt.timedelta(hours=1))
+
+    expected = []
+    for code, track in enumerate(tracks):
+        track_buckets = bucket_track(track, interval_ends(track.start, track.end, dt.timedelta(hours=1)))
+        expected.extend(np.where(track_buckets >= 0, track_buckets + offsets[code], -1).tolist())
+
+    assert buckets.tolist() == expected
+    assert entity_starts.tolist() == to_datetime64([tracks[0].start, tracks[1].start]).tolist()
+    assert offsets.tolist() == [0, 2, 5]
+
+def test_hash_fleet_by_interval():
+    fleet = hash_fleet_by_interval(fcol, dt.timedelta(hours=1), hasher.hash_collection, 'vid')
+
+    assert fleet.entities == ['a', 'b']
+    for vid, start_time, timestamps, cells in split_fleet(fleet, dt.timedelta(hours=1)):
+        track = Track(entity_fcols[vid].geoshapes)
+        assert start_time == track.start.replace(tzinfo=dt.timezone.utc)
+        assert np.array_equal(timestamps, interval_ends(track.start, track.end, dt.timedelta(hours=1)))
+        assert cells.equals(hash_by_interval(entity_fcols[vid], dt.timedelta(hours=1), hasher.hash_collection)[1])
+
+    point_fleet = hash_fleet_by_interval(points, dt.timedelta(hours=1), hasher.hash_collection, 'vid', n_jobs=2)
+    assert point_fleet.entities == ['a', 'b']
+    assert point_fleet.offsets.tolist() == [0, 2, 5]
+
+    with pytest.raises(ValueError):
+        hash_fleet_by_interval(fcol, dt.timedelta(hours=1), hasher.hash_collection, 'driver')
+    with pytest.raises(ValueError):
+        hash_fleet_by_interval(points, dt.timedelta(hours=1), hasher.hash_collection, 'driver')
+    with pytest.raises(ValueError):
+        hash_fleet_by_interval(points.assign(vid=[None] + ['a'] * 6), dt.timedelta(hours=1),
+            hasher.hash_collection, 'vid')
+
+def test_convert_fleet():
+    delta = dt.timedelta(hours=1)
+
+    per_entity = convert_chronnet(fcol, delta, hasher.hash_collection, True, 'directed', output='edgelist',
+        entity_key='vid', per_entity=True)
+    for vid, entity_fcol in entity_fcols.items():
+        expected = convert_chronnet(entity_fcol, delta, hasher.hash_collection, True, 'directed', output='edgelist')
+        pd.testing.assert_frame_equal(per_entity[vid], expected)
+
+    fleet = convert_chronnet(fcol, delta, hasher.hash_collection, True, 'directed', output='edgelist',
+        entity_key='vid')
+    expected = pd.concat(per_entity.values()).groupby(['from', 'to'], as_index=False)['weight'].sum()
+    pd.testing.assert_frame_equal(fleet.reset_index(drop=True), expected)
+
+    per_entity = convert_geosynchnet(fcol, delta, hasher.hash_collection, output='edgelist', entity_key='vid',
+        per_entity=True)
+    for vid, entity_fcol in entity_fcols.items():
+        pd.testing.assert_frame_equal(
+            per_entity[vid], convert_geosynchnet(entity_fcol, delta, hasher.hash_collection, output='edgelist')
+        )
+    fleet = convert_geosynchnet(fcol, delta, hasher.hash_collection, output='edgelist', entity_key='vid')
+    assert fleet['weight'].sum() == sum(edges['weight'].sum() for edges in per_entity.values()) == 1
+
+    timehexes = convert_timehex(fcol, delta, hasher.hash_collection, entity_key='vid')
+    long_timehex = convert_timehex(fcol, delta, hasher.hash_collection, entity_key='vid', layout='long')
+
+    assert list(long_timehex.columns) == ['entity', 'interval_start', 'interval_end', 'cell', 'count']
+    for vid, entity_fcol in entity_fcols.items():
+        pd.testing.assert_frame_equal(timehexes[vid], convert_timehex(entity_fcol, delta, hasher.hash_collection))
+        pd.testing.assert_frame_equal(
+            long_timehex[long_timehex['entity'] == vid].drop(columns='entity').reset_index(drop=True)
+                .astype({'cell': object}),
+            convert_timehex(entity_fcol, delta, hasher.hash_collection, layout='long').astype({'cell': object})
+        )
@@ -1,12 +1,23 @@
 import datetime as dt
 import pandas as pd
-from geochron.geosynchnet import geosynchnet_create, convert_geosynchnet
+import pytest
+from geochron.geosynchnet import cooccurrence_edges, geosynchnet_create, convert_geosynchnet, GeosynchnetWindow
 from geostructures import Coordinate, GeoPoint
-from geostructures.collections import  Track
+from geostructures.collections import  FeatureCollection, Track
 from geostructures.geohash import H3Hasher
 
 hasher = H3Hasher(resolution = 10)
 
+def test_cooccurrence_edges():
+    cell_table = pd.DataFrame({'interval': [0, 0, 1, 1, 1], 'cell': pd.Categorical(['b', 'a', 'a', 'b', 'c']),
+    'count': [1, 1, 3, 1, 1]})
+
+    links = cooccurrence_edges(cell_table)
+
+    assert links['from'].tolist() == ['a', 'a', 'a', 'b']
+    assert links['to'].tolist() == ['a', 'b', 'c', 'c']
+    assert links['weight'].tolist() == [3, 4, 3, 1]
+
 def test_geosynchnet_create():
     test_dict={'cell': {0: '8a194ad32167fff',
     1: '8a194ad32b07fff',
@@ -27,6 +38,18 @@ def test_geosynchnet_create():
     assert test_network.has_edge('8a194ad32167fff', '8a194ad3078ffff') == False
     assert test_network['8a194ad32b07fff']['8a194ad3056ffff']['weight'] == 1
 
+    cell_table = pd.DataFrame({'interval': [0, 0, 1, 1], 'cell': pd.Categorical(['a', 'b', 'a', 'b']),
+    'count': [2, 1, 3, 1]})
+    table_network = geosynchnet_create(cell_table)
+
+    assert table_network['a']['b']['weight'] == 5
+    assert table_network['a']['a']['weight'] == 4
+
+    matrix, nodes = geosynchnet_create(cell_table, output='csr')
+
+    assert list(nodes) == ['a', 'b']
+    assert matrix.toarray().tolist() == [[4, 5], [5, 0]]
+
 def test_convert_geosynchnet():
     track = Track(
     [
@@ -40,4 +63,46 @@ def test_convert_geosynchnet():
     test_geosynchnet = convert_geosynchnet(track, dt.timedelta(hours=1), hasher.hash_collection)
     
     assert list(test_geosynchnet)[0] == '8a194ad32b07fff'
-    assert test_geosynchnet.has_edge('8a194ad32b07fff', '8a194ad3056ffff') == True
\ No newline at end of file
+    assert test_geosynchnet.has_edge('8a194ad32b07fff', '8a194ad3056ffff') == True
+
+    test_edgelist = convert_geosynchnet(track, dt.timedelta(hours=1), hasher.hash_collection, output='edgelist')
+
+    assert len(test_edgelist) == test_geosynchnet.number_of_edges()
+
+    parallel_edgelist = convert_geosynchnet(track, dt.timedelta(hours=1), hasher.hash_collection,
+    output='edgelist', n_jobs=2)
+
+    assert parallel_edgelist.equals(test_edgelist)
+
+def test_geosynchnet_window():
+    window = GeosynchnetWindow(dt.timedelta(hours=2))
+    window.push(dt.datetime(2020, 1, 1, 8), {'a': 2, 'b': 1})
+    window.push(dt.datetime(2020, 1, 1, 9), {'a': 1, 'c': 1, 'd': 0})
+
+    assert window.result()['a']['a']['weight'] == 1
+    assert window.result('edgelist')['weight'].sum() == 4
+
+    window.push(dt.datetime(2020, 1, 1, 10), {'b': 1})
+
+    # the 8:00 interval is evicted along with the edges only it contributed
+    assert len(window) == 2
+    assert window.result('edgelist').values.tolist() == [['a', 'c', 1]]
+
+    with pytest.raises(ValueError):
+        window.push(dt.datetime(2020, 1, 1, 9), {'a': 1})
+
+def test_geosynchnet_window_push_features():
+    fcol = FeatureCollection([
+        GeoPoint(Coordinate(-0.096533, 51.511903), dt=dt.datetime(2020, 1, 1, 9, 23)),
+        GeoPoint(Coordinate(-0.083765, 51.514423), dt=dt.datetime(2020, 1, 1, 9, 44)),
+    ])
+    window = GeosynchnetWindow(dt.timedelta(hours=1))
+    window.push_features(fcol, hasher.hash_collection)
+
+    assert window.result().has_edge('8a194ad32b07fff', '8a194ad3056ffff')
+
+def test_geosynchnet_window_positive():
+    with pytest.raises(ValueError):
+        GeosynchnetWindow(dt.timedelta(0))
+    with pytest.raises(ValueError):
+        GeosynchnetWindow(dt.timedelta(hours=-1))
@@ -1,10 +1,14 @@
 from datetime import datetime, timedelta, timezone
 from geochron.geotimehash import precision_delta, generate_times, timehash_geoshape,\
-append_timehash_to_geohashmap, breakdown_hashmap_by_suffix, combine_dicts, convert_geotimehash
+append_timehash_to_geohashmap, breakdown_hashmap_by_suffix, combine_dicts, convert_geotimehash, GeotimehashCover, \
+count_geotimehash_pairs, merge_geotimehash_pairs, normalize_geotimehash_pairs, geotimehash_series_to_dict, \
+iter_geotimehash, iter_geotimehash_chunks
+from geochron.hash_cache import HashCache
 from geostructures import Coordinate, GeoCircle, GeoPoint
-from geostructures.collections import  Track
+from geostructures.collections import  FeatureCollection, Track
 from geostructures.geohash import H3Hasher
 from geostructures.time import  TimeInterval
+import pandas as pd
 import pytest 
 
 def test_precision_delta():
@@ -29,7 +33,7 @@ def test_precision_delta():
     assert delta8 == timedelta(minutes = 4)
     assert delta9 == timedelta(seconds = 30)
     assert delta10 == timedelta(seconds = 3.6)
-    with pytest.raises(UnboundLocalError):
+    with pytest.raises(ValueError):
         precision_delta(11)
 
 def test_generate_times():
@@ -50,6 +54,12 @@ def test_timehash_geoshape():
 
     assert timehash_list[2] == 'b0ffffbc'
 
+    cover = timehash_geoshape(circle2, 8, cover='mixed')
+
+    assert cover == ['b0ffffba', 'b0ffffbb', 'b0ffffbc', 'b0ffffbd']
+    with pytest.raises(ValueError):
+        timehash_geoshape(circle2, 8, cover='exact')
+
 def test_append_timehash_to_geohashmap():
     geohashmap = {'8b194ad32161fff': 1.0,
                 '8b194ad32b23fff': 1.0,
@@ -98,5 +108,122 @@ def test_convert_geotimehash():
 
     assert geotimehash['8a194ad3056ffff_b0ffffbe'] == 1
 
+    assert convert_geotimehash(track, 8, hasher.hash_collection, n_jobs=2) == geotimehash
+
+    cache = HashCache()
+    assert convert_geotimehash(track, 8, hasher.hash_collection, hash_cache=cache) == geotimehash
+    assert cache.cache_info().misses == 4
+    cover = convert_geotimehash(track, 8, hasher.hash_collection, hash_cache=cache, cover='mixed')
+    assert cover['8a194ad3056ffff_b0ffffbe'] == 1
+    assert cache.cache_info().hits == 4
+
+    series = convert_geotimehash(track, 8, hasher.hash_collection, output='series')
+
+    assert series.index.names == ['geohash', 'timehash']
+    assert series['8a194ad3056ffff', 'b0ffffbe'] == 1
+    assert geotimehash_series_to_dict(series) == geotimehash
+    with pytest.raises(ValueError):
+        convert_geotimehash(track, 8, hasher.hash_collection, output='json')
+    with pytest.raises(ValueError):
+        convert_geotimehash(track, 8, hasher.hash_collection, cover='exact')
+
+
+def test_iter_geotimehash():
+    hasher = H3Hasher(resolution = 10)
+    track = Track(
+    [
+        GeoCircle(Coordinate(-0.104154, 51.511920), 50,
+            dt=TimeInterval(datetime(2020, 1, 1, 8, 5), datetime(2020, 1, 1, 9, 0))),
+        GeoPoint(Coordinate(-0.096533, 51.511903), dt=datetime(2020, 1, 1, 8, 23)),
+        GeoPoint(Coordinate(-0.083765, 51.514423), dt=datetime(2020, 1, 1, 8, 44)),
+        GeoPoint(Coordinate(-0.087478, 51.508595), dt=datetime(2020, 1, 1, 10, 5)),
+    ]
+    )
+
+    timehashes = list(iter_geotimehash(track, 8, hasher.hash_collection))
+
+    assert [timehash for timehash, _ in timehashes] == sorted({timehash for timehash, _ in timehashes})
+    flattened = {
+        f"{geohash}_{timehash}": value
+        for timehash, hashmap in timehashes for geohash, value in hashmap.items()
+    }
+    assert flattened == convert_geotimehash(track, 8, hasher.hash_collection)
+
+    cache = HashCache()
+    assert list(iter_geotimehash(track, 8, hasher.hash_collection, hash_cache=cache)) == timehashes
+    assert cache.cache_info().misses == 4
+
+def test_iter_geotimehash_chunks():
+    hasher = H3Hasher(resolution = 10)
+    shapes = [
+        GeoCircle(Coordinate(-0.104154, 51.511920), 50,
+            dt=TimeInterval(datetime(2020, 1, 1, 8, 5), datetime(2020, 1, 1, 9, 0))),
+        GeoPoint(Coordinate(-0.096533, 51.511903), dt=datetime(2020, 1, 1, 8, 23)),
+        GeoPoint(Coordinate(-0.083765, 51.514423), dt=datetime(2020, 1, 1, 8, 44)),
+        GeoPoint(Coordinate(-0.087478, 51.508595), dt=datetime(2020, 1, 1, 10, 5)),
+    ]
+    chunks = [FeatureCollection(shapes[:2]), FeatureCollection(shapes[2:])]
+
+    timehashes = list(iter_geotimehash_chunks(chunks, 8, hasher.hash_collection))
+
+    assert timehashes == list(iter_geotimehash(Track(shapes), 8, hasher.hash_collection))
+
+    points = pd.DataFrame({
+        'lat': [shape.centroid.latitude for shape in shapes[1:]],
+        'lon': [shape.centroid.longitude for shape in shapes[1:]],
+        'timestamp': [shape.start for shape in shapes[1:]],
+    })
+    assert list(iter_geotimehash_chunks([points[:1], points[1:]], 8, hasher.hash_collection)) == \
+        list(iter_geotimehash(Track(shapes[1:]), 8, hasher.hash_collection))
+
+    with pytest.raises(ValueError):
+        list(iter_geotimehash_chunks(chunks[::-1], 8, hasher.hash_collection))
+
     
-    
\ No newline at end of file
+    
+
+def test_geotimehash_cover():
+    hasher = H3Hasher(resolution = 10)
+    track = Track(
+    [
+        GeoPoint(Coordinate(-0.104154, 51.511920), dt=datetime(2020, 1, 1, 8, 5)),
+        GeoCircle(Coordinate(-0.104154, 51.511920), radius=100, 
+        dt=TimeInterval(datetime(2020, 1, 1, 8, 0), datetime(2020, 1, 1, 9, 0))),
+    ]
+    )
+
+    cover = convert_geotimehash(track, 8, hasher.hash_collection, cover='mixed')
+
+    assert isinstance(cover, GeotimehashCover)
+    assert cover.counts['8a194ad32167fff_b0ffff1'] == 1
+    assert cover['8a194ad32167fff_b0ffff1e'] == 1
+    assert cover['8a194ad32167fff_b0ffff0d'] == 1
+    expanded = cover.expand()
+    assert expanded['8a194ad32167fff_b0ffff1e'] == 1
+    assert len(expanded) == 48
+    assert len(cover.counts) < len(expanded)
+    with pytest.raises(KeyError):
+        cover['8a194ad32167fff_b0ffff']
+
+def test_geotimehash_pairs():
+    hasher = H3Hasher(resolution = 10)
+    circle = GeoCircle(Coordinate(-0.104154, 51.511920), radius=100,
+    dt=TimeInterval(datetime(2020, 1, 1, 9, 30), datetime(2020, 1, 1, 9, 42)))
+    point = GeoPoint(Coordinate(-0.104154, 51.511920), dt=datetime(2020, 1, 1, 9, 31))
+
+    pairs, shape_count = count_geotimehash_pairs([circle], 8, hasher.hash_collection)
+
+    assert shape_count.to_dict() == {'b0ffffba': 1, 'b0ffffbb': 1, 'b0ffffbc': 1, 'b0ffffbd': 1}
+    assert pairs['8a194ad32167fff', 'b0ffffbb'] == 1
+
+    pairs, shape_count = merge_geotimehash_pairs([
+        (pairs, shape_count), count_geotimehash_pairs([point], 8, hasher.hash_collection)
+    ])
+    assert shape_count['b0ffffba'] == 2
+    assert pairs['8a194ad32167fff', 'b0ffffba'] == 2
+
+    normalized = normalize_geotimehash_pairs(pairs, shape_count)
+
+    assert normalized['8a194ad32167fff', 'b0ffffba'] == 1
+    assert normalized['8a194ad32b97fff', 'b0ffffba'] == 0.5
+
@@ -0,0 +1,64 @@
+import datetime as dt
+from geochron.hash_cache import HashCache, geometry_fingerprint, hasher_fingerprint
+from geostructures import Coordinate, GeoCircle, GeoPoint
+from geostructures.collections import Track
+from geostructures.geohash import H3Hasher
+
+point1 = GeoPoint(Coordinate(-0.104154, 51.511920), dt=dt.datetime(2020, 1, 1, 8, 5))
+point2 = GeoPoint(Coordinate(-0.104154, 51.511920), dt=dt.datetime(2020, 1, 1, 9, 23))
+circle = GeoCircle(Coordinate(-0.104154, 51.511920), 100, dt=dt.datetime(2020, 1, 1, 9, 23))
+
+def test_geometry_fingerprint():
+    assert geometry_fingerprint(point1) == geometry_fingerprint(point2)
+    assert geometry_fingerprint(point1) != geometry_fingerprint(circle)
+    hash(geometry_fingerprint(circle))
+
+def test_hasher_fingerprint():
+    def single_hash(track):
+        return {}
+
+    assert hasher_fingerprint(H3Hasher(resolution=10).hash_collection) == \
+        hasher_fingerprint(H3Hasher(resolution=10).hash_collection)
+    assert hasher_fingerprint(H3Hasher(resolution=10).hash_collection) != \
+        hasher_fingerprint(H3Hasher(resolution=11).hash_collection)
+    assert hasher_fingerprint(single_hash) == hasher_fingerprint(single_hash)
+
+def test_hasher_fingerprint_lambdas():
+    cache = HashCache()
+    hashers = {resolution: H3Hasher(resolution=resolution) for resolution in (8, 11)}
+    coarse = lambda shape: hashers[8].hash_collection(shape)
+    fine = lambda shape: hashers[11].hash_collection(shape)
+
+    assert hasher_fingerprint(coarse) != hasher_fingerprint(fine)
+    assert cache.hash_shape(point1, coarse) == hashers[8].hash_collection(Track([point1]))
+    assert cache.hash_shape(point1, fine) == hashers[11].hash_collection(Track([point1]))
+    assert cache.cache_info().misses == 2
+
+def test_hash_cache():
+    cache = HashCache(max_entries=2)
+    hasher = H3Hasher(resolution=10)
+
+    first = cache.hash_shape(point1, hasher.hash_collection)
+    second = cache.hash_shape(point2, hasher.hash_collection)
+
+    assert second is first
+    assert cache.cache_info() == (1, 1, 0, 1, cache.cache_info().nbytes)
+
+    cache.hash_shape(circle, hasher.hash_collection)
+    cache.hash_shape(point1, H3Hasher(resolution=11).hash_collection)
+
+    info = cache.cache_info()
+    assert (info.misses, info.evictions, info.entries) == (3, 1, 2)
+    assert len(cache) == 2
+
+    cache.clear()
+    assert cache.cache_info() == (0, 0, 0, 0, 0)
+
+def test_hash_cache_memory_cap():
+    cache = HashCache(max_bytes=1)
+    hasher = H3Hasher(resolution=10)
+
+    cache.hash_shape(point1, hasher.hash_collection)
+
+    assert cache.cache_info().entries == 0
+    assert cache.cache_info().evictions == 1
@@ -0,0 +1,134 @@
+import datetime as dt
+import numpy as np
+import pandas as pd
+import pytest
+from geochron.hashing import as_cell_table, count_matrix, hash_items, count_cells_by_interval, hash_track_by_interval, \
+    hex_to_uint64, merge_cell_tables
+from geostructures import Coordinate, GeoPoint
+from geostructures.collections import  Track
+from geostructures.geohash import H3Hasher
+
+hasher = H3Hasher(resolution = 10)
+point1 = GeoPoint(Coordinate(-0.104154, 51.511920), dt=dt.datetime(2020, 1, 1, 8, 5))
+point2 = GeoPoint(Coordinate(-0.087478, 51.508595), dt=dt.datetime(2020, 1, 1, 9, 23))
+test_timestamps = [dt.datetime(2020, 1, 1, 9, 5, tzinfo=dt.timezone.utc),
+dt.datetime(2020, 1, 1, 10, 5, 1, tzinfo=dt.timezone.utc)]
+
+def test_hash_items():
+    positions, cells = hash_items([point1, point2, point2], hasher.hash_collection, wrap=Track)
+
+    assert positions.tolist() == [0, 1, 2]
+    assert cells.tolist() == ['8a194ad32167fff', '8a194ad3078ffff', '8a194ad3078ffff']
+
+    def single_hash(track):
+        return {'cell_' + str(len(track)): 1}
+
+    positions, cells = hash_items([point1, point2], single_hash)
+
+    assert positions.tolist() == [0, 1]
+    assert cells.tolist() == ['cell_1', 'cell_1']
+
+    positions, cells = hash_items([point1, point2], lambda items: {'a': 2, 'b': 0, 'c': 1})
+
+    assert positions.tolist() == [0, 0, 0, 1, 1, 1]
+    assert cells.tolist() == ['a', 'a', 'c', 'a', 'a', 'c']
+
+    with pytest.raises(ValueError):
+        hash_items([point1], lambda items: {'a': 0.5})
+
+def test_hash_items_agg_fn():
+    calls = []
+
+    # **kwargs alone does not mean agg_fn is supported: hashed item by item
+    def keyword_hash(items, **kwargs):
+        calls.append(len(items))
+        return {'a': 1}
+
+    positions, cells = hash_items([point1, point2], keyword_hash)
+
+    assert (calls, positions.tolist(), cells.tolist()) == ([1, 1], [0, 1], ['a', 'a'])
+
+    # an explicit agg_fn parameter takes the batched path
+    calls.clear()
+    def batched_hash(items, agg_fn=len):
+        calls.append(len(items))
+        return {'a': agg_fn(list(items))}
+
+    positions, cells = hash_items([point1, point2], batched_hash)
+
+    assert (calls, positions.tolist(), cells.tolist()) == ([2], [0, 1], ['a', 'a'])
+
+def test_hex_to_uint64():
+    hashes = ['8a194ad32167fff', 'FFFFFFFFFFFFFFFF', '0', 'a']
+    values = hex_to_uint64(hashes)
+
+    assert values.dtype == np.uint64
+    assert values.tolist() == [int(value, 16) for value in hashes]
+    assert hex_to_uint64([]).tolist() == []
+
+    with pytest.raises(ValueError):
+        hex_to_uint64(['8a19g'])
+    with pytest.raises(ValueError):
+        hex_to_uint64(['1' * 17])
+
+def test_as_cell_table():
+    df = pd.DataFrame({'cell': ['a', 'b', 'b', 'a'], 'time': ['t2', 't1', 't1', 't1']})
+
+    cells = as_cell_table(df)
+
+    assert cells['interval'].tolist() == [0, 0, 1]
+    assert cells['cell'].tolist() == ['b', 'a', 'a']
+    assert cells['count'].tolist() == [2, 1, 1]
+    assert as_cell_table(cells) is cells
+
+    intervals = pd.DataFrame({'start_time': ['t1', 't2']}, index=pd.RangeIndex(2, name='interval'))
+    assert as_cell_table((intervals, cells)) is cells
+    with pytest.raises(ValueError):
+        as_cell_table((intervals[:1], cells))
+
+def test_count_matrix():
+    cells = pd.DataFrame({'interval': [0, 2, 2], 'cell': ['b', 'a', 'b'], 'count': [1, 2, 3]})
+
+    matrix, labels = count_matrix(cells)
+
+    assert list(labels) == ['a', 'b']
+    assert matrix.toarray().tolist() == [[0, 1], [2, 3]]
+
+def test_count_cells_by_interval():
+    buckets = np.array([1, -1, 0, 1])
+    positions = np.array([0, 1, 2, 3, 3])
+    cells = np.array(['b', 'a', 'a', 'b', 'c'], dtype=object)
+
+    counts = count_cells_by_interval(buckets, positions, cells)
+
+    assert counts['interval'].tolist() == [0, 1, 1]
+    assert counts['cell'].tolist() == ['a', 'b', 'c']
+    assert counts['count'].tolist() == [1, 2, 1]
+
+def test_merge_cell_tables():
+    first = pd.DataFrame({'interval': [0, 1], 'cell': ['b', 'a'], 'count': [1, 2]})
+    second = pd.DataFrame({'interval': [1, 1, 2], 'cell': ['c', 'a', 'b'], 'count': [1, 3, 4]})
+
+    counts = merge_cell_tables([first, second])
+
+    assert counts['interval'].tolist() == [0, 1, 1, 2]
+    assert counts['cell'].tolist() == ['b', 'a', 'c', 'b']
+    assert counts['count'].tolist() == [1, 5, 1, 4]
+    assert list(counts['cell'].cat.categories) == ['b', 'a', 'c']
+    assert merge_cell_tables([first]) is first
+
+def test_hash_track_by_interval():
+    track = Track([point1, point2, point2])
+
+    counts = hash_track_by_interval(track, test_timestamps, hasher.hash_collection)
+
+    assert counts['cell'].tolist() == ['8a194ad32167fff', '8a194ad3078ffff']
+    assert counts['count'].tolist() == [1, 2]
+
+    parallel = hash_track_by_interval(track, test_timestamps, hasher.hash_collection, n_jobs=2)
+
+    assert parallel.equals(counts)
+
+    empty = hash_track_by_interval(Track([point1]), test_timestamps[:0], hasher.hash_collection)
+
+    assert empty.empty
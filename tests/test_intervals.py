@@ -0,0 +1,104 @@
+import datetime as dt
+import numpy as np
+import pandas as pd
+from geochron.intervals import epoch_seconds, floor_datetime64, floored_intervals, inclusive_range, \
+interval_ends, interval_table, iter_interval_ends, stepped_times, to_datetime64, to_datetimes, utc_datetime64
+
+def test_epoch_seconds():
+    values = np.array(['1970-01-01T00:00:03.600', '2020-01-01T09:38'], dtype='datetime64[ns]')
+
+    result = epoch_seconds(values)
+
+    assert result[0] == 3.6
+    assert result[1] == dt.datetime(2020, 1, 1, 9, 38, tzinfo=dt.timezone.utc).timestamp()
+
+def test_floor_datetime64():
+    values = np.array(['2023-01-01T08:59', '2023-01-05T08:00'], dtype='datetime64[ns]')
+
+    assert floor_datetime64(values, dt.timedelta(hours=1))[0] == np.datetime64('2023-01-01T08:00')
+    # weeks are counted from datetime.min (a Monday), not from the unix epoch
+    assert floor_datetime64(values, dt.timedelta(days=7))[1] == np.datetime64('2023-01-02T00:00')
+
+def test_floored_intervals():
+    start_time = dt.datetime(2023, 1, 1, 0, 30, tzinfo=dt.timezone(dt.timedelta(hours=3)))
+    end_time = dt.datetime(2023, 1, 1, 4, 10, tzinfo=dt.timezone(dt.timedelta(hours=3)))
+
+    result = floored_intervals(start_time, end_time, dt.timedelta(hours=2))
+
+    assert result.tolist() == np.array(
+        ['2023-01-01T00:00', '2023-01-01T02:00', '2023-01-01T04:00'], dtype='datetime64[ns]'
+    ).tolist()
+
+def test_inclusive_range():
+    start_time = dt.datetime(2020, 1, 1, 9, 30, tzinfo=dt.timezone.utc)
+    end_time = dt.datetime(2020, 1, 1, 9, 42, tzinfo=dt.timezone.utc)
+
+    assert len(inclusive_range(start_time, end_time, dt.timedelta(minutes=4))) == 4
+    assert len(inclusive_range(end_time, start_time, dt.timedelta(minutes=4))) == 0
+
+def test_interval_ends():
+    start_time = dt.datetime(2020, 1, 1, 8, 0)
+    end_time = dt.datetime(2020, 1, 1, 10, 0)
+
+    result = interval_ends(start_time, end_time, dt.timedelta(hours=1))
+
+    assert result[0] == np.datetime64('2020-01-01T09:00')
+    assert result[-1] == np.datetime64('2020-01-01T10:00:01')
+    assert len(interval_ends(start_time, start_time, dt.timedelta(hours=1))) == 0
+
+def test_iter_interval_ends():
+    start_time = dt.datetime(2020, 1, 1, 8, 5)
+    end_time = dt.datetime(2020, 1, 1, 10, 5)
+
+    result = list(iter_interval_ends(start_time, end_time, dt.timedelta(hours=1)))
+
+    assert result == list(interval_ends(start_time, end_time, dt.timedelta(hours=1)))
+    assert not list(iter_interval_ends(start_time, start_time, dt.timedelta(hours=1)))
+
+def test_interval_table():
+    timestamps = [dt.datetime(2020, 1, 1, 9, 5), dt.datetime(2020, 1, 1, 10, 5, 1)]
+
+    result = interval_table(dt.datetime(2020, 1, 1, 8, 5), timestamps)
+
+    assert result.index.name == 'interval'
+    assert result['start_time'][1] == pd.Timestamp('2020-01-01T09:05', tz='UTC')
+    assert result['end_time'][1] == pd.Timestamp('2020-01-01T10:05:01', tz='UTC')
+
+    eastern = dt.timezone(dt.timedelta(hours=-5))
+    result = interval_table(dt.datetime(2020, 1, 1, 8, 5, tzinfo=eastern), interval_ends(
+        dt.datetime(2020, 1, 1, 8, 5, tzinfo=eastern), dt.datetime(2020, 1, 1, 9, 0, tzinfo=eastern),
+        dt.timedelta(hours=1)
+    ))
+
+    assert result['start_time'].tolist() == [pd.Timestamp(2020, 1, 1, 8, 5, tzinfo=eastern)]
+    assert interval_table(dt.datetime(2020, 1, 1, 8, 5), []).empty
+
+def test_stepped_times():
+    result = stepped_times(dt.datetime(2023, 1, 1), 3, dt.timedelta(hours=1))
+
+    assert result[1] == np.datetime64('2023-01-01T01:00')
+    assert result[2] == np.datetime64('2023-01-01T01:59:59')
+
+def test_to_datetime64():
+    result = to_datetime64([
+        dt.datetime(2020, 1, 1, 8, 5),
+        dt.datetime(2020, 1, 1, 9, 5, tzinfo=dt.timezone(dt.timedelta(hours=1)))
+    ])
+
+    assert result.dtype == np.dtype('datetime64[ns]')
+    assert result[0] == np.datetime64('2020-01-01T08:05')
+    assert result[1] == np.datetime64('2020-01-01T08:05')
+    assert to_datetime64(result.astype('datetime64[s]')).dtype == np.dtype('datetime64[ns]')
+
+def test_to_datetimes():
+    values = np.array(['2020-01-01T08:05'], dtype='datetime64[ns]')
+
+    assert to_datetimes(values) == [dt.datetime(2020, 1, 1, 8, 5)]
+    assert to_datetimes(values, dt.timezone(dt.timedelta(hours=1)))[0].hour == 9
+
+def test_utc_datetime64():
+    result = utc_datetime64(dt.datetime(2020, 1, 1, 9, 5, tzinfo=dt.timezone(dt.timedelta(hours=1))))
+
+    assert result == np.datetime64('2020-01-01T08:05')
+    assert result.dtype == np.dtype('datetime64[ns]')
+    assert utc_datetime64(dt.datetime(2020, 1, 1, 8, 5)) == np.datetime64('2020-01-01T08:05')
@@ -0,0 +1,89 @@
+import networkx as nx
+import numpy as np
+import pandas as pd
+import pytest
+from geochron.networks import collapse_undirected, edges_to_csr, edges_to_networkx, format_network, \
+    load_network, save_network
+
+links = pd.DataFrame({'from': ['a', 'a', 'b', 'b'], 'to': ['a', 'b', 'a', 'c'], 'weight': [1, 2, 5, 3]})
+
+def test_collapse_undirected():
+    undirected = collapse_undirected(links)
+
+    assert undirected['from'].tolist() == ['a', 'a', 'b']
+    assert undirected['to'].tolist() == ['a', 'b', 'c']
+    # matches networkx, where the (b, a) weight is encountered last
+    assert undirected['weight'].tolist() == [1, 5, 3]
+    assert nx.DiGraph(edges_to_networkx(links, directed=True)).to_undirected()['a']['b']['weight'] == 5
+
+def test_edges_to_csr():
+    matrix, nodes = edges_to_csr(links, directed=True)
+
+    assert list(nodes) == ['a', 'b', 'c']
+    assert matrix.toarray().tolist() == [[1, 2, 0], [5, 0, 3], [0, 0, 0]]
+
+    matrix, nodes = edges_to_csr(collapse_undirected(links), nodes=['c', 'b', 'a', 'd'])
+
+    assert matrix.toarray().tolist() == [[0, 3, 0, 0], [3, 0, 5, 0], [0, 5, 1, 0], [0, 0, 0, 0]]
+
+def test_edges_to_networkx():
+    net = edges_to_networkx(links, nodes=['d'], directed=True)
+
+    assert net.is_directed()
+    assert list(net) == ['d', 'a', 'b', 'c']
+    assert net['b']['a']['weight'] == 5
+    assert edges_to_networkx(links).is_directed() == False
+
+def test_format_network():
+    assert format_network(links, 'edgelist').equals(links)
+    assert format_network(links, 'csr')[0].shape == (3, 3)
+    assert isinstance(format_network(links, 'networkx'), nx.Graph)
+    with pytest.raises(ValueError):
+        format_network(links, 'graphml')
+
+def test_save_network(tmp_path):
+    path = tmp_path / 'network.npz'
+
+    with pytest.raises(ValueError):
+        save_network(links, path)
+    save_network(links, path, directed=True)
+    matrix, nodes = load_network(path)
+
+    assert isinstance(matrix.data, np.memmap)
+    assert list(nodes) == ['a', 'b', 'c']
+    assert matrix.toarray().tolist() == [[1, 2, 0], [5, 0, 3], [0, 0, 0]]
+    pd.testing.assert_frame_equal(load_network(path, output='edgelist'), links.sort_values(['from', 'to']))
+    assert load_network(path, mmap=False)[0].toarray().tolist() == matrix.toarray().tolist()
+
+    undirected = collapse_undirected(links)
+    save_network(edges_to_networkx(undirected, nodes=['d']), path)
+    net = load_network(path, output='networkx')
+    assert not net.is_directed()
+    assert list(net) == ['d', 'a', 'b', 'c']
+    assert sorted(net.edges(data='weight')) == [('a', 'a', 1), ('a', 'b', 5), ('b', 'c', 3)]
+
+    save_network(undirected, path, directed=False)
+    net = load_network(path, output='networkx')
+    assert not net.is_directed()
+    assert sorted(net.edges(data='weight')) == [('a', 'a', 1), ('a', 'b', 5), ('b', 'c', 3)]
+
+    save_network(format_network(undirected, 'csr', nodes=['a', 'b', 'c', 'd']), path)
+    pd.testing.assert_frame_equal(load_network(path, output='edgelist'), undirected)
+
+    save_network(links[:0], path, directed=True)
+    assert load_network(path)[0].shape == (0, 0)
+
+    save_network(nx.DiGraph(), path)
+    assert load_network(path, output='networkx').number_of_nodes() == 0
+    save_network(edges_to_networkx(links[:0], nodes=['a', 'b']), path)
+    net = load_network(path, output='networkx')
+    assert (list(net), net.number_of_edges()) == (['a', 'b'], 0)
+
+    with pytest.raises(ValueError):
+        load_network(path, output='graphml')
+    with pytest.raises(ValueError):
+        save_network(nx.Graph([('a', 1)]), path)
+
+    np.savez_compressed(tmp_path / 'compressed.npz', nodes=np.array(['a']))
+    with pytest.raises(ValueError):
+        load_network(tmp_path / 'compressed.npz')
@@ -0,0 +1,83 @@
+import datetime as dt
+import json
+import pandas as pd
+import pytest
+from geochron.geotimehash import convert_geotimehash
+from geochron.out_of_core import convert_geotimehash_file, convert_timehex_file, read_chunks
+from geochron.timehex import iter_timehex_chunks
+from geostructures import Coordinate, GeoCircle, GeoPoint
+from geostructures.collections import  FeatureCollection
+from geostructures.geohash import H3Hasher
+from geostructures.time import TimeInterval
+
+hasher = H3Hasher(resolution = 10)
+shapes = [
+    GeoPoint(Coordinate(-0.104154, 51.511920), dt=dt.datetime(2020, 1, 1, 22, 5)),
+    GeoCircle(Coordinate(-0.087478, 51.508595), 50,
+        dt=TimeInterval(dt.datetime(2020, 1, 1, 22, 50), dt.datetime(2020, 1, 1, 23, 20))),
+    GeoPoint(Coordinate(-0.096533, 51.511903), dt=dt.datetime(2020, 1, 1, 23, 23)),
+    GeoPoint(Coordinate(-0.083765, 51.514423), dt=dt.datetime(2020, 1, 2, 0, 44)),
+    GeoPoint(Coordinate(-0.104154, 51.511920), dt=dt.datetime(2020, 1, 2, 1, 2)),
+]
+points = pd.DataFrame({
+    'lat': [shape.centroid.latitude for shape in shapes],
+    'lon': [shape.centroid.longitude for shape in shapes],
+    'timestamp': [shape.start for shape in shapes],
+})
+
+@pytest.fixture
+def geojsonl_file(tmp_path):
+    path = tmp_path / 'shapes.geojsonl'
+    path.write_text('\n'.join(json.dumps(shape.to_geojson()) for shape in shapes) + '\n')
+    return path
+
+@pytest.fixture
+def parquet_file(tmp_path):
+    path = tmp_path / 'points.parquet'
+    points.to_parquet(path, row_group_size=2)
+    return path
+
+def test_read_chunks(geojsonl_file, parquet_file):
+    chunks = list(read_chunks(geojsonl_file, chunk_size=2))
+
+    assert [len(chunk.geoshapes) for chunk in chunks] == [2, 2, 1]
+    assert chunks[0].geoshapes[1].start == shapes[1].start.replace(tzinfo=dt.timezone.utc)
+
+    point_chunks = list(read_chunks(parquet_file, chunk_size=3))
+    assert [len(chunk) for chunk in point_chunks] == [3, 2]
+    pd.testing.assert_frame_equal(pd.concat(point_chunks, ignore_index=True), points)
+
+    with pytest.raises(ValueError):
+        read_chunks('shapes.csv')
+    with pytest.raises(ValueError):
+        read_chunks(parquet_file, source_format='csv')
+
+def test_convert_timehex_file(geojsonl_file, tmp_path):
+    destination = tmp_path / 'timehex'
+
+    rows = convert_timehex_file(geojsonl_file, destination, dt.timedelta(hours=1), hasher.hash_collection,
+        chunk_size=2)
+
+    written = pd.read_parquet(destination).sort_values(['interval_start', 'cell'], ignore_index=True)
+    expected = pd.concat(
+        iter_timehex_chunks([FeatureCollection(shapes)], dt.timedelta(hours=1), hasher.hash_collection)
+    ).astype({'cell': str}).sort_values(['interval_start', 'cell'], ignore_index=True)
+
+    assert rows == len(written) == 4
+    assert sorted(path.name for path in destination.iterdir()) == ['date=2020-01-01', 'date=2020-01-02']
+    assert written['date'].astype(str).tolist() == ['2020-01-01'] * 2 + ['2020-01-02'] * 2
+    pd.testing.assert_frame_equal(written.drop(columns='date'), expected, check_dtype=False)
+
+def test_convert_geotimehash_file(geojsonl_file, parquet_file, tmp_path):
+    rows = convert_geotimehash_file(geojsonl_file, tmp_path / 'shapes', 8, hasher.hash_collection, chunk_size=2)
+
+    written = pd.read_parquet(tmp_path / 'shapes')
+    assert rows == len(written)
+    assert dict(zip(written['geohash'] + '_' + written['timehash'], written['value'])) == \
+        convert_geotimehash(FeatureCollection(shapes), 8, hasher.hash_collection)
+    assert set(written['date'].astype(str)) == {'2020-01-01', '2020-01-02'}
+
+    convert_geotimehash_file(parquet_file, tmp_path / 'points', 8, hasher.hash_collection, chunk_size=2)
+    written = pd.read_parquet(tmp_path / 'points')
+    assert dict(zip(written['geohash'] + '_' + written['timehash'], written['value'])) == \
+        convert_geotimehash(points, 8, hasher.hash_collection)
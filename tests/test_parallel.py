@@ -0,0 +1,111 @@
+import datetime as dt
+import pickle
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import os
+import pandas as pd
+from geochron.geotimehash import convert_geotimehash
+from geochron.hash_cache import HashCache
+from geochron.parallel import _dump_partition, map_partitions, partition_count, partition_ranges
+from geochron.timehex import convert_timehex
+from geochron.time_grid import convert_time_grid
+from geostructures import (
+    Coordinate, GeoBox, GeoCircle, GeoEllipse, GeoLineString, GeoPoint, GeoPolygon, GeoRing,
+    MultiGeoLineString, MultiGeoPoint, MultiGeoPolygon, Track
+)
+from geostructures.collections import FeatureCollection
+from geostructures.geohash import H3Hasher
+from geostructures.time import TimeInterval
+
+hasher = H3Hasher(resolution = 10)
+fcol = FeatureCollection([
+    GeoPoint(Coordinate(-0.104154, 51.511920), dt=dt.datetime(2020, 1, 1, 8, 5)),
+    GeoCircle(Coordinate(-0.087478, 51.508595), 50,
+        dt=TimeInterval(dt.datetime(2020, 1, 1, 8, 50), dt.datetime(2020, 1, 1, 9, 0))),
+    GeoPoint(Coordinate(-0.096533, 51.511903), dt=dt.datetime(2020, 1, 1, 9, 23)),
+    GeoPoint(Coordinate(-0.083765, 51.514423), dt=dt.datetime(2020, 1, 1, 9, 44)),
+    GeoPoint(Coordinate(-0.087478, 51.508595), dt=dt.datetime(2020, 1, 1, 10, 5)),
+])
+
+def sum_partition(shared, part):
+    values, offset = shared
+    return sum(values[part]) + offset
+
+def test_partition_ranges():
+    assert partition_ranges(10, 3) == [slice(0, 3), slice(3, 6), slice(6, 10)]
+    assert partition_ranges(2, 4) == [slice(0, 1), slice(1, 2)]
+    assert partition_ranges(0, 4) == []
+
+def test_partition_count():
+    assert partition_count() == 1
+    assert partition_count(3) == 3
+    assert partition_count(0) == 1
+    assert partition_count(-1) >= 1
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        assert partition_count(executor=executor) == (os.cpu_count() or 1)
+        assert partition_count(2, executor) == 2
+
+def test_map_partitions():
+    shared = (list(range(10)), 100)
+    parts = partition_ranges(10, 3)
+
+    assert map_partitions(sum_partition, shared, parts) == [103, 112, 130]
+    assert map_partitions(sum_partition, shared, parts, n_jobs=2) == [103, 112, 130]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        assert map_partitions(sum_partition, shared, parts, executor=executor) == [103, 112, 130]
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        assert map_partitions(sum_partition, shared, parts, executor=executor) == [103, 112, 130]
+
+    # each task only carries its own partition
+    func, data, part = pickle.loads(_dump_partition(sum_partition, shared, slice(6, 10), 1))
+    assert (func, data, part) == (sum_partition, ([6, 7, 8, 9], 100), slice(0, 4))
+
+def test_dump_partition_shapes():
+    # shapes are rebuilt with public constructors; fails if geostructures changes them
+    interval = TimeInterval(dt.datetime(2020, 1, 1, 8, 0, 0, 123456), dt.datetime(2020, 1, 1, 9))
+    center, corner, edge = (Coordinate(-0.1, 51.5), Coordinate(-0.2, 51.6),
+        Coordinate(-0.3, 51.5))
+    polygon = GeoPolygon([center, corner, edge, center], dt=interval, properties={'name': 'a'})
+    line = GeoLineString([center, corner], dt=interval)
+    point = GeoPoint(center, dt=dt.datetime(2020, 1, 1, 8), properties={'name': 'b'})
+    shapes = [
+        point, line, polygon,
+        GeoBox(corner, center, dt=interval),
+        GeoCircle(center, 50, dt=interval, properties={'name': 'c'}),
+        GeoEllipse(center, 100, 50, 30, dt=interval),
+        GeoRing(center, 50, 100, 10, 200, dt=interval),
+        MultiGeoPoint([point], dt=interval),
+        MultiGeoLineString([line], dt=interval),
+        MultiGeoPolygon([polygon], dt=interval),
+    ]
+    _, (loaded, track), _ = pickle.loads(
+        _dump_partition(sum_partition, (shapes, Track([point])), slice(0, len(shapes)), 1)
+    )
+    for shape, copy in zip(shapes, loaded):
+        assert type(copy) is type(shape)
+        assert copy == shape
+        assert (copy.start, copy.end) == (shape.start, shape.end)
+        assert copy.properties == shape.properties
+    for shape, copy in zip(shapes[:7], loaded):
+        assert hasher.hash_shape(copy) == hasher.hash_shape(shape)
+    assert track.geoshapes == [point]
+
+def test_process_pool_executor():
+    delta = dt.timedelta(hours=1)
+    cache = HashCache()
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        timehex = convert_timehex(fcol, delta, hasher.hash_collection, n_jobs=3, executor=executor)
+        geotimehash = convert_geotimehash(fcol, 8, hasher.hash_collection, n_jobs=2, executor=executor,
+            hash_cache=cache)
+        time_grid = convert_time_grid(fcol, delta, dt.timedelta(minutes=30), hasher.hash_coordinates,
+            n_jobs=2, executor=executor)
+
+    pd.testing.assert_frame_equal(timehex, convert_timehex(fcol, delta, hasher.hash_collection))
+    assert geotimehash == convert_geotimehash(fcol, 8, hasher.hash_collection)
+    pd.testing.assert_frame_equal(
+        time_grid, convert_time_grid(fcol, delta, dt.timedelta(minutes=30), hasher.hash_coordinates)
+    )
+
+    cache.hash_shape(fcol.geoshapes[0], hasher.hash_collection)
+    copy = pickle.loads(pickle.dumps(cache))
+    assert (copy.max_entries, len(copy), copy.cache_info().misses) == (cache.max_entries, 0, 0)
@@ -1,12 +1,17 @@
 import pytest
 import pandas as pd
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
 
-from geostructures import Coordinate, GeoPoint
-from geostructures.collections import  Track
+from geostructures import Coordinate, GeoCircle, GeoPoint
+from geostructures.collections import  FeatureCollection, Track
+from geostructures.geohash import H3Hasher
+from geostructures.time import TimeInterval
 
-from geochron.time_grid import  break_time_interval, round_down_datetime, extract_intervals_in_range \
-,create_time_list_from_datetimes, convert_time_grid 
+from geochron.time_grid import  _interval_rows, break_time_interval, round_down_datetime, extract_intervals_in_range \
+,create_time_list_from_datetimes, convert_time_grid, convert_time_grid_batch, subinterval_windows, \
+EMPTY_SUBINTERVAL
 
 @pytest.fixture
 def sample_track():
@@ -38,6 +43,18 @@ def test_break_time_interval(sample_track):
     assert result[2] == Track([GeoPoint(Coordinate(-0.087478, 51.508595), dt=datetime(2020, 1, 1, 10, 11))])
 
 
+def test_interval_rows(sample_track):
+    interval_list = [datetime(2020, 1, 1, 9, 0), datetime(2020, 1, 1, 10, 0)]
+    spanning = GeoCircle(Coordinate(-0.087478, 51.508595), 50,
+        dt=TimeInterval(datetime(2020, 1, 1, 9, 50), datetime(2020, 1, 1, 10, 10)))
+    shapes = Track(sample_track.geoshapes + [spanning]).geoshapes
+
+    kept, rows = _interval_rows(shapes, interval_list, timedelta(hours=1))
+    expected = break_time_interval(Track(shapes), interval_list, timedelta(hours=1))
+
+    assert [shapes[pos] for pos in kept] == [shape for tr in expected for shape in tr.geoshapes]
+    assert rows.tolist() == [0, 0, 1]
+
 def test_round_down_datetime():
     # Test cases
     test_cases = [
@@ -107,5 +124,104 @@ def test_convert_time_grid(sample_track):
     assert result['Period_1'][0] == 'hash_0'
     assert result['Period_2'][0] == 0 
 
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        parallel = convert_time_grid(sample_track, time_interval, time_subinterval, hash_func.hash_coordinates,
+        executor=executor)
+
+    assert parallel.equals(result)
+
+
+
 
 
+def test_subinterval_windows():
+    interval_list = [datetime(2023, 1, 1, 0, 0), datetime(2023, 1, 1, 4, 0)]
+    windows = subinterval_windows(interval_list, 4, timedelta(hours=1))
+
+    assert windows.shape == (2, 5)
+    for row, interval in zip(windows, interval_list):
+        expected = [time - timedelta(microseconds=1) for time in create_time_list_from_datetimes(interval, 5,
+        timedelta(hours=1))]
+        assert list(pd.DatetimeIndex(row).to_pydatetime()) == expected
+
+
+# Batched hash function accepting agg_fn, keyed by the rounded coordinate
+class BatchHashFunc:
+    def hash_coordinates(self, points, agg_fn=len):
+        hashmap = defaultdict(list)
+        for point in points:
+            hashmap[f"{point.longitude:.6f}_{point.latitude:.6f}"].append(point)
+        return {key: agg_fn(value) for key, value in hashmap.items()}
+
+
+def test_convert_time_grid_spanning_shapes():
+    track = Track(
+        [
+            GeoCircle(Coordinate(1.0, 1.0), 100, dt=TimeInterval(datetime(2020, 1, 1, 8, 10, tzinfo=timezone.utc),
+            datetime(2020, 1, 1, 8, 50, tzinfo=timezone.utc))),
+            # 8:40 UTC, in another timezone
+            GeoPoint(Coordinate(3.0, 2.0), dt=datetime(2020, 1, 1, 9, 40, tzinfo=timezone(timedelta(hours=1)))),
+            GeoPoint(Coordinate(5.0, 5.0), dt=datetime(2020, 1, 1, 9, 15, tzinfo=timezone.utc)),
+        ]
+    )
+    result = convert_time_grid(track, timedelta(hours=1), timedelta(minutes=30), BatchHashFunc().hash_coordinates)
+
+    # the circle lasts into the second subinterval, where it is averaged with the point
+    assert result['Period_1'].tolist() == ['1.000000_1.000000', '5.000000_5.000000', 0]
+    assert result['Period_2'].tolist() == ['2.000000_1.500000', 0, 0]
+
+
+def test_convert_time_grid_integerize(sample_track):
+    hasher = H3Hasher(resolution=10)
+    hashed = convert_time_grid(sample_track, timedelta(hours=1), timedelta(minutes=30), hasher.hash_coordinates)
+    result = convert_time_grid(sample_track, timedelta(hours=1), timedelta(minutes=30), hasher.hash_coordinates,
+    integerize=True)
+
+    assert (result.dtypes[:-1] == 'uint64').all()
+    assert result['Period_1'][0] == int(hashed['Period_1'][0], 16)
+    assert result['Period_2'][0] == EMPTY_SUBINTERVAL
+
+    # one partition per interval, including the empty last one
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        parallel = convert_time_grid(sample_track, timedelta(hours=1), timedelta(minutes=30), hasher.hash_coordinates,
+        integerize=True, n_jobs=4, executor=executor)
+    assert parallel.equals(result)
+
+    sparse = convert_time_grid(sample_track, timedelta(hours=1), timedelta(minutes=30), hasher.hash_coordinates,
+    integerize=True, sparse=True)
+
+    assert sparse['Period_1'].dtype == pd.SparseDtype('uint64', EMPTY_SUBINTERVAL)
+    assert sparse['Period_1'].sparse.density == 0.75
+    assert sparse['Period_2'].sparse.density == 0.25
+    assert sparse.drop(columns='interval_start').sparse.to_dense().equals(result.drop(columns='interval_start'))
+
+
+def test_convert_time_grid_batch(sample_track):
+    hasher = H3Hasher(resolution=10)
+    shapes = [
+        GeoPoint(shape.centroid, dt=shape.dt, properties={'vehicle': vehicle})
+        for shape, vehicle in zip(sample_track.geoshapes, ['b', 'a', 'b', 'b'])
+    ]
+    tensor, entities, interval_starts = convert_time_grid_batch(
+        FeatureCollection(shapes), timedelta(hours=1), timedelta(minutes=30), hasher.hash_coordinates, 'vehicle'
+    )
+
+    assert tensor.dtype == 'uint64'
+    assert tensor.shape == (2, 4, 2)
+    assert entities == ['b', 'a']
+    assert [start.hour for start in interval_starts] == [8, 9, 10, 11]
+
+    grid_b = convert_time_grid(FeatureCollection(shapes[0:1] + shapes[2:]), timedelta(hours=1), timedelta(minutes=30),
+    hasher.hash_coordinates, integerize=True)
+    assert (tensor[0] == grid_b.drop(columns='interval_start').to_numpy()).all()
+    assert tensor[1, 1, 0] == int(list(hasher.hash_coordinates([shapes[1].centroid]))[0], 16)
+    assert (tensor[1] != EMPTY_SUBINTERVAL).sum() == 1
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        parallel, _, _ = convert_time_grid_batch(FeatureCollection(shapes), timedelta(hours=1), timedelta(minutes=30),
+        hasher.hash_coordinates, 'vehicle', executor=executor)
+    assert (parallel == tensor).all()
+
+    with pytest.raises(ValueError):
+        convert_time_grid_batch(FeatureCollection(shapes + [sample_track.geoshapes[0]]), timedelta(hours=1),
+        timedelta(minutes=30), hasher.hash_coordinates, 'vehicle')
@@ -1,8 +1,10 @@
-
 import datetime as dt
-from geochron.time_slicing import get_timestamp_intervals, time_slice_track
-from geostructures import Coordinate, GeoPoint
+import numpy as np
+from geochron.time_slicing import track_time_bounds, get_timestamp_intervals, \
+bucket_track, bucket_offsets, interval_labels, time_slice_track
+from geostructures import Coordinate, GeoCircle, GeoPoint
 from geostructures.collections import  Track
+from geostructures.time import TimeInterval
 
 track = Track(
     [
@@ -13,12 +15,51 @@ track = Track(
     ]
 )
 
+def test_track_time_bounds():
+    circle = GeoCircle(
+        Coordinate(-0.118092, 51.509865),
+        radius=500,
+        dt=TimeInterval(dt.datetime(2020, 1, 1, 9, 30), dt.datetime(2020, 1, 1, 9, 42))
+    )
+    starts, ends = track_time_bounds(Track([circle]))
+
+    assert starts[0] == np.datetime64('2020-01-01T09:30')
+    assert ends[0] == np.datetime64('2020-01-01T09:42')
+
 def test_get_timestamp_intervals():
     timestamps = get_timestamp_intervals(track,dt.timedelta(hours=1))
     
     assert timestamps[-1] == dt.datetime(2020, 1, 1, 10, 5,1, tzinfo=dt.timezone.utc)
 
+def test_bucket_track():
+    test_timestamps = [dt.datetime(2020, 1, 1, 9, 5, tzinfo=dt.timezone.utc),
+    dt.datetime(2020, 1, 1, 10, 0, tzinfo=dt.timezone.utc)]
+    circle = GeoCircle(
+        Coordinate(-0.118092, 51.509865),
+        radius=500,
+        dt=TimeInterval(dt.datetime(2020, 1, 1, 9, 0), dt.datetime(2020, 1, 1, 9, 30))
+    )
+    test_track = Track(track.geoshapes + [circle])
+
+    buckets = bucket_track(test_track, test_timestamps)
+
+    # the circle straddles the first boundary and the last ping is past the final timestamp
+    assert buckets.tolist() == [0, -1, 1, 1, -1]
+    assert len(bucket_track(Track([]), test_timestamps)) == 0
 
+def test_bucket_offsets():
+    positions, offsets = bucket_offsets(np.array([0, -1, 1, 1, -1, 3]), 4)
+
+    assert positions.tolist() == [0, 2, 3, 5]
+    assert offsets.tolist() == [0, 1, 3, 3, 4]
+
+def test_interval_labels():
+    test_timestamps = [dt.datetime(2020, 1, 1, 9, 5, tzinfo=dt.timezone.utc),
+    dt.datetime(2020, 1, 1, 10, 5, 1, tzinfo=dt.timezone.utc)]
+    labels = interval_labels(track.start, test_timestamps)
+
+    assert labels == ['2020-01-01 08:05:00, 2020-01-01 09:05:00',
+    '2020-01-01 09:05:00, 2020-01-01 10:05:01']
 
 def test_time_slice_track():
     test_timestamps = [dt.datetime(2020, 1, 1, 9, 5, tzinfo=dt.timezone.utc),
@@ -26,5 +67,4 @@ def test_time_slice_track():
     track_list = time_slice_track(track, test_timestamps)
 
     assert track_list[-1].end == dt.datetime(2020, 1, 1, 10, 5, tzinfo=dt.timezone.utc)
-
-    
\ No newline at end of file
+    assert [len(x) for x in track_list] == [1, 3]
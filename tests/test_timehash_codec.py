@@ -0,0 +1,47 @@
+import numpy as np
+import timehash
+from geochron.timehash_codec import (
+    cover_timehashes, encode_timehashes, expand_timehash, timehash_codes, timehash_start_seconds
+)
+
+def test_encode_timehashes():
+    times = np.array([0.0, 1577871000.0, 1577871480.0, 2019686400.0, 4039372800.0, 4.5e9])
+
+    for precision in [1, 8, 10, 12]:
+        encoded = encode_timehashes(times, precision)
+
+        assert encoded.shape == times.shape
+        assert encoded.tolist() == [timehash.encode(time, precision) for time in times.tolist()]
+
+    assert encode_timehashes(1577871000.0, 8) == 'b0ffffba'
+    assert encode_timehashes([1577871000.0], 0).tolist() == ['']
+
+def test_cover_timehashes():
+    start, end = 1577871000.0, 1577871000.0 + 86400 * 30
+
+    cover = cover_timehashes(start, end, 10)
+
+    assert cover[:3] == ['b0ffffbacf', 'b0ffffbad', 'b0ffffbae']
+    assert len(cover) == 36
+    expanded = np.concatenate([expand_timehash(prefix, 10) for prefix in cover])
+    first, last = timehash_codes([start, end], 10)
+    assert len(expanded) == last - first + 1
+    assert expanded[0] == encode_timehashes(start, 10)
+    assert expanded[-1] == encode_timehashes(end, 10)
+    assert cover_timehashes(start, start, 8) == [timehash.encode(start, 8)]
+
+def test_expand_timehash():
+    expanded = expand_timehash('b0f', 4)
+
+    assert expanded.tolist() == ['b0f0', 'b0f1', 'b0fa', 'b0fb', 'b0fc', 'b0fd', 'b0fe', 'b0ff']
+    assert expand_timehash('b0f', 3).tolist() == ['b0f']
+
+def test_timehash_start_seconds():
+    timehashes = ['b0ffffba', 'b0ffffbacf', 'b', '00000000']
+
+    starts = timehash_start_seconds(timehashes)
+
+    assert starts.tolist() == [
+        mid - error for mid, error in (timehash.decode_exactly(value) for value in timehashes)
+    ]
+    assert timehash_start_seconds([]).tolist() == []
@@ -1,7 +1,10 @@
 import datetime as dt
-from geochron.timehex import hash_tracks_into_timehexdf, convert_timehex
+import pandas as pd
+import pytest
+from geochron.timehex import hash_tracks_into_timehexdf, counts_into_timehexdf, convert_timehex, iter_timehex, \
+    iter_timehex_chunks
 from geostructures import Coordinate, GeoPoint
-from geostructures.collections import  Track
+from geostructures.collections import  FeatureCollection, Track
 from geostructures.geohash import H3Hasher
 
 hasher = H3Hasher(resolution = 10)
@@ -29,6 +32,24 @@ def test_hash_tracks_into_timehexdf():
     assert test_df['8a194ad3056ffff'].values[1] == 1
 
 
+def test_counts_into_timehexdf():
+    counts = pd.DataFrame({'interval': [0, 1, 1], 'cell': ['a', 'a', 'b'], 'count': [1, 2, 1]})
+    test_df = counts_into_timehexdf(counts, dt.datetime(2020, 1, 1, 8, 5), test_timestamps)
+
+    assert list(test_df.columns) == ['interval', 'a', 'b', 'start_time', 'end_time']
+    assert test_df['a'].dtype == 'int64'
+    assert test_df['b'].isna().values[0]
+    assert test_df['end_time'].values[1] == pd.Timestamp('2020-01-01 10:05:01')
+
+    sparse_df = counts_into_timehexdf(counts, dt.datetime(2020, 1, 1, 8, 5), test_timestamps, sparse=True)
+
+    assert list(sparse_df.columns) == list(test_df.columns)
+    assert sparse_df['b'].dtype == pd.SparseDtype('int64', 0)
+    assert sparse_df['a'].tolist() == [1, 2]
+    assert sparse_df['b'].tolist() == [0, 1]
+    assert sparse_df['start_time'].equals(test_df['start_time'])
+
+
 def test_convert_chronnet():
     track = Track(
     [
@@ -41,4 +62,120 @@ def test_convert_chronnet():
 
     test_timehex = convert_timehex(track, dt.timedelta(hours=1), hasher.hash_collection)
 
-    assert test_timehex['8a194ad3056ffff'].values[1] == 1
\ No newline at end of file
+    assert test_timehex['8a194ad3056ffff'].values[1] == 1
+
+    weighted = lambda tr: {cell: 10 * count for cell, count in hasher.hash_collection(tr).items()}
+    weighted_timehex = convert_timehex(track, dt.timedelta(hours=1), weighted)
+
+    assert weighted_timehex['8a194ad3056ffff'].values[1] == 10
+
+    parallel_timehex = convert_timehex(track, dt.timedelta(hours=1), hasher.hash_collection, n_jobs=2)
+
+    assert parallel_timehex.equals(test_timehex)
+
+    sparse_timehex = convert_timehex(track, dt.timedelta(hours=1), hasher.hash_collection, sparse=True)
+
+    assert sparse_timehex["8a194ad3056ffff"].tolist() == [0, 1]
+
+    long_timehex = convert_timehex(track, dt.timedelta(hours=1), hasher.hash_collection, layout='long')
+
+    assert list(long_timehex.columns) == ['interval_start', 'interval_end', 'cell', 'count']
+    assert long_timehex['cell'].dtype == 'category'
+    assert len(long_timehex) == test_timehex.drop(columns=['interval', 'start_time', 'end_time']).count().sum()
+    row = long_timehex[long_timehex['cell'] == '8a194ad3056ffff'].iloc[0]
+    assert row['count'] == 1
+    assert row['interval_start'] == test_timehex['start_time'][1]
+    assert row['interval_end'] == test_timehex['end_time'][1]
+
+    with pytest.raises(ValueError):
+        convert_timehex(track, dt.timedelta(hours=1), hasher.hash_collection, layout='tall')
+    with pytest.raises(ValueError):
+        convert_timehex(track, dt.timedelta(hours=1), hasher.hash_collection, sparse=True, layout='long')
+
+def test_convert_timehex_timezone():
+    eastern = dt.timezone(dt.timedelta(hours=-5))
+    track = Track(
+    [
+        GeoPoint(Coordinate(-0.104154, 51.511920), dt=dt.datetime(2020, 1, 1, 8, 5, tzinfo=eastern)),
+        GeoPoint(Coordinate(-0.096533, 51.511903), dt=dt.datetime(2020, 1, 1, 9, 23, tzinfo=eastern)),
+    ]
+    )
+
+    test_timehex = convert_timehex(track, dt.timedelta(hours=1), hasher.hash_collection)
+
+    assert test_timehex['interval'].tolist() == ['2020-01-01 08:05:00, 2020-01-01 09:05:00',
+    '2020-01-01 09:05:00, 2020-01-01 10:05:01']
+    assert test_timehex['start_time'][0] == pd.Timestamp(2020, 1, 1, 8, 5)
+
+    long_timehex = convert_timehex(track, dt.timedelta(hours=1), hasher.hash_collection, layout='long')
+
+    assert long_timehex['interval_end'].tolist() == test_timehex['end_time'].tolist()
+
+def test_iter_timehex():
+    track = Track(
+    [
+        GeoPoint(Coordinate(-0.104154, 51.511920), dt=dt.datetime(2020, 1, 1, 8, 5)),
+        GeoPoint(Coordinate(-0.096533, 51.511903), dt=dt.datetime(2020, 1, 1, 9, 23)),
+        GeoPoint(Coordinate(-0.096533, 51.511903), dt=dt.datetime(2020, 1, 1, 9, 30)),
+        GeoPoint(Coordinate(-0.087478, 51.508595), dt=dt.datetime(2020, 1, 1, 12, 5)),
+    ]
+    )
+
+    intervals = list(iter_timehex(track, dt.timedelta(hours=1), hasher.hash_collection))
+    test_timehex = convert_timehex(track, dt.timedelta(hours=1), hasher.hash_collection)
+
+    assert len(intervals) == len(test_timehex)
+    assert [start for start, _, _ in intervals] == test_timehex['start_time'].tolist()
+    assert [end for _, end, _ in intervals] == test_timehex['end_time'].tolist()
+    assert intervals[1][2] == {'8a194ad32b07fff': 2}
+    assert intervals[2][2] == {}
+
+    long_timehex = convert_timehex(track, dt.timedelta(hours=1), hasher.hash_collection, layout='long')
+    rows = [
+        (start, end, cell, count)
+        for start, end, hashmap in intervals for cell, count in hashmap.items()
+    ]
+    assert rows == list(long_timehex.astype({'cell': object}).itertuples(index=False, name=None))
+
+    assert not list(iter_timehex(Track([]), dt.timedelta(hours=1), hasher.hash_collection))
+
+    # only the shapes of the first interval are hashed before it is yielded
+    hashed = []
+    def counting_hash(shapes, agg_fn=len):
+        hashed.extend(shapes.geoshapes)
+        return hasher.hash_collection(shapes, agg_fn=agg_fn)
+
+    first = next(iter_timehex(track, dt.timedelta(hours=1), counting_hash))
+
+    assert first == intervals[0]
+    assert hashed == track.geoshapes[:1]
+
+def test_iter_timehex_chunks():
+    shapes = [
+        GeoPoint(Coordinate(-0.104154, 51.511920), dt=dt.datetime(2020, 1, 1, 8, 5)),
+        GeoPoint(Coordinate(-0.096533, 51.511903), dt=dt.datetime(2020, 1, 1, 9, 23)),
+        GeoPoint(Coordinate(-0.096533, 51.511903), dt=dt.datetime(2020, 1, 1, 9, 30)),
+        GeoPoint(Coordinate(-0.087478, 51.508595), dt=dt.datetime(2020, 1, 1, 12, 20)),
+    ]
+    chunks = [FeatureCollection(shapes[:2]), FeatureCollection([]), FeatureCollection(shapes[2:])]
+
+    frames = list(iter_timehex_chunks(chunks, dt.timedelta(hours=1), hasher.hash_collection))
+    long_timehex = convert_timehex(Track(shapes), dt.timedelta(hours=1), hasher.hash_collection, layout='long')
+
+    assert [len(frame) for frame in frames] == [1, 1, 1]
+    pd.testing.assert_frame_equal(
+        pd.concat(frames, ignore_index=True).astype({'cell': object}).drop(columns='interval_end'),
+        long_timehex.astype({'cell': object}).drop(columns='interval_end')
+    )
+    assert frames[2]['interval_end'].tolist() == [pd.Timestamp(2020, 1, 1, 13, 5)]
+
+    points = pd.DataFrame({
+        'lat': [shape.centroid.latitude for shape in shapes],
+        'lon': [shape.centroid.longitude for shape in shapes],
+        'timestamp': [shape.start for shape in shapes],
+    })
+    point_frames = iter_timehex_chunks([points[:3], points[3:]], dt.timedelta(hours=1), hasher.hash_collection)
+    pd.testing.assert_frame_equal(pd.concat(point_frames, ignore_index=True), pd.concat(frames, ignore_index=True))
+
+    with pytest.raises(ValueError):
+        list(iter_timehex_chunks(chunks[::-1], dt.timedelta(hours=1), hasher.hash_collection))
@@ -171,4 +171,30 @@ def test_timehex_timestampedgeojson():
 
     assert isinstance(result, dict)
     assert result['type'] == 'FeatureCollection'
-    assert result['features'][0]['properties']['style']['opacity'] == 0.7
\ No newline at end of file
+    assert result['features'][0]['properties']['style']['opacity'] == 0.7
+
+def test_long_timehex():
+    wide = pd.DataFrame({
+        'interval': ['a', 'b'],
+        'start_time': pd.to_datetime(['2022-01-01', '2022-01-02']),
+        'end_time': pd.to_datetime(['2022-01-02', '2022-01-03']),
+        '89283082837ffff': [1, None],
+        '89283082833ffff': [3, 4]
+    })
+    long = pd.DataFrame({
+        'interval_start': pd.to_datetime(['2022-01-01', '2022-01-01', '2022-01-02']),
+        'interval_end': pd.to_datetime(['2022-01-02', '2022-01-02', '2022-01-03']),
+        'cell': pd.Categorical(['89283082837ffff', '89283082833ffff', '89283082833ffff']),
+        'count': [1, 3, 4]
+    })
+
+    assert timehex_styledict(long) == timehex_styledict(wide)
+
+    background = json.loads(timehex_backgroundata(long))
+    assert {feature['id'] for feature in background['features']} == {'89283082837ffff', '89283082833ffff'}
+
+    result = timehex_timestampedgeojson(long)
+    assert len(result['features']) == 3
+    assert {feature['properties']['time'] for feature in result['features']} == {
+        '2022-01-01T00:00:00', '2022-01-02T00:00:00'
+    }